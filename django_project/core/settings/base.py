@@ -157,6 +157,18 @@ LOGIN_REDIRECT_URL = '/'
 LAYER_TILES_PATH = os.getenv('LAYER_TILES_PATH')
 LAYER_TILES_BASE_URL = os.getenv(
     'LAYER_TILES_BASE_URL', 'http://0.0.0.0:51101')
+# storage of vector tiles: directory or mbtiles (local file system only)
+VECTOR_TILE_STORAGE = os.getenv('VECTOR_TILE_STORAGE', 'directory')
+# renderer of vector tiles: tegola or native (in-process ST_AsMVT)
+VECTOR_TILE_RENDERER = os.getenv('VECTOR_TILE_RENDERER', 'tegola')
+# only render tiles that are covered by the simplified geometries
+VECTOR_TILE_SKIP_EMPTY_TILES = (
+    os.getenv('VECTOR_TILE_SKIP_EMPTY_TILES', 'False').lower() == 'true'
+)
+# only re-render tiles of changed entities when regenerating vector tiles
+VECTOR_TILE_INCREMENTAL = (
+    os.getenv('VECTOR_TILE_INCREMENTAL', 'False').lower() == 'true'
+)
 
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10240  # higher than the count of fields
 
@@ -137,3 +137,7 @@ CODE_COMMIT_HASH = code_commit_release_version()
 EXPORT_DATA_EXPIRY_IN_HOURS = int(os.environ.get(
     'EXPORT_DATA_EXPIRY_IN_HOURS', '48'
 ))
+# max size of cached intermediate geojson exports, 0 to disable the cache
+EXPORT_GEOJSON_CACHE_SIZE_MB = int(os.environ.get(
+    'EXPORT_GEOJSON_CACHE_SIZE_MB', '0'
+))
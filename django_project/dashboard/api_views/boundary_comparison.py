@@ -320,12 +320,10 @@ class BoundaryComparisonMatchTable(AzureAuthRequiredMixin, APIView):
             sort_by,
             sort_direction
         )
-        parent_id_key = 'id'
-        for i in range(level):
-            parent_id_key = 'parent__' + parent_id_key
-        main_boundaries = GeographicalEntity.objects.filter(
-            level=level,
-            **{parent_id_key: entity_upload.revised_geographical_entity.id}
+        main_boundaries = (
+            entity_upload.revised_geographical_entity.all_children().filter(
+                level=level
+            )
         )
         boundary_comparisons = BoundaryComparison.objects.filter(
             main_boundary__in=main_boundaries
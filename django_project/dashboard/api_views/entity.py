@@ -27,6 +27,7 @@ from georepo.models import (
 )
 from georepo.models.base_task_request import COMPLETED_STATUS, PENDING, DONE
 from georepo.tasks.dataset_view import check_affected_dataset_views
+from georepo.utils.entity_attribute import refresh_entity_attributes
 from georepo.utils.permission import (
     EXTERNAL_READ_VIEW_PERMISSION_LIST,
     get_view_permission_privacy_level,
@@ -217,6 +218,8 @@ class EntityEdit(APIView):
         serializer.is_valid(raise_exception=True)
         if request.data.get('is_dirty', False):
             entity = serializer.save()
+            # edited ids and names are read from the entity attributes
+            refresh_entity_attributes(entity.dataset.id, [entity.id])
             check_affected_dataset_views.delay(
                 entity.dataset.id, [entity.id], [], False)
             entity.refresh_from_db()
@@ -91,9 +91,19 @@ def view_vector_tiles_task(view_id: str,
     )
     from georepo.utils.vector_tile import (
         reset_pending_tile_cache_keys,
-        set_pending_tile_cache_keys
+        set_pending_tile_cache_keys,
+        set_tile_alias_cache_keys
     )
+    from georepo.utils.entity_attribute import (
+        is_entity_attribute_ready,
+        refresh_entity_attributes
+    )
+    from georepo.utils.entity_search import refresh_entity_search_names
     view = DatasetView.objects.get(id=view_id)
+    if not is_entity_attribute_ready(view.dataset_id):
+        # later updates are refreshed by check_affected_dataset_views
+        refresh_entity_attributes(view.dataset_id)
+    refresh_entity_search_names(view)
     obj_log, _ = DatasetViewResourceLog.objects.get_or_create(
         dataset_view=view
     )
@@ -128,6 +138,8 @@ def view_vector_tiles_task(view_id: str,
             'entity_count', 'status', 'vector_tile_sync_status',
             'vector_tiles_progress'
         ])
+    # empty resources share the tiles of lower privacy level
+    set_tile_alias_cache_keys(view)
 
     for view_resource in view_resources:
         reset_pending_tile_cache_keys(view_resource)
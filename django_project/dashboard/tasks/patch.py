@@ -16,12 +16,14 @@ def fix_entity_name_encoding(dataset_id):
     import fiona
     from georepo.models import Dataset, GeographicalEntity, EntityName
     from georepo.utils.layers import get_feature_value
+    from georepo.utils.entity_attribute import refresh_entity_attributes
     logger.info(f'Running fix_entity_name_encoding of dataset {dataset_id}')
     dataset = Dataset.objects.get(id=dataset_id)
     upload_sessions = LayerUploadSession.objects.filter(
         dataset=dataset,
         status=DONE
     )
+    patched_entity_ids = []
     for upload_session in upload_sessions:
         layer_files = LayerFile.objects.filter(
             layer_upload_session=upload_session
@@ -101,11 +103,14 @@ def fix_entity_name_encoding(dataset_id):
                                 )
                             except IntegrityError:
                                 pass
+                        patched_entity_ids.append(entity.id)
                     if feature_idx % 10 == 0:
                         logger.info(f'Patching {feature_idx+1}/'
                                     f'{total_features}')
                 logger.info(f'Finished patching {feature_idx+1}/'
                             f'{total_features}')
+    # names and labels are read from the entity attributes
+    refresh_entity_attributes(dataset.id, patched_entity_ids)
 
 
 @shared_task(name='do_generate_adm0_default_views')
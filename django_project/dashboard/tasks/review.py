@@ -20,6 +20,8 @@ from dashboard.models.notification import (
     NOTIF_TYPE_BATCH_REVIEW
 )
 from georepo.tasks.dataset_view import check_affected_dataset_views
+from georepo.utils.entity_query import invalidate_entity_schema
+from georepo.utils.entity_attribute import refresh_entity_attributes
 
 logger = logging.getLogger(__name__)
 UserModel = get_user_model()
@@ -49,7 +51,13 @@ def review_approval(
         'approve_revision'
     )
     approve_revision(entity_upload, user, **kwargs)
+    invalidate_entity_schema(dataset.id)
     if entity_upload.revised_geographical_entity:
+        # approved entities are visible in the views right away
+        refresh_entity_attributes(
+            dataset.id,
+            [entity_upload.revised_geographical_entity.id]
+        )
         check_affected_dataset_views.delay(
             dataset.id,
             [entity_upload.revised_geographical_entity.id],
@@ -128,6 +136,11 @@ def process_batch_review(batch_review_id):
                 True,
                 **kwargs
             )
+            if upload.revised_geographical_entity_id:
+                refresh_entity_attributes(
+                    dataset.id,
+                    [upload.revised_geographical_entity_id]
+                )
         else:
             reject_func = module_function(
                 dataset.module.code_name,
@@ -158,6 +171,7 @@ def process_batch_review(batch_review_id):
 
             dataset.is_simplified = False
             dataset.save()
+            invalidate_entity_schema(dataset.id)
             trigger_generate_dynamic_views(dataset, adm0_list=adm0_list)
             check_affected_dataset_views.delay(
                 dataset.id,
@@ -220,6 +234,7 @@ def revert_process_batch_review_approval(batch_review_id):
             'review',
             'revert_approve_revision')
         revert_approval_func(upload)
+        invalidate_entity_schema(dataset.id)
     task = process_batch_review.delay(batch_review.id)
     batch_review.task_id = task.id
     batch_review.save(update_fields=['task_id'])
@@ -3,7 +3,7 @@ import uuid
 import json
 from unittest import mock
 from dateutil.parser import isoparse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.gis.geos import GEOSGeometry
 
@@ -11,6 +11,8 @@ from rest_framework.test import APIRequestFactory
 
 from georepo.utils import absolute_path
 from georepo.models import IdType, EntityName, DatasetView
+from georepo.models.entity import EntityAttribute
+from georepo.utils.entity_attribute import refresh_entity_attributes
 from georepo.utils.dataset_view import (
     generate_default_view_dataset_latest,
     init_view_privacy_level,
@@ -274,6 +276,36 @@ class TestApiEntity(TestCase):
         # idx should be positive integer
         self.assertTrue(name.idx is not None and name.idx > 0)
 
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    })
+    def test_entity_edit_refresh_attributes(self, mock_check_views):
+        refresh_entity_attributes(self.geographical_entity.dataset.id)
+        payload = copy.deepcopy(self.payload)
+        payload['names'].append({
+            'id': 0,
+            'default': False,
+            'name': 'some-name',
+            'language_id': None,
+            'label': ''
+        })
+        payload['is_dirty'] = True
+        request = self.factory.post(
+            f"{reverse('entity-edit', args=[self.geographical_entity.id])}/",
+            json.dumps(payload),
+            content_type='application/json'
+        )
+        request.user = self.superuser
+        list_view = EntityEdit.as_view()
+        list_view(request, self.geographical_entity.id)
+        # attributes are refreshed before the views are checked
+        attributes = EntityAttribute.objects.get(
+            geographical_entity=self.geographical_entity
+        ).attributes
+        self.assertIn('some-name', attributes.values())
+
     def test_entity_edit_change_name(self, mock_check_views):
         payload = copy.deepcopy(self.payload)
         payload['names'][0] = {
@@ -71,6 +71,7 @@ from georepo.utils.directory_helper import (
     get_folder_size
 )
 from georepo.utils.celery_helper import get_task_status
+from georepo.utils.mbtiles import is_mbtiles_storage, get_mbtiles_size
 
 
 User = get_user_model()
@@ -476,11 +477,18 @@ def download_view_size_action(modeladmin, request, queryset):
     writer = csv.writer(response)
     writer.writerow(['View', 'Vector Tiles'])
     for dataset_view in queryset:
-        tile_path = os.path.join(
-            settings.LAYER_TILES_PATH,
-            str(dataset_view.uuid)
-        )
-        vector_tile_size = convert_size(get_folder_size(tile_path))
+        if is_mbtiles_storage():
+            # tiles of each view resource are stored in one archive
+            vector_tile_size = convert_size(sum([
+                get_mbtiles_size(view_resource.resource_id) for
+                view_resource in dataset_view.datasetviewresource_set.all()
+            ]))
+        else:
+            tile_path = os.path.join(
+                settings.LAYER_TILES_PATH,
+                str(dataset_view.uuid)
+            )
+            vector_tile_size = convert_size(get_folder_size(tile_path))
         writer.writerow([
             dataset_view.name,
             vector_tile_size
@@ -668,6 +676,9 @@ def trigger_resource_vt_generation(view_resource, is_overwrite):
     view_resource.status = DatasetView.DatasetViewStatus.PENDING
     view_resource.vector_tile_sync_status = DatasetView.SyncStatus.SYNCING
     view_resource.vector_tiles_progress = 0
+    if is_overwrite:
+        # regenerate all tiles instead of only the changed entities
+        view_resource.dirty_tile_bboxes = None
     # check if it's zero tile, if yes, then can enable live vt
     # when there is existing vector tile, live vt will be enabled
     # after zoom level 0 generation
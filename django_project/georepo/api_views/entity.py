@@ -12,6 +12,7 @@ from django.utils.decorators import method_decorator
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.exceptions import ParseError
 from rest_framework.generics import get_object_or_404
 from django.contrib.gis.geos import GEOSGeometry
 from core.models.preferences import SitePreferences
@@ -57,6 +58,10 @@ from georepo.utils.unique_code import (
 from georepo.utils.url_helper import get_ucode_from_url_path
 from georepo.utils.uuid_helper import get_uuid_value
 from georepo.utils.url_helper import get_page_size
+from georepo.utils.keyset_pagination import (
+    paginate_by_keyset,
+    get_approximate_count
+)
 from georepo.api_views.api_collections import (
     SEARCH_ENTITY_TAG,
     OPERATION_ENTITY_TAG,
@@ -749,10 +754,60 @@ class EntitySearchBase(ApiCache, DatasetDetailCheckPermission):
         )
         return entities.values(*values), max_level, ids, names_max_idx
 
+    def generate_cursor_response(self, entities,
+                                 context=None) -> Tuple[dict, dict]:
+        """
+        Return (keyset paginated response, response headers)
+
+        The page is fetched after the sort key in cursor, so deep pages
+        do not scan the skipped rows and total count is not queried
+        unless count=approximate is requested.
+        """
+        cursor = self.request.GET.get('cursor', '')
+        page_size = get_page_size(self.request)
+        # json or geojson. Default to json
+        format = self.request.GET.get('format', 'json')
+        with_count = (
+            self.request.GET.get('count', '').lower() == 'approximate'
+        )
+        output = []
+        next_cursor = None
+        total_count = 0
+        if entities is not None:
+            try:
+                output, next_cursor = paginate_by_keyset(
+                    entities, page_size, cursor)
+            except ValueError as ex:
+                raise ParseError(str(ex))
+            if with_count:
+                total_count = get_approximate_count(entities)
+        output = (
+            self.get_serializer()(
+                output,
+                many=True,
+                context=context
+            ).data
+        )
+        pagination = {
+            'page_size': page_size,
+            'next': next_cursor
+        }
+        if with_count:
+            pagination['count'] = total_count
+        if format == 'geojson':
+            pagination['next'] = next_cursor or ''
+            return output, pagination
+        return {
+            **pagination,
+            'results': output
+        }, None
+
     def generate_response(self, entities, context=None) -> Tuple[dict, dict]:
         """
         Return (paginated response, response headers)
         """
+        if 'cursor' in self.request.GET:
+            return self.generate_cursor_response(entities, context)
         # pagination parameter
         page = int(self.request.GET.get('page', '1'))
         page_size = get_page_size(self.request)
@@ -1,12 +1,20 @@
 import os
 import math
 import json
+import hashlib
 from typing import Tuple
 from rest_framework.views import APIView
+from django.core.cache import cache
 from django.db import connection
 from django.db.models.expressions import RawSQL
-from django.db.models import FilteredRelation, Q
-from django.http import Http404, FileResponse
+from django.db.models import FilteredRelation, Q, F
+from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.http import (
+    Http404,
+    FileResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse
+)
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
 from rest_framework.reverse import reverse
@@ -20,6 +28,8 @@ from django.contrib.gis.geos import GEOSGeometry
 from django.core.files.uploadedfile import TemporaryUploadedFile
 from rest_framework.parsers import MultiPartParser
 from rest_framework.renderers import JSONRenderer
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
 from core.models.preferences import SitePreferences
 from georepo.utils.permission import (
     DatasetViewDetailAccessPermission,
@@ -76,13 +86,23 @@ from georepo.api_views.api_collections import (
     SEARCH_VIEW_ENTITY_TAG,
     OPERATION_VIEW_ENTITY_TAG
 )
-from georepo.utils.api_parameters import common_api_params
+from georepo.utils.api_parameters import (
+    common_api_params,
+    cursor_api_params
+)
 from georepo.utils.entity_query import (
     GeomReturnType,
     validate_return_type,
     do_generate_fuzzy_query,
     do_generate_entity_query
 )
+from georepo.utils.custom_geo_functions import ForcePolygonCCW
+from georepo.utils.exporter_base import EXPORT_CURSOR_CHUNK_SIZE
+from georepo.utils.entity_search import (
+    FUZZY_SEARCH_CACHE_TIMEOUT,
+    get_entity_search_version,
+    get_fuzzy_search_cache_key
+)
 from georepo.tasks.search_id import (
     process_search_id_request
 )
@@ -333,7 +353,7 @@ class ViewEntityListByAdminLevel0(DatasetViewSearchBase,
         manual_parameters=[openapi.Parameter(
             'uuid', openapi.IN_PATH,
             description='View UUID', type=openapi.TYPE_STRING
-        ), *common_api_params, openapi.Parameter(
+        ), *common_api_params, *cursor_api_params, openapi.Parameter(
             'geom', openapi.IN_QUERY,
             description=(
                 'Geometry format: '
@@ -445,7 +465,7 @@ class ViewEntityListByAdminLevel(DatasetViewSearchBase,
                 'Admin level of the entity'
             ),
             type=openapi.TYPE_INTEGER
-        ), *common_api_params, openapi.Parameter(
+        ), *common_api_params, *cursor_api_params, openapi.Parameter(
             'geom', openapi.IN_QUERY,
             description=(
                 'Geometry format: '
@@ -556,7 +576,7 @@ class ViewEntityListByAdminLevelAndUCode(
             'ucode', openapi.IN_PATH,
             description='Entity Root UCode',
             type=openapi.TYPE_STRING
-        ), *common_api_params, openapi.Parameter(
+        ), *common_api_params, *cursor_api_params, openapi.Parameter(
             'geom', openapi.IN_QUERY,
             description=(
                 'Geometry format: '
@@ -668,7 +688,7 @@ class ViewEntityListByAdminLevelAndConceptUCode(
             'concept_ucode', openapi.IN_PATH,
             description='Entity Root Concept UCode',
             type=openapi.TYPE_STRING
-        ), *common_api_params, openapi.Parameter(
+        ), *common_api_params, *cursor_api_params, openapi.Parameter(
             'geom', openapi.IN_QUERY,
             description=(
                 'Geometry format: '
@@ -778,7 +798,7 @@ class ViewEntityListByEntityType(
                 'e.g. Sub district -> Sub_district'
             ),
             type=openapi.TYPE_STRING
-        ), *common_api_params, openapi.Parameter(
+        ), *common_api_params, *cursor_api_params, openapi.Parameter(
             'geom', openapi.IN_QUERY,
             description=(
                 'Geometry format: '
@@ -893,7 +913,7 @@ class ViewEntityListByEntityTypeAndUcode(
             'ucode', openapi.IN_PATH,
             description='Entity Root UCode',
             type=openapi.TYPE_STRING
-        ), *common_api_params, openapi.Parameter(
+        ), *common_api_params, *cursor_api_params, openapi.Parameter(
             'geom', openapi.IN_QUERY,
             description=(
                 'Geometry format: '
@@ -1191,17 +1211,35 @@ class ViewFindEntityFuzzySearch(APIView, DatasetViewDetailCheckPermission):
     def do_run_sql_query(self, view: DatasetView, search_text: str,
                          max_privacy_level: int,
                          page: int, page_size: int):
+        search_version = get_entity_search_version(view.id)
         fuzzy_query = (
             do_generate_fuzzy_query(view, search_text, max_privacy_level,
-                                    page, page_size)
+                                    page, page_size,
+                                    use_search_names=(
+                                        search_version is not None
+                                    ))
         )
+        similarity = self.get_trigram_similarity()
+        cache_key = None
+        if search_version is not None:
+            cache_key = get_fuzzy_search_cache_key(
+                view.id, search_version, search_text, max_privacy_level,
+                similarity, page, page_size
+            )
+            cached_result = cache.get(cache_key)
+            if cached_result is not None:
+                return (
+                    cached_result['rows'], cached_result['count_row'],
+                    fuzzy_query
+                )
         rows = []
+        count_row = 0
         with connection.cursor() as cursor:
             set_similarity_sql = (
                 """set pg_trgm.word_similarity_threshold=%s"""
             )
             cursor.execute(set_similarity_sql,
-                           [self.get_trigram_similarity()])
+                           [similarity])
             cursor.execute(fuzzy_query['sql'], fuzzy_query['query_values'])
             _rows = cursor.fetchall()
             for _row in _rows:
@@ -1210,10 +1248,18 @@ class ViewFindEntityFuzzySearch(APIView, DatasetViewDetailCheckPermission):
                     key = fuzzy_query['select_keys'][i]
                     val = _row[i]
                     _data[key] = val
+                count_row = _data.pop('total_count')
                 rows.append(_data)
-            cursor.execute(fuzzy_query['count_sql'],
-                           fuzzy_query['count_query_values'])
-            count_row = cursor.fetchone()[0]
+            if not rows and page > 1:
+                # page is out of range, count the matching names
+                cursor.execute(fuzzy_query['count_sql'],
+                               fuzzy_query['count_query_values'])
+                count_row = cursor.fetchone()[0]
+        if cache_key:
+            cache.set(cache_key, {
+                'rows': rows,
+                'count_row': count_row
+            }, timeout=FUZZY_SEARCH_CACHE_TIMEOUT)
         return rows, count_row, fuzzy_query
 
     @swagger_auto_schema(
@@ -1469,6 +1515,155 @@ class ViewFindEntityGeometryFuzzySearch(
         )
 
 
+class ViewEntityDump(APIView, DatasetViewDetailCheckPermission):
+    """
+    Stream all geographical entities in view
+
+    Return every entity in view as newline delimited JSON, one entity \
+    per line, using the same fields as the entity list APIs.
+    The response has ETag of the view version, request with \
+    If-None-Match header returns 304 when the view is not updated.
+
+    Example request:
+    ```
+    GET /operation/view/{uuid}/dump/?geom=full_geom
+    ```
+    """
+    permission_classes = [DatasetViewDetailAccessPermission]
+
+    def get_privacy_level(self, max_privacy_level):
+        privacy_level = self.request.GET.get('privacy_level', None)
+        if privacy_level is None:
+            return max_privacy_level
+        try:
+            privacy_level = int(privacy_level)
+        except ValueError:
+            raise ParseError(f'Invalid privacy level: {privacy_level}')
+        return min(privacy_level, max_privacy_level)
+
+    def get_etag(self, view: DatasetView, privacy_level: int,
+                 geom_type: GeomReturnType):
+        """Return version of view entities at privacy level."""
+        resource = view.datasetviewresource_set.filter(
+            privacy_level=privacy_level
+        ).first()
+        dataset = view.dataset
+        parts = [
+            str(view.uuid),
+            view.last_update.isoformat() if view.last_update else '',
+            dataset.last_update.isoformat() if dataset.last_update else '',
+            str(resource.uuid) if resource else '',
+            privacy_level,
+            geom_type.value
+        ]
+        return '"{}"'.format(hashlib.md5(
+            json.dumps(parts).encode('utf-8')
+        ).hexdigest())
+
+    def iter_entity_lines(self, entities, context):
+        """
+        Yield json line of each entity from server-side cursor.
+
+        Geometry is selected as GeoJSON text, so it is written to
+        the line without being parsed.
+        """
+        serializer = GeographicalEntitySerializer(context=context)
+        for entity in entities.iterator(
+            chunk_size=EXPORT_CURSOR_CHUNK_SIZE
+        ):
+            geometry = entity.pop('geometry_json', None)
+            representation = serializer.to_representation(entity)
+            if geometry:
+                # replaced by the GeoJSON text of the geometry
+                representation.pop('geometry', None)
+            line = json.dumps(representation, cls=JSONEncoder)
+            if geometry:
+                line = f'{line[:-1]}, "geometry": {geometry}}}'
+            yield line + '\n'
+
+    @swagger_auto_schema(
+        operation_id='operation-view-entity-dump',
+        tags=[OPERATION_VIEW_ENTITY_TAG],
+        manual_parameters=[openapi.Parameter(
+            'uuid', openapi.IN_PATH,
+            description='View UUID', type=openapi.TYPE_STRING
+        ), openapi.Parameter(
+            'geom', openapi.IN_QUERY,
+            description=(
+                'Geometry format: '
+                '[no_geom, centroid, full_geom]'
+            ),
+            type=openapi.TYPE_STRING,
+            default='no_geom',
+            required=False
+        ), openapi.Parameter(
+            'privacy_level', openapi.IN_QUERY,
+            description=(
+                'Privacy level of the entities; '
+                'default to the highest level of user'
+            ),
+            type=openapi.TYPE_INTEGER,
+            required=False
+        )],
+        responses={
+            200: openapi.Schema(
+                description='Newline delimited JSON of entities',
+                type=openapi.TYPE_STRING
+            ),
+            304: openapi.Schema(
+                description='View is not updated',
+                type=openapi.TYPE_STRING
+            ),
+            404: APIErrorSerializer
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        view, max_privacy_level = self.get_dataset_view_obj(
+            request, kwargs.get('uuid', None)
+        )
+        privacy_level = self.get_privacy_level(max_privacy_level)
+        geom_type = GeomReturnType.from_str(
+            request.GET.get('geom', 'no_geom'))
+        etag = self.get_etag(view, privacy_level, geom_type)
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified(headers={'ETag': etag})
+        entities = GeographicalEntity.objects.filter(
+            dataset=view.dataset,
+            is_approved=True,
+            privacy_level__lte=privacy_level,
+            id__in=RawSQL(
+                'SELECT id from "{}"'.format(str(view.uuid)), []
+            )
+        )
+        entities, values, max_level, ids, names_max_idx = (
+            do_generate_entity_query(
+                entities, view.dataset.id,
+                geom_type=(
+                    GeomReturnType.NO_GEOM if
+                    geom_type == GeomReturnType.FULL_GEOM else geom_type
+                )
+            )
+        )
+        if geom_type == GeomReturnType.FULL_GEOM:
+            entities = entities.annotate(
+                geometry_json=AsGeoJSON(ForcePolygonCCW(F('geometry')))
+            )
+            values.append('geometry_json')
+        response = StreamingHttpResponse(
+            self.iter_entity_lines(
+                entities.values(*values),
+                {
+                    'max_level': max_level,
+                    'ids': ids,
+                    'names': names_max_idx
+                }
+            ),
+            content_type='application/x-ndjson'
+        )
+        response['ETag'] = etag
+        return response
+
+
 class ViewEntityBoundingBox(APIView, DatasetViewDetailCheckPermission):
     """
     Find bounding box of geographical entity
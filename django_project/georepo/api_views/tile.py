@@ -1,7 +1,6 @@
 import os
 import io
 import gzip
-from django.db import connection
 from django.core.cache import cache
 from django.conf import settings
 from django.http import StreamingHttpResponse, HttpResponse
@@ -11,6 +10,18 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from azure.core.exceptions import ResourceNotFoundError
 from georepo.utils.azure_blob_storage import StorageContainerClient
+from georepo.utils.mbtiles import (
+    is_mbtiles_storage,
+    get_mbtiles_path,
+    read_tile,
+    write_tile
+)
+from georepo.utils.tile_coverage import is_tile_covered
+from georepo.utils.tile_engine import (
+    generate_live_tile,
+    single_flight_tile,
+    resolve_tile_alias
+)
 
 
 class TileAPIView(APIView):
@@ -32,6 +43,12 @@ class TileAPIView(APIView):
                 f'layer_tiles/{resource_uuid}/{z}/{x}/{y}'
             )
             StorageContainerClient.upload_blob(layer_tiles_dest, bytes_result)
+        elif is_mbtiles_storage():
+            write_tile(
+                get_mbtiles_path(resource_uuid),
+                int(z), int(x), int(y),
+                bytes_result
+            )
         else:
             dir_path = os.path.join(
                 settings.LAYER_TILES_PATH,
@@ -52,40 +69,33 @@ class TileAPIView(APIView):
                 f.write(bytes_result)
         return bytes_result
 
-    def generate_tile(self, sql):
-        tile = bytes()
-        with connection.cursor() as cursor:
-            raw_sql = (
-                'SELECT ({sub_sqls}) AS data'
-            ).format(sub_sqls=sql)
-            cursor.execute(raw_sql)
-            row = cursor.fetchone()
-            tile = row[0]
-        return tile
-
     def do_run_query(self, z_param, x_param, y_param,
                      cache_value):
         z = int(z_param)
         x = int(x_param)
         y = int(y_param)
-        sqls = []
-        for level in cache_value:
-            sql = cache_value[level]
-            q = sql.format(
-                bbox_param=f'TileBBox({z}, {x}, {y}, 3857)',
-                intersects_param=f'TileBBox({z}, {x}, {y}, 4326)'
-            )
-            fsql = (
-                '(SELECT ST_AsMVT(q,\'{mvt_name}\',4096,\'geometry\',\'id\') '
-                'AS data '
-                'FROM ({query}) AS q)'
-            ).format(
-                mvt_name=f'Level-{level}',
-                query=q
-            )
-            sqls.append(fsql)
-        sub_sqls = '||'.join(sqls)
-        return self.generate_tile(sub_sqls)
+        return generate_live_tile(cache_value, z, x, y)
+
+    def render_live_tile(self, resource_uuid, z, x, y, cache_value):
+        """Generate live tile and store it to live cache."""
+        tile = self.do_run_query(z, x, y, cache_value)
+        if len(tile):
+            return self.store_mvt_cache(
+                resource_uuid, z, x, y, tile) or bytes()
+        return bytes()
+
+    def tile_response(self, tile_bytes, y):
+        response = HttpResponse(
+            tile_bytes,
+            status=200,
+            content_type='application/octet-stream'
+        )
+        response['Content-Encoding'] = 'gzip'
+        response['Content-Length'] = len(tile_bytes)
+        response['Content-Disposition'] = (
+            f'attachment; filename={y}.pbf'
+        )
+        return response
 
     def get_tile_from_live_cache(self, resource_uuid, z, x, y):
         if settings.USE_AZURE and StorageContainerClient:
@@ -109,6 +119,13 @@ class TileAPIView(APIView):
                 return response
             except ResourceNotFoundError:  # noqa
                 pass
+        elif is_mbtiles_storage():
+            tile_bytes = read_tile(
+                get_mbtiles_path(resource_uuid),
+                int(z), int(x), int(y)
+            )
+            if tile_bytes is not None:
+                return self.tile_response(tile_bytes, y)
         else:
             file_path = os.path.join(
                 settings.LAYER_TILES_PATH,
@@ -133,9 +150,14 @@ class TileAPIView(APIView):
 
     def get(self, *args, **kwargs):
         resource_uuid = kwargs.get('resource', None)
+        # resource without entities shares tiles of lower privacy level
+        resource_uuid = resolve_tile_alias(resource_uuid)
         z = kwargs.get('z')
         x = kwargs.get('x')
         y = kwargs.get('y')
+        if is_tile_covered(resource_uuid, int(z), int(x), int(y)) is False:
+            # no geometry in this tile based on coverage index
+            return HttpResponse(status=204)
         response = self.get_tile_from_live_cache(resource_uuid, z, x, y)
         if response:
             return response
@@ -143,21 +165,14 @@ class TileAPIView(APIView):
         cache_value = self.check_pending_resource_generation(
             resource_uuid, z)
         if cache_value:
-            # generate live VT
-            tile = self.do_run_query(z, x, y, cache_value)
-            if len(tile):
-                tile_bytes = self.store_mvt_cache(resource_uuid, z, x, y, tile)
-                response = HttpResponse(
-                    tile_bytes,
-                    status=200,
-                    content_type='application/octet-stream'
-                )
-                response['Content-Encoding'] = 'gzip'
-                response['Content-Length'] = len(tile_bytes)
-                response['Content-Disposition'] = (
-                    f'attachment; filename={y}.pbf'
-                )
-                return response
+            # generate live VT, only one worker renders the same tile
+            tile_bytes = single_flight_tile(
+                f'{resource_uuid}-{z}-{x}-{y}',
+                lambda: self.render_live_tile(
+                    resource_uuid, z, x, y, cache_value)
+            )
+            if len(tile_bytes):
+                return self.tile_response(tile_bytes, y)
         return Response(status=404, data={
             'detail': 'Not Found'
         })
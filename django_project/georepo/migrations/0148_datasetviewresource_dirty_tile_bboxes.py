@@ -0,0 +1,18 @@
+# Generated by Django 4.0.7 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('georepo', '0147_dataset_is_preferred'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetviewresource',
+            name='dirty_tile_bboxes',
+            field=models.JSONField(blank=True, default=None, help_text='Bounding boxes of changed entities since last vector tiles generation. Null means all tiles need to be regenerated.', null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('georepo', '0148_datasetviewresource_dirty_tile_bboxes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityAttribute',
+            fields=[
+                ('geographical_entity', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attribute', serialize=False, to='georepo.geographicalentity')),
+                ('attributes', models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.7 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('georepo', '0149_entityattribute'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='geographicalentity',
+            index=models.Index(fields=['dataset', 'level', 'unique_code_version', 'unique_code', 'id'], name='georepo_geo_dataset_ad59e6_idx'),
+        ),
+    ]
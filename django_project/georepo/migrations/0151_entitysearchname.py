@@ -0,0 +1,33 @@
+# Generated by Django 4.0.7 on 2026-10-18 12:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('georepo', '0150_geographicalentity_georepo_geo_dataset_ad59e6_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntitySearchName',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('privacy_level', models.IntegerField(default=4)),
+                ('dataset_view', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='georepo.datasetview')),
+                ('geographical_entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='georepo.geographicalentity')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='entitysearchname',
+            index=models.Index(fields=['dataset_view', 'privacy_level'], name='georepo_ent_dataset_55f1d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entitysearchname',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='search_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
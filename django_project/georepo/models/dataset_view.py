@@ -233,7 +233,8 @@ class DatasetView(models.Model):
         vector_tile=True,
         centroid=True,
         skip_signal=True,
-        save=True
+        save=True,
+        dirty_bboxes=None
     ):
         # any out of sync will need to check the simplification sync status
         has_custom_tiling_config = (
@@ -262,7 +263,8 @@ class DatasetView(models.Model):
             dsv_resource.set_out_of_sync(
                 vector_tiles=vector_tile,
                 centroid=centroid,
-                skip_signal=True
+                skip_signal=True,
+                dirty_bboxes=dirty_bboxes
             )
         if vector_tile:
             self.vector_tile_sync_status = self.SyncStatus.OUT_OF_SYNC
@@ -618,6 +620,16 @@ class DatasetViewResource(models.Model):
         default=8
     )
 
+    dirty_tile_bboxes = models.JSONField(
+        null=True,
+        blank=True,
+        default=None,
+        help_text=(
+            'Bounding boxes of changed entities since last vector tiles '
+            'generation. Null means all tiles need to be regenerated.'
+        )
+    )
+
     @property
     def resource_id(self):
         return str(self.uuid)
@@ -648,7 +660,11 @@ class DatasetViewResource(models.Model):
             )
             if dataset_caches:
                 for dataset_cache in dataset_caches:
-                    if b'pending-tile' in dataset_cache:
+                    if (
+                        b'pending-tile' in dataset_cache or
+                        b'tile-coverage' in dataset_cache or
+                        b'tile-alias' in dataset_cache
+                    ):
                         continue
                     cache.delete(
                         str(dataset_cache).split(':')[-1].replace(
@@ -666,8 +682,15 @@ class DatasetViewResource(models.Model):
         self,
         vector_tiles=True,
         centroid=True,
-        skip_signal=True
+        skip_signal=True,
+        dirty_bboxes=None
     ):
+        """
+        Set resource as out of sync.
+
+        :param dirty_bboxes: bboxes of changed entities, when vector tiles
+            can be regenerated only for those areas
+        """
         if vector_tiles:
             setattr(
                 self,
@@ -675,6 +698,17 @@ class DatasetViewResource(models.Model):
                 self.SyncStatus.OUT_OF_SYNC
             )
             setattr(self, 'vector_tile_progress', 0)
+            if (
+                dirty_bboxes is not None and
+                self.dirty_tile_bboxes is not None
+            ):
+                from georepo.utils.tile_coverage import merge_dirty_bboxes
+                self.dirty_tile_bboxes = merge_dirty_bboxes(
+                    self.dirty_tile_bboxes,
+                    dirty_bboxes
+                )
+            else:
+                self.dirty_tile_bboxes = None
         if centroid:
             setattr(
                 self,
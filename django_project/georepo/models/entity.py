@@ -2,7 +2,8 @@ from uuid import uuid4
 
 from django.conf import settings
 from django.contrib.gis.db import models
-from django.db.models import Q
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models.expressions import RawSQL
 from django.db import IntegrityError, transaction
 
 # revision uuid
@@ -20,6 +21,18 @@ MAIN_ENTITY_ID_LIST = [
     CONCEPT_UUID_ENTITY_ID, UCODE_ENTITY_ID,
     CONCEPT_UCODE_ENTITY_ID
 ]
+# id of entity and its descendants, walks the index of parent_id
+ENTITY_DESCENDANTS_SQL = (
+    """
+    WITH RECURSIVE descendants(id) AS (
+        SELECT %s
+        UNION
+        SELECT ge.id FROM georepo_geographicalentity ge
+        INNER JOIN descendants d ON ge.parent_id=d.id
+    )
+    SELECT id FROM descendants
+    """
+)
 
 
 class GeographicalEntity(models.Model):
@@ -267,7 +280,10 @@ class GeographicalEntity(models.Model):
                     models.Index(fields=['concept_ucode']),
                     models.Index(fields=['unique_code']),
                     models.Index(fields=['dataset', 'is_approved',
-                                         'level', 'privacy_level'])
+                                         'level', 'privacy_level']),
+                    models.Index(fields=['dataset', 'level',
+                                         'unique_code_version',
+                                         'unique_code', 'id'])
                 ]
 
     def __str__(self):
@@ -279,18 +295,9 @@ class GeographicalEntity(models.Model):
         )
 
     def all_children(self):
-        max_level: int = 0
-        max_level_entity = GeographicalEntity.objects.all().order_by(
-            'level').last()
-        if max_level_entity:
-            max_level = max_level_entity.level
-        parent_id_key = 'id'
-        ancestor_filters = Q(**{parent_id_key: self.id})
-        for i in range(max_level):
-            parent_id_key = 'parent__' + parent_id_key
-            ancestor_filters |= Q(**{parent_id_key: self.id})
+        """Return queryset of this entity and all of its descendants."""
         return GeographicalEntity.objects.filter(
-            ancestor_filters,
+            id__in=RawSQL(ENTITY_DESCENDANTS_SQL, [self.id])
         )
 
     def delete_by_ancestor(self):
@@ -485,6 +492,61 @@ class EntitySimplified(models.Model):
                 ]
 
 
+class EntityAttribute(models.Model):
+    """
+    Denormalized ids, names and parents of entity.
+
+    The attributes are stored in the keys that are used by the entity
+    query builders, e.g. id_1__value, name_0__name, parent__level,
+    so the query does not need to join each id type, name index and
+    parent level.
+    """
+    geographical_entity = models.OneToOneField(
+        'georepo.GeographicalEntity',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='attribute'
+    )
+
+    attributes = models.JSONField(
+        default=dict,
+        blank=True
+    )
+
+
+class EntitySearchName(models.Model):
+    """
+    Names of entities in dataset view for fuzzy search.
+
+    The rows are populated when the view is synced, so the search
+    does not need to filter entity names by the sql view.
+    """
+    dataset_view = models.ForeignKey(
+        'georepo.DatasetView',
+        on_delete=models.CASCADE
+    )
+
+    geographical_entity = models.ForeignKey(
+        'georepo.GeographicalEntity',
+        on_delete=models.CASCADE
+    )
+
+    name = models.CharField(
+        max_length=255
+    )
+
+    privacy_level = models.IntegerField(
+        default=4
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset_view', 'privacy_level']),
+            GinIndex(fields=['name'], name='search_name_trgm_idx',
+                     opclasses=['gin_trgm_ops'])
+        ]
+
+
 class EntityEditHistory(models.Model):
     geographical_entity = models.ForeignKey(
         'georepo.GeographicalEntity',
@@ -7,6 +7,7 @@ from georepo.models.entity import (
     EntityId,
     EntityName,
     EntitySimplified,
+    EntityAttribute,
     EntityEditHistory
 )
 from dashboard.models.boundary_comparison import (
@@ -24,6 +25,7 @@ from dashboard.models.layer_upload_session import (
 from dashboard.models.layer_file import (
     LayerFile
 )
+from georepo.utils.entity_attribute import invalidate_entity_attributes
 
 
 def remove_dataset_resources(dataset: Dataset):
@@ -57,6 +59,11 @@ def remove_dataset_resources(dataset: Dataset):
         geographical_entity__dataset=dataset
     )
     names._raw_delete(names.db)
+    invalidate_entity_attributes(dataset.id)
+    attributes = EntityAttribute.objects.filter(
+        geographical_entity__dataset=dataset
+    )
+    attributes._raw_delete(attributes.db)
     reviews = BoundaryComparison.objects.filter(
         Q(main_boundary__dataset=dataset) |
         Q(comparison_boundary__dataset=dataset)
@@ -36,6 +36,10 @@ from georepo.utils.dataset_view import (
     rename_dataset_view_from_old_pattern,
     get_max_zoom_level
 )
+from georepo.utils.tile_coverage import get_entity_bboxes
+from georepo.utils.entity_attribute import refresh_entity_attributes
+from georepo.utils.entity_query import invalidate_entity_schema
+from georepo.utils.entity_search import invalidate_entity_search_names
 
 
 logger = logging.getLogger(__name__)
@@ -51,6 +55,7 @@ def check_affected_dataset_views(
     """
     Trigger checking affected views for entity update or revision approve.
     """
+    invalidate_entity_schema(dataset_id)
     # Query Views that are synced and dynamic
     views_to_check = DatasetView.objects.filter(
         dataset_id=dataset_id,
@@ -63,6 +68,7 @@ def check_affected_dataset_views(
         Q(centroid_sync_status=DatasetView.SyncStatus.SYNCED) |
         Q(centroid_sync_status=DatasetView.SyncStatus.SYNCING)
     )
+    affected_ids = []
     if unique_codes:
         unique_codes = tuple(
             GeographicalEntity.objects.filter(
@@ -70,14 +76,20 @@ def check_affected_dataset_views(
                 unique_code__in=unique_codes
             ).values_list('id', flat=True)
         )
+        affected_ids = list(unique_codes)
         unique_codes = str(unique_codes)
         if unique_codes[-2] == ',':
             unique_codes = unique_codes[:-2] + unique_codes[-1]
     if entity_id:
         entity_id = tuple(entity_id)
+        affected_ids = list(entity_id)
         entity_id = str(entity_id)
         if entity_id[-2] == ',':
             entity_id = entity_id[:-2] + entity_id[-1]
+    # ids, names and parent codes of the entities may be changed
+    refresh_entity_attributes(dataset_id, affected_ids)
+    # areas of changed entities for incremental vector tiles
+    dirty_bboxes = None
 
     for view in views_to_check.iterator(chunk_size=1):
         if entity_id:
@@ -104,6 +116,8 @@ def check_affected_dataset_views(
             )
             total_count = cursor.fetchone()[0]
             if total_count > 0:
+                # search names are refreshed when the view is synced
+                invalidate_entity_search_names(view.id)
                 # cancel ongoing task
                 if view.simplification_task_id:
                     cancel_task(view.simplification_task_id)
@@ -115,11 +129,20 @@ def check_affected_dataset_views(
                 for view_resource in view_resources:
                     if view_resource.vector_tiles_task_id:
                         cancel_task(view_resource.vector_tiles_task_id)
+                # simplification of the level is regenerated when the
+                # geometry changes, which may move geometries outside
+                # the changed entities, so all tiles need to be rendered
+                if dirty_bboxes is None and not is_geom_changed:
+                    dirty_bboxes = get_entity_bboxes(
+                        dataset_id,
+                        affected_ids
+                    )
                 view.set_out_of_sync(
                     tiling_config=False,
                     vector_tile=True,
                     centroid=True,
-                    skip_signal=False
+                    skip_signal=False,
+                    dirty_bboxes=dirty_bboxes
                 )
                 if (
                     is_geom_changed and
@@ -5,6 +5,7 @@ import random
 from dateutil.parser import isoparse
 from django.test import TestCase
 from django.urls import reverse
+from django.db.models.expressions import RawSQL
 from django.contrib.gis.geos import GEOSGeometry
 from guardian.shortcuts import assign_perm
 
@@ -12,7 +13,7 @@ from rest_framework.test import APIRequestFactory
 from rest_framework import versioning
 
 from georepo.utils import absolute_path
-from georepo.models import IdType, DatasetView
+from georepo.models import IdType, DatasetView, GeographicalEntity
 from georepo.tests.model_factories import (
     GeographicalEntityF, EntityTypeF, DatasetF, EntityIdF,
     EntityNameF, LanguageF, UserF, GroupF
@@ -26,6 +27,7 @@ from georepo.api_views.entity_view import (
     ViewFindEntityVersionsByConceptUCode,
     ViewFindEntityVersionsByUCode,
     ViewEntityBoundingBox,
+    ViewEntityDump,
     ViewEntityContainmentCheck,
     ViewFindEntityFuzzySearch,
     ViewFindEntityGeometryFuzzySearch,
@@ -1495,6 +1497,94 @@ class EntityViewTestSuite(EntityResponseChecker):
             [response1, response2, response3]
         )
 
+    def run_test_view_entity_dump(self):
+        kwargs = {
+            'uuid': str(self.dataset_view.uuid)
+        }
+        view = ViewEntityDump.as_view()
+        request = self.factory.get(
+            reverse('v1:view-entity-dump', kwargs=kwargs) +
+            '?geom=full_geom'
+        )
+        request.user = self.superuser
+        response = view(request, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        entities = [json.loads(line) for line in lines]
+        raw_sql = 'SELECT id from "{}"'.format(str(self.dataset_view.uuid))
+        self.assertEqual(
+            len(entities),
+            GeographicalEntity.objects.filter(
+                id__in=RawSQL(raw_sql, [])
+            ).count()
+        )
+        self.assertIn('geometry', entities[0])
+        self.assertIn('ucode', entities[0])
+        # geometry key is written once in each line
+        for line in lines:
+            pairs = json.loads(line, object_pairs_hook=list)
+            self.assertEqual(
+                len([key for key, _ in pairs if key == 'geometry']), 1)
+            self.assertIsNotNone(dict(pairs)['geometry'])
+        # not modified when the view is not updated
+        request = self.factory.get(
+            reverse('v1:view-entity-dump', kwargs=kwargs) +
+            '?geom=full_geom',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        request.user = self.superuser
+        response = view(request, **kwargs)
+        self.assertEqual(response.status_code, 304)
+
+    def run_test_cursor_pagination(self):
+        kwargs = {
+            'uuid': str(self.dataset_view.uuid),
+            'admin_level': 1
+        }
+        scheme = versioning.NamespaceVersioning
+        view = ViewEntityListByAdminLevel.as_view(versioning_class=scheme)
+        request = self.factory.get(
+            reverse(
+                'v1:search-view-entity-by-level',
+                kwargs=kwargs
+            ) + '?page=1&page_size=50'
+        )
+        request.user = self.superuser
+        response = view(request, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        expected = [
+            result['ucode'] for result in response.data['results']
+        ]
+        cursor = ''
+        ucodes = []
+        while cursor is not None:
+            request = self.factory.get(
+                reverse(
+                    'v1:search-view-entity-by-level',
+                    kwargs=kwargs
+                ) + f'?cursor={cursor}&page_size=2'
+            )
+            request.user = self.superuser
+            response = view(request, **kwargs)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('total_page', response.data)
+            self.assertLessEqual(len(response.data['results']), 2)
+            ucodes.extend(
+                [result['ucode'] for result in response.data['results']]
+            )
+            cursor = response.data['next']
+        self.assertEqual(ucodes, expected)
+        request = self.factory.get(
+            reverse(
+                'v1:search-view-entity-by-level',
+                kwargs=kwargs
+            ) + '?cursor=invalid'
+        )
+        request.user = self.superuser
+        response = view(request, **kwargs)
+        self.assertEqual(response.status_code, 400)
+
 
 class TestApiEntityLatestView(EntityViewTestSuite, TestCase):
 
@@ -2018,6 +2108,12 @@ class TestApiEntityAllVersionsView(EntityViewTestSuite, TestCase):
     def test_pagination_level1(self):
         self.run_test_pagination()
 
+    def test_cursor_pagination_level1(self):
+        self.run_test_cursor_pagination()
+
+    def test_view_entity_dump(self):
+        self.run_test_view_entity_dump()
+
 
 class TestApiEntityAdm0LatestView(EntityViewTestSuite, TestCase):
 
@@ -229,3 +229,40 @@ class TestCheckAffectedViews(TestCase):
                 static_view.vector_tile_sync_status,
                 DatasetView.SyncStatus.OUT_OF_SYNC
             )
+
+    def test_dirty_tile_bboxes(self):
+        """
+        Test that dirty bboxes are kept when only the attributes
+        of the entities are changed.
+        """
+        DatasetViewResource.objects.filter(
+            dataset_view__dataset=self.dataset_1
+        ).update(dirty_tile_bboxes=[])
+        check_affected_dataset_views(
+            dataset_id=self.dataset_1.id,
+            entity_id=[self.geographical_entity.id],
+            is_geom_changed=False
+        )
+        resource = DatasetViewResource.objects.filter(
+            dataset_view=self.dataset_view_1,
+            entity_count__gt=0
+        ).first()
+        self.assertTrue(resource.dirty_tile_bboxes)
+
+    def test_dirty_tile_bboxes_geom_changed(self):
+        """
+        Test that all tiles are regenerated when the geometry is changed,
+        since the simplification of the whole level is regenerated.
+        """
+        DatasetViewResource.objects.filter(
+            dataset_view__dataset=self.dataset_1
+        ).update(dirty_tile_bboxes=[])
+        check_affected_dataset_views(
+            dataset_id=self.dataset_1.id,
+            entity_id=[self.geographical_entity.id]
+        )
+        resource = DatasetViewResource.objects.filter(
+            dataset_view=self.dataset_view_1,
+            entity_count__gt=0
+        ).first()
+        self.assertIsNone(resource.dirty_tile_bboxes)
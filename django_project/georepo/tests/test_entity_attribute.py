@@ -0,0 +1,149 @@
+from django.test import TestCase, override_settings
+
+from georepo.models.entity import EntityAttribute, GeographicalEntity
+from georepo.tasks.dataset_delete import remove_dataset_resources
+from georepo.tests.model_factories import (
+    DatasetF,
+    EntityTypeF,
+    GeographicalEntityF,
+    EntityIdF,
+    EntityNameF,
+    IdTypeF,
+    LanguageF
+)
+from georepo.utils.entity_attribute import (
+    invalidate_entity_attributes,
+    is_entity_attribute_ready,
+    refresh_entity_attributes
+)
+from georepo.utils.entity_query import (
+    do_generate_entity_query,
+    get_entity_schema,
+    invalidate_entity_schema
+)
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+})
+class TestEntityAttribute(TestCase):
+
+    def setUp(self):
+        self.dataset = DatasetF.create()
+        self.entity_type = EntityTypeF.create(label='Country')
+        self.id_type = IdTypeF.create(name='PCode')
+        self.language = LanguageF.create(code='EN')
+        self.adm0 = GeographicalEntityF.create(
+            dataset=self.dataset,
+            type=self.entity_type,
+            level=0,
+            internal_code='PAK',
+            unique_code='PAK',
+            unique_code_version=1,
+            is_approved=True,
+            is_latest=True
+        )
+        self.adm1 = GeographicalEntityF.create(
+            dataset=self.dataset,
+            type=self.entity_type,
+            parent=self.adm0,
+            ancestor=self.adm0,
+            level=1,
+            internal_code='PAK001',
+            unique_code='PAK_0001',
+            unique_code_version=1,
+            is_approved=True,
+            is_latest=True
+        )
+        EntityIdF.create(
+            geographical_entity=self.adm1,
+            code=self.id_type,
+            value='PK01'
+        )
+        EntityNameF.create(
+            geographical_entity=self.adm1,
+            language=self.language,
+            name='Punjab',
+            label='',
+            idx=0
+        )
+
+    def test_refresh_entity_attributes(self):
+        # partial refresh is skipped before the dataset is populated
+        self.assertEqual(
+            refresh_entity_attributes(self.dataset.id, [self.adm1.id]), 0)
+        self.assertFalse(is_entity_attribute_ready(self.dataset.id))
+        self.assertEqual(refresh_entity_attributes(self.dataset.id), 2)
+        self.assertTrue(is_entity_attribute_ready(self.dataset.id))
+        attributes = EntityAttribute.objects.get(
+            geographical_entity=self.adm1).attributes
+        self.assertEqual(
+            attributes[f'id_{self.id_type.id}__value'], 'PK01')
+        self.assertEqual(attributes['name_0__name'], 'Punjab')
+        self.assertEqual(attributes['name_0__language__code'], 'EN')
+        self.assertEqual(attributes['parent__internal_code'], 'PAK')
+        self.assertEqual(attributes['parent__level'], 0)
+        # update of parent is refreshed in its children
+        self.adm0.internal_code = 'PAK2'
+        self.adm0.save()
+        self.assertEqual(
+            refresh_entity_attributes(self.dataset.id, [self.adm0.id]), 2)
+        attributes = EntityAttribute.objects.get(
+            geographical_entity=self.adm1).attributes
+        self.assertEqual(attributes['parent__internal_code'], 'PAK2')
+
+    def test_entity_query_with_attributes(self):
+        entities = GeographicalEntity.objects.filter(
+            dataset=self.dataset,
+            level=1
+        )
+        entities, values, _, _, _ = do_generate_entity_query(
+            entities, self.dataset.id)
+        expected = list(entities.values(*values))
+        refresh_entity_attributes(self.dataset.id)
+        entities = GeographicalEntity.objects.filter(
+            dataset=self.dataset,
+            level=1
+        )
+        entities, values, _, _, _ = do_generate_entity_query(
+            entities, self.dataset.id)
+        self.assertEqual(list(entities.values(*values)), expected)
+
+    def test_entity_schema(self):
+        schema = get_entity_schema(self.dataset.id)
+        self.assertEqual(len(schema['ids']), 1)
+        self.assertEqual(schema['ids'][0]['code__name'], 'PCode')
+        self.assertEqual(schema['names_max_idx']['idx__max'], 0)
+        self.assertEqual(schema['max_level'], 1)
+        self.assertEqual(
+            get_entity_schema(self.dataset.id, 0)['names_max_idx'],
+            {'idx__max': None}
+        )
+        EntityNameF.create(
+            geographical_entity=self.adm1,
+            language=self.language,
+            name='Punjab 2',
+            label='',
+            idx=1
+        )
+        # cached descriptor until the dataset is updated
+        self.assertEqual(
+            get_entity_schema(self.dataset.id)['names_max_idx']['idx__max'],
+            0
+        )
+        invalidate_entity_schema(self.dataset.id)
+        self.assertEqual(
+            get_entity_schema(self.dataset.id)['names_max_idx']['idx__max'],
+            1
+        )
+
+    def test_remove_dataset_attributes(self):
+        refresh_entity_attributes(self.dataset.id)
+        invalidate_entity_attributes(self.dataset.id)
+        self.assertFalse(is_entity_attribute_ready(self.dataset.id))
+        refresh_entity_attributes(self.dataset.id)
+        remove_dataset_resources(self.dataset)
+        self.assertFalse(is_entity_attribute_ready(self.dataset.id))
+        self.assertEqual(EntityAttribute.objects.count(), 0)
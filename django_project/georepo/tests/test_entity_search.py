@@ -0,0 +1,92 @@
+from django.test import TestCase, override_settings
+
+from georepo.api_views.entity_view import ViewFindEntityFuzzySearch
+from georepo.models.entity import EntitySearchName
+from georepo.tests.model_factories import (
+    DatasetF,
+    EntityTypeF,
+    GeographicalEntityF,
+    EntityNameF
+)
+from georepo.utils.dataset_view import generate_default_view_dataset_latest
+from georepo.utils.entity_search import (
+    get_entity_search_version,
+    invalidate_entity_search_names,
+    refresh_entity_search_names
+)
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+})
+class TestEntitySearch(TestCase):
+
+    def setUp(self):
+        self.dataset = DatasetF.create()
+        self.entity_type = EntityTypeF.create(label='Country')
+        self.adm0 = GeographicalEntityF.create(
+            dataset=self.dataset,
+            type=self.entity_type,
+            level=0,
+            internal_code='PAK',
+            unique_code='PAK',
+            unique_code_version=1,
+            privacy_level=4,
+            is_approved=True,
+            is_latest=True
+        )
+        EntityNameF.create(
+            geographical_entity=self.adm0,
+            name='Pakistan',
+            idx=0
+        )
+        self.adm1 = GeographicalEntityF.create(
+            dataset=self.dataset,
+            type=self.entity_type,
+            parent=self.adm0,
+            ancestor=self.adm0,
+            level=1,
+            internal_code='PAK001',
+            unique_code='PAK_0001',
+            unique_code_version=1,
+            privacy_level=4,
+            is_approved=True,
+            is_latest=True
+        )
+        EntityNameF.create(
+            geographical_entity=self.adm1,
+            name='Punjab',
+            idx=0
+        )
+        self.view = generate_default_view_dataset_latest(self.dataset)[0]
+
+    def test_fuzzy_search_with_search_names(self):
+        search = ViewFindEntityFuzzySearch()
+        rows, count, fuzzy_query = search.do_run_sql_query(
+            self.view, 'pakistan', 4, 1, 10)
+        self.assertIn('georepo_entityname', fuzzy_query['sql'])
+        self.assertEqual(count, 1)
+        self.assertEqual(rows[0]['id'], self.adm0.id)
+        self.assertNotIn('total_count', rows[0])
+        self.assertEqual(refresh_entity_search_names(self.view), 2)
+        search_rows, search_count, fuzzy_query = search.do_run_sql_query(
+            self.view, 'pakistan', 4, 1, 10)
+        self.assertIn('georepo_entitysearchname', fuzzy_query['sql'])
+        self.assertEqual(search_rows, rows)
+        self.assertEqual(search_count, count)
+        # next request of the same page is read from cache
+        EntitySearchName.objects.all().delete()
+        search_rows, search_count, _ = search.do_run_sql_query(
+            self.view, 'pakistan', 4, 1, 10)
+        self.assertEqual(search_rows, rows)
+        # page out of range
+        _, search_count, _ = search.do_run_sql_query(
+            self.view, 'pakistan', 4, 2, 10)
+        self.assertEqual(search_count, 0)
+        invalidate_entity_search_names(self.view.id)
+        self.assertIsNone(get_entity_search_version(self.view.id))
+        _, count, _ = search.do_run_sql_query(
+            self.view, 'pakistan', 4, 2, 10)
+        self.assertEqual(count, 1)
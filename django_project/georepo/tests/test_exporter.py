@@ -1,5 +1,10 @@
+import os
+import json
+import shutil
 import datetime
 import mock
+import tempfile
+from django.test import override_settings
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework import versioning
@@ -15,9 +20,17 @@ from georepo.models.export_request import (
     GEOPACKAGE_EXPORT_TYPE
 )
 from georepo.models.entity import EntityName, EntitySimplified
-from georepo.utils.exporter_base import DatasetViewExporterBase
+from georepo.utils.exporter_base import (
+    DatasetViewExporterBase,
+    to_feature_json,
+    write_feature_collection
+)
 from georepo.utils.geojson import GeojsonViewExporter
 from georepo.utils.shapefile import ShapefileViewExporter
+from georepo.utils.tile_configs import (
+    TilingConfigItem,
+    TilingConfigZoomLevels
+)
 from georepo.utils.kml import KmlViewExporter
 from georepo.utils.topojson import TopojsonViewExporter
 from georepo.utils.gpkg_file import GPKGViewExporter
@@ -253,6 +266,53 @@ class TestExporter(BaseDatasetViewTest):
         self.assertTrue(request.output_file)
         self.assertTrue(request.download_link)
 
+    def test_shapefile_exporter_with_geojson_cache(self):
+        tmp_dir = tempfile.mkdtemp()
+        with override_settings(EXPORT_FOLDER_OUTPUT=tmp_dir,
+                               EXPORT_GEOJSON_CACHE_SIZE_MB=100):
+            for idx in range(2):
+                request = ExportRequest.objects.create(
+                    dataset_view=self.dataset_view,
+                    format=SHAPEFILE_EXPORT_TYPE,
+                    submitted_on=timezone.now(),
+                    submitted_by=self.superuser
+                )
+                exporter = ShapefileViewExporter(request)
+                exporter.init_exporter()
+                with mock.patch.object(
+                        exporter.geojson_exporter, 'run',
+                        wraps=exporter.geojson_exporter.run) as mocked_run:
+                    exporter.run()
+                    # second request reuses geojson of the first one
+                    self.assertEqual(mocked_run.called, idx == 0)
+                request.refresh_from_db()
+                self.assertTrue(request.download_link)
+            self.assertEqual(
+                len(os.listdir(os.path.join(tmp_dir, 'geojson_cache'))), 1)
+        shutil.rmtree(tmp_dir)
+
+    def test_geojson_cache_key_tolerance(self):
+        request = ExportRequest.objects.create(
+            dataset_view=self.dataset_view,
+            format=SHAPEFILE_EXPORT_TYPE,
+            submitted_on=timezone.now(),
+            submitted_by=self.superuser,
+            is_simplified_entities=True,
+            simplification_zoom_level=0
+        )
+        exporter = ShapefileViewExporter(request)
+        exporter.levels = [0]
+        exporter.tiling_configs = [
+            TilingConfigZoomLevels(0, [TilingConfigItem(0, 1)])
+        ]
+        cache_key = exporter.get_geojson_cache_key()
+        self.assertEqual(exporter.get_geojson_cache_key(), cache_key)
+        # tiling config is updated with new tolerance at the same zoom
+        exporter.tiling_configs = [
+            TilingConfigZoomLevels(0, [TilingConfigItem(0, 0.5)])
+        ]
+        self.assertNotEqual(exporter.get_geojson_cache_key(), cache_key)
+
     def test_kml_exporter(self):
         request = ExportRequest.objects.create(
             dataset_view=self.dataset_view,
@@ -298,6 +358,63 @@ class TestExporter(BaseDatasetViewTest):
         self.assertTrue(request.output_file)
         self.assertTrue(request.download_link)
 
+    @mock.patch('georepo.utils.exporter_base.connection')
+    @mock.patch('georepo.utils.exporter_base.get_export_concurrency')
+    def test_export_levels_concurrently(self, mocked_concurrency,
+                                        mocked_connection):
+        mocked_concurrency.return_value = 3
+        request = ExportRequest.objects.create(
+            dataset_view=self.dataset_view,
+            format=GEOJSON_EXPORT_TYPE,
+            submitted_on=timezone.now(),
+            submitted_by=self.superuser
+        )
+        exporter = GeojsonViewExporter(request)
+        exporter.levels = [0, 1, 2]
+        exporter.total_progress = 3
+
+        def mocked_do_export(level, tmp_output_dir):
+            exporter.generated_files.append(
+                os.path.join(tmp_output_dir, f'adm{2 - level}.geojson'))
+
+        # progress is saved from worker threads
+        with mock.patch.object(exporter, 'do_export',
+                               side_effect=mocked_do_export), \
+                mock.patch.object(request, 'save'):
+            exporter.export_levels('/tmp')
+        self.assertEqual(exporter.progress_count, 3)
+        self.assertEqual(exporter.generated_files, [
+            '/tmp/adm0.geojson',
+            '/tmp/adm1.geojson',
+            '/tmp/adm2.geojson'
+        ])
+        self.assertEqual(mocked_connection.close.call_count, 3)
+
+    @mock.patch('georepo.utils.exporter_base.EXPORT_WRITE_BATCH_SIZE', 2)
+    def test_write_feature_collection(self):
+        geom = '{"type": "Point", "coordinates": [1, 2]}'
+        for compact in [True, False]:
+            output_file = tempfile.NamedTemporaryFile(
+                delete=False, suffix='.geojson')
+            output_file.close()
+            features = (
+                to_feature_json({
+                    'type': 'Feature',
+                    'properties': {'idx': idx},
+                    'geometry': None
+                }, geom, compact=compact) for idx in range(5)
+            )
+            total_count = write_feature_collection(
+                output_file.name, features, compact=compact)
+            with open(output_file.name, 'r') as f:
+                data = json.load(f)
+            os.remove(output_file.name)
+            self.assertEqual(total_count, 5)
+            self.assertEqual(len(data['features']), 5)
+            self.assertEqual(data['features'][4]['properties']['idx'], 4)
+            self.assertEqual(
+                data['features'][0]['geometry']['coordinates'], [1, 2])
+
     def test_geojson_exporter_with_simplified_entities(self):
         # insert geometry to entity simplified
         EntitySimplified.objects.create(
@@ -0,0 +1,47 @@
+from django.test import TestCase
+from georepo.tests.model_factories import DatasetF, GeographicalEntityF
+
+
+class TestEntityChildren(TestCase):
+
+    def test_all_children(self):
+        dataset = DatasetF.create()
+        adm0 = GeographicalEntityF.create(
+            dataset=dataset,
+            level=0,
+            internal_code='PAK'
+        )
+        adm1 = GeographicalEntityF.create(
+            dataset=dataset,
+            parent=adm0,
+            level=1,
+            internal_code='PAK001'
+        )
+        adm2 = GeographicalEntityF.create(
+            dataset=dataset,
+            parent=adm1,
+            level=2,
+            internal_code='PAK001001'
+        )
+        other = GeographicalEntityF.create(
+            dataset=dataset,
+            level=0,
+            internal_code='AFG'
+        )
+        self.assertEqual(
+            set(adm0.all_children().values_list('id', flat=True)),
+            {adm0.id, adm1.id, adm2.id}
+        )
+        self.assertEqual(
+            set(adm1.all_children().values_list('id', flat=True)),
+            {adm1.id, adm2.id}
+        )
+        self.assertEqual(
+            list(other.all_children().values_list('id', flat=True)),
+            [other.id]
+        )
+        self.assertEqual(
+            list(adm0.all_children().filter(level=2).values_list(
+                'id', flat=True)),
+            [adm2.id]
+        )
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+
+from georepo.utils.mbtiles import (
+    is_mbtiles_storage,
+    get_mbtiles_path,
+    write_tile,
+    read_tile,
+    import_zoom_directory,
+    get_zoom_info,
+    publish_zoom,
+    remove_mbtiles,
+    get_mbtiles_size,
+    _get_writer
+)
+
+
+class TestMBTiles(TestCase):
+
+    def setUp(self) -> None:
+        self.tiles_path = tempfile.mkdtemp()
+        self.resource_id = 'abcdef'
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.tiles_path)
+
+    def create_zoom_directory(self, zoom, tiles):
+        zoom_dir = os.path.join(
+            self.tiles_path, f'temp_{self.resource_id}', str(zoom))
+        for x, y, data in tiles:
+            x_dir = os.path.join(zoom_dir, str(x))
+            os.makedirs(x_dir, exist_ok=True)
+            with open(os.path.join(x_dir, str(y)), 'wb') as f:
+                f.write(data)
+        return zoom_dir
+
+    def test_is_mbtiles_storage(self):
+        with override_settings(VECTOR_TILE_STORAGE='mbtiles',
+                               USE_AZURE=False):
+            self.assertTrue(is_mbtiles_storage())
+        with override_settings(VECTOR_TILE_STORAGE='mbtiles',
+                               USE_AZURE=True):
+            self.assertFalse(is_mbtiles_storage())
+        with override_settings(VECTOR_TILE_STORAGE='directory'):
+            self.assertFalse(is_mbtiles_storage())
+
+    def test_read_write_tile(self):
+        with override_settings(LAYER_TILES_PATH=self.tiles_path):
+            path = get_mbtiles_path(self.resource_id)
+            self.assertIsNone(read_tile(path, 1, 0, 0))
+            write_tile(path, 1, 0, 1, b'tile')
+            self.assertEqual(read_tile(path, 1, 0, 1), b'tile')
+            self.assertIsNone(read_tile(path, 1, 0, 0))
+            # writer connection is reused in the thread
+            self.assertIs(_get_writer(path), _get_writer(path))
+            self.assertEqual(get_mbtiles_size(self.resource_id),
+                             os.path.getsize(path))
+            remove_mbtiles(self.resource_id)
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(get_mbtiles_size(self.resource_id), 0)
+
+    def test_publish_zoom(self):
+        with override_settings(LAYER_TILES_PATH=self.tiles_path):
+            temp_path = get_mbtiles_path(self.resource_id, is_temp=True)
+            live_path = get_mbtiles_path(self.resource_id)
+            # existing tile from previous generation
+            write_tile(live_path, 2, 1, 1, b'old')
+            zoom_dir = self.create_zoom_directory(0, [(0, 0, b'z0')])
+            size, count = import_zoom_directory(temp_path, zoom_dir, 0)
+            self.assertEqual(size, 2)
+            self.assertEqual(count, 1)
+            self.assertEqual(get_zoom_info(temp_path, 0), (2, 1))
+            publish_zoom(self.resource_id, 0)
+            self.assertEqual(read_tile(live_path, 0, 0, 0), b'z0')
+            # zoom 0 replaces the whole archive
+            self.assertIsNone(read_tile(live_path, 2, 1, 1))
+            zoom_dir = self.create_zoom_directory(
+                1, [(0, 0, b'a'), (0, 1, b'b'), (1, 0, b'c')])
+            import_zoom_directory(temp_path, zoom_dir, 1)
+            publish_zoom(self.resource_id, 1)
+            self.assertEqual(read_tile(live_path, 1, 0, 1), b'b')
+            self.assertEqual(read_tile(live_path, 1, 1, 0), b'c')
+            self.assertEqual(read_tile(live_path, 0, 0, 0), b'z0')
@@ -1,6 +1,8 @@
+import os
 import json
 import mock
-from django.test import TestCase
+import tempfile
+from django.test import TestCase, override_settings
 from core.models.preferences import SitePreferences
 from georepo.utils import absolute_path
 from django.contrib.gis.geos import GEOSGeometry
@@ -17,7 +19,10 @@ from georepo.utils.tile_configs import (
 )
 from georepo.utils.mapshaper import (
     simplify_for_dataset,
-    simplify_for_dataset_view
+    simplify_for_dataset_view,
+    read_output_simplification,
+    iter_simplification_rows,
+    mapshaper_multi_commands
 )
 from georepo.utils.dataset_view import (
     generate_default_view_dataset_latest,
@@ -225,6 +230,33 @@ class TestSimplification(TestCase):
         config = simplified_entities[0]
         self.assertEqual(config.simplify_tolerance, 1)
 
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    })
+    @mock.patch('core.models.preferences.SitePreferences.preferences')
+    def test_process_simplification_cached(self, perferences):
+        perferences.side_effect = mocked_site_perferences
+        populate_tile_configs(self.dataset.id)
+        simplify_for_dataset(self.dataset)
+        # unchanged geometries are not simplified again
+        with mock.patch(
+                'georepo.utils.mapshaper.copy_entities') as mocked_copy:
+            simplify_for_dataset(self.dataset)
+            mocked_copy.assert_not_called()
+        self.assertEqual(EntitySimplified.objects.filter(
+            geographical_entity=self.entity_1
+        ).count(), 1)
+        # changed geometry invalidates the cached level
+        self.entity_1.geometry = GEOSGeometry(
+            'MULTIPOLYGON(((0 0, 1 0, 1 1, 0 0)))', srid=4326)
+        self.entity_1.save()
+        with mock.patch(
+                'georepo.utils.mapshaper.copy_entities') as mocked_copy:
+            simplify_for_dataset(self.dataset)
+            mocked_copy.assert_called_once()
+
     @mock.patch('core.models.preferences.SitePreferences.preferences')
     def test_process_simplification_for_view(self, perferences):
         perferences.side_effect = mocked_site_perferences
@@ -237,3 +269,74 @@ class TestSimplification(TestCase):
         self.assertEqual(simplified_entities.count(), 1)
         config = simplified_entities[0]
         self.assertEqual(config.simplify_tolerance, 1)
+
+    def test_read_output_simplification(self):
+        output_file = tempfile.NamedTemporaryFile(
+            delete=False, suffix='.geojson', mode='w')
+        features = []
+        for entity_id in [self.entity_1.id, self.entity_1.id + 1000]:
+            features.append({
+                'type': 'Feature',
+                'id': entity_id,
+                'properties': {},
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]
+                }
+            })
+        json.dump({
+            'type': 'FeatureCollection',
+            'features': features
+        }, output_file)
+        output_file.close()
+        inserted_count = read_output_simplification(
+            output_file.name, 0.5, self.dataset_view)
+        os.remove(output_file.name)
+        # feature with unknown entity id is skipped
+        self.assertEqual(inserted_count, 1)
+        simplified = EntitySimplified.objects.get(
+            geographical_entity=self.entity_1,
+            simplify_tolerance=0.5,
+            dataset_view=self.dataset_view
+        )
+        self.assertEqual(
+            simplified.simplified_geometry.geom_type, 'MultiPolygon')
+        self.assertEqual(simplified.simplified_geometry.srid, 4326)
+
+    @mock.patch('georepo.utils.mapshaper.fiona.open')
+    def test_iter_simplification_rows(self, mocked_open):
+        polygon = {
+            'type': 'Polygon',
+            'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]
+        }
+        mocked_open.return_value.__enter__.return_value = [
+            {'id': '1', 'geometry': polygon},
+            # ring with too few points is rejected by GEOS
+            {'id': '2', 'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[[0, 0], [1, 0]]]
+            }},
+            {'id': 'a', 'geometry': polygon},
+            {'id': '3', 'geometry': None}
+        ]
+        rows = list(iter_simplification_rows('output.geojson'))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], '1')
+        self.assertTrue(
+            GEOSGeometry(rows[0][1]).equals(GEOSGeometry(json.dumps(polygon))))
+
+    def test_mapshaper_multi_commands(self):
+        commands = mapshaper_multi_commands(
+            'input.geojson',
+            {
+                0.5: 'output_0.5.geojson',
+                0.1: 'output_0.1.geojson'
+            }
+        )
+        self.assertEqual(commands, [
+            'mapshaper-xl', 'input.geojson',
+            '-simplify', '0.5', 'dp', 'keep-shapes',
+            '-o', 'output_0.5.geojson',
+            '-simplify', '0.1', 'dp', 'keep-shapes',
+            '-o', 'output_0.1.geojson'
+        ])
@@ -0,0 +1,75 @@
+import os
+import mock
+import tempfile
+from django.test import TestCase
+
+from georepo.utils.tile_coverage import (
+    TileCoverage,
+    column_contains,
+    write_tile_list_file,
+    is_tile_covered,
+    merge_dirty_bboxes,
+    build_dirty_tile_coverage
+)
+
+
+class TestTileCoverage(TestCase):
+
+    def test_tile_coverage(self):
+        coverage = TileCoverage(4)
+        coverage.add_range(1, 1, 2, 3)
+        coverage.add_range(2, 4, 2, 5)
+        coverage.add_range(2, 8, 2, 8)
+        coverage.add_bbox([0.1, 0.1, 1.0, 1.0])
+        coverage.merge()
+        self.assertEqual(coverage.columns[1], [(1, 3)])
+        self.assertEqual(coverage.columns[2], [(1, 5), (8, 8)])
+        self.assertEqual(coverage.columns[8], [(7, 7)])
+        self.assertTrue(coverage.contains(2, 5))
+        self.assertTrue(coverage.contains(2, 8))
+        self.assertFalse(coverage.contains(2, 6))
+        self.assertFalse(coverage.contains(3, 1))
+        self.assertEqual(coverage.count(), 10)
+        batches = list(coverage.iter_batches(4))
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(batches[0], [(1, 1), (1, 2), (1, 3), (2, 1)])
+        self.assertFalse(column_contains([], 1))
+        self.assertFalse(column_contains([(3, 4)], 1))
+
+    def test_write_tile_list_file(self):
+        coverage = TileCoverage(2)
+        coverage.add_range(0, 1, 1, 1)
+        coverage.merge()
+        tmp_dir = tempfile.mkdtemp()
+        file_path = write_tile_list_file(
+            coverage, os.path.join(tmp_dir, 'test.tiles'))
+        with open(file_path, 'r') as f:
+            self.assertEqual(f.read(), '2/0/1\n2/1/1\n')
+        os.remove(file_path)
+        os.rmdir(tmp_dir)
+
+    @mock.patch('georepo.utils.tile_coverage.cache')
+    def test_is_tile_covered(self, mocked_cache):
+        mocked_cache.get_many.return_value = {}
+        self.assertIsNone(is_tile_covered('abc', 4, 1, 1))
+        mocked_cache.get_many.return_value = {
+            'abc-4-tile-coverage': {'min_x': 1, 'max_x': 2},
+            'abc-4-1-tile-coverage': [(1, 3)]
+        }
+        self.assertTrue(is_tile_covered('abc', 4, 1, 1))
+        self.assertFalse(is_tile_covered('abc', 4, 1, 4))
+
+    @mock.patch('georepo.utils.tile_coverage.DIRTY_TILE_MAX_BBOXES', 2)
+    def test_merge_dirty_bboxes(self):
+        bboxes = merge_dirty_bboxes([], [[0, 0, 1, 1]])
+        self.assertEqual(bboxes, [[0, 0, 1, 1]])
+        bboxes = merge_dirty_bboxes(bboxes, [[0, 0, 1, 1], [2, 2, 3, 3]])
+        self.assertEqual(bboxes, [[0, 0, 1, 1], [2, 2, 3, 3]])
+        bboxes = merge_dirty_bboxes(bboxes, [[-1, 1, 0, 4]])
+        self.assertEqual(bboxes, [[-1, 0, 3, 4]])
+
+    def test_build_dirty_tile_coverage(self):
+        coverage = build_dirty_tile_coverage(
+            [[10.0, -5.0, 20.0, 5.0], [15.0, -5.0, 25.0, 5.0]], 2)
+        self.assertEqual(coverage.columns, {2: [(1, 2)]})
+        self.assertEqual(coverage.count(), 2)
@@ -0,0 +1,86 @@
+import mock
+from django.db import connection
+from django.test import TestCase
+
+from georepo.utils.tile_engine import (
+    build_tile_query_template,
+    get_statement_name,
+    PreparedTileStatements,
+    execute_prepared_tile_query,
+    single_flight_tile,
+    resolve_tile_alias
+)
+
+
+class TestTileEngine(TestCase):
+
+    def test_build_tile_query_template(self):
+        cache_value = {
+            0: 'SELECT {bbox_param} AS geometry WHERE a && {intersects_param}',
+            1: 'SELECT {bbox_param} AS geometry WHERE b && {intersects_param}'
+        }
+        sql = build_tile_query_template(cache_value)
+        self.assertIn('TileBBox($1, $2, $3, 3857)', sql)
+        self.assertIn('TileBBox($1, $2, $3, 4326)', sql)
+        self.assertIn('\'Level-0\'', sql)
+        self.assertIn('\'Level-1\'', sql)
+        self.assertNotIn('{bbox_param}', sql)
+        self.assertEqual(
+            get_statement_name(sql),
+            get_statement_name(build_tile_query_template(cache_value))
+        )
+
+    def test_prepared_statements_lru(self):
+        cursor = mock.MagicMock()
+        statements = PreparedTileStatements(1, max_size=2)
+        statements.prepare(cursor, 'stmt_a', 'SELECT 1')
+        statements.prepare(cursor, 'stmt_b', 'SELECT 2')
+        self.assertEqual(cursor.execute.call_count, 2)
+        # already prepared, should not prepare again
+        statements.prepare(cursor, 'stmt_a', 'SELECT 1')
+        self.assertEqual(cursor.execute.call_count, 2)
+        # stmt_b is the least recently used
+        statements.prepare(cursor, 'stmt_c', 'SELECT 3')
+        cursor.execute.assert_called_with('DEALLOCATE stmt_b')
+        self.assertEqual(
+            list(statements.statements.keys()),
+            ['stmt_a', 'stmt_c']
+        )
+
+    def test_execute_prepared_tile_query_removed(self):
+        sql = (
+            'SELECT decode(\'ab\', \'hex\') '
+            'WHERE $1::int + $2::int + $3::int >= 0'
+        )
+        self.assertEqual(execute_prepared_tile_query(sql, 0, 0, 0), b'\xab')
+        # statement is removed by the server, e.g. by connection pooler
+        with connection.cursor() as cursor:
+            cursor.execute(f'DEALLOCATE {get_statement_name(sql)}')
+        # retry runs inside the test transaction
+        self.assertEqual(execute_prepared_tile_query(sql, 1, 0, 0), b'\xab')
+
+    @mock.patch('georepo.utils.tile_engine.cache')
+    def test_single_flight_tile(self, mocked_cache):
+        render = mock.Mock(return_value=b'tile')
+        # no other worker is rendering the tile
+        mocked_cache.get.return_value = None
+        mocked_cache.add.return_value = True
+        self.assertEqual(single_flight_tile('res-0-0-0', render), b'tile')
+        render.assert_called_once()
+        mocked_cache.set.assert_called_once()
+        mocked_cache.delete.assert_called_once_with(
+            'res-0-0-0-pending-tile-lock')
+        # other worker has rendered the tile
+        render.reset_mock()
+        mocked_cache.get.return_value = b'other'
+        self.assertEqual(single_flight_tile('res-0-0-0', render), b'other')
+        render.assert_not_called()
+
+    @mock.patch('georepo.utils.tile_engine.cache')
+    def test_resolve_tile_alias(self, mocked_cache):
+        mocked_cache.get.side_effect = (
+            lambda key, default: 'res-2' if key == 'res-4-tile-alias'
+            else default
+        )
+        self.assertEqual(resolve_tile_alias('res-4'), 'res-2')
+        self.assertEqual(resolve_tile_alias('res-2'), 'res-2')
@@ -0,0 +1,83 @@
+import os
+import mock
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+
+from georepo.utils.tile_seeder import (
+    lonlat_to_tile,
+    get_tile_range,
+    parse_bbox,
+    iter_tile_batches,
+    count_tiles,
+    get_live_tile_path,
+    TileSeeder
+)
+
+
+class TestTileSeeder(TestCase):
+
+    def test_tile_range(self):
+        self.assertEqual(lonlat_to_tile(0, 0, 0), (0, 0))
+        self.assertEqual(lonlat_to_tile(-180, 85.1, 1), (0, 0))
+        self.assertEqual(lonlat_to_tile(180, -85.1, 1), (1, 1))
+        bbox = parse_bbox('10.0,-5.0,20.0,5.0')
+        self.assertEqual(bbox, [10.0, -5.0, 20.0, 5.0])
+        self.assertEqual(get_tile_range(bbox, 0), (0, 0, 0, 0))
+        self.assertEqual(get_tile_range(bbox, 2), (2, 1, 2, 2))
+        self.assertEqual(get_tile_range([], 1), (0, 0, 1, 1))
+        tile_range = get_tile_range(bbox, 5)
+        batches = list(iter_tile_batches(5, tile_range, batch_size=3))
+        self.assertEqual(
+            sum([len(batch) for batch in batches]),
+            count_tiles(tile_range)
+        )
+
+    @mock.patch('georepo.utils.tile_seeder.write_temp_tiles')
+    @mock.patch('georepo.utils.tile_seeder.execute_prepared_tile_query')
+    def test_run(self, mocked_query, mocked_write):
+        mocked_query.return_value = b'tile'
+        zoom_done = []
+        seeder = TileSeeder(
+            'abcdef',
+            {0: 'sql_0', 1: 'sql_1', 2: 'sql_2'},
+            {0: (0, 0, 0, 0), 1: (0, 0, 1, 1), 2: (0, 0, 3, 3)},
+            concurrency=3
+        )
+        zoom_stats = seeder.run(
+            on_zoom_done=lambda zoom, stats: zoom_done.append(zoom)
+        )
+        self.assertEqual(zoom_done, [0, 1, 2])
+        self.assertEqual(mocked_query.call_count, 21)
+        self.assertEqual(zoom_stats[2]['processed_tiles'], 16)
+        self.assertEqual(zoom_stats[2]['total_files'], 16)
+        self.assertTrue(mocked_write.called)
+
+    @mock.patch('georepo.utils.tile_seeder.execute_prepared_tile_query')
+    def test_run_live(self, mocked_query):
+        tmp_dir = tempfile.mkdtemp()
+        with override_settings(LAYER_TILES_PATH=tmp_dir, USE_AZURE=False,
+                               VECTOR_TILE_STORAGE='directory'):
+            # existing tile that becomes empty
+            empty_tile = get_live_tile_path('abcdef', 1, 1, 1)
+            os.makedirs(os.path.dirname(empty_tile))
+            with open(empty_tile, 'wb') as f:
+                f.write(b'old')
+            mocked_query.side_effect = (
+                lambda sql, z, x, y: b'' if (x, y) == (1, 1) else b'tile'
+            )
+            seeder = TileSeeder(
+                'abcdef',
+                {1: 'sql_1'},
+                {1: (0, 0, 1, 1)},
+                concurrency=2,
+                is_temp=False
+            )
+            zoom_stats = seeder.run()
+            self.assertEqual(zoom_stats[1]['total_files'], 3)
+            self.assertFalse(os.path.exists(empty_tile))
+            self.assertTrue(
+                os.path.exists(get_live_tile_path('abcdef', 1, 0, 1)))
+            self.assertFalse(os.path.exists(
+                os.path.join(tmp_dir, 'temp_abcdef')))
+        shutil.rmtree(tmp_dir)
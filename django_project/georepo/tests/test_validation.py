@@ -1,5 +1,6 @@
 import json
 import os.path
+import threading
 import mock
 
 from django.contrib.gis.geos import GEOSGeometry
@@ -17,7 +18,7 @@ from georepo.tests.model_factories import (
 )
 from georepo.utils import absolute_path
 from dashboard.models.entity_upload import (
-    EntityUploadStatus, STARTED, PROCESSING, WARNING
+    EntityUploadStatus, STARTED, PROCESSING, WARNING, EntityTemp
 )
 from dashboard.tests.model_factories import (
     LayerUploadSessionF,
@@ -36,7 +37,10 @@ from georepo.validation.layer_validation import (
     read_layer_files
 )
 from georepo.tasks.validation import find_entity_upload
-from georepo.utils.layers import read_layer_files_entity_temp
+from georepo.utils.layers import (
+    read_layer_files_entity_temp,
+    stage_temp_layer_file
+)
 
 ERROR_REPORT_PATH = '/home/web/django_project/georepo/error_reports/'
 
@@ -153,6 +157,17 @@ class TestValidation(TestCase):
             original_geographical_entity=self.geographical_entity
         )
         read_layer_files_entity_temp(self.upload_session)
+        # ancestor of level 2 is resolved from the parent in level 1
+        entity_temp = EntityTemp.objects.get(
+            upload_session=self.upload_session,
+            level=2
+        )
+        self.assertEqual(entity_temp.parent_entity_id, 'PAK003')
+        self.assertEqual(entity_temp.ancestor_entity_id, 'PAK')
+        self.assertEqual(
+            self.upload_session.validation_summaries[2]['parent_missing'],
+            []
+        )
 
         status = validate_layer_file(
             entity_upload=entity_upload
@@ -1037,3 +1052,111 @@ class FindEntityUploadTestCase(TransactionTestCase):
                     timezone.now()
                 )
                 self.assertFalse(upload)
+
+
+class ReadLayerFilesConcurrentTestCase(TransactionTestCase):
+
+    def setUp(self) -> None:
+        self.module = ModuleF.create(
+            name='Admin Boundaries'
+        )
+        self.dataset = DatasetF.create(
+            module=self.module
+        )
+        self.language = LanguageF.create()
+        self.upload_session = LayerUploadSessionF.create(
+            dataset=self.dataset,
+            tolerance=1e-8,
+            overlaps_threshold=0.01,
+            gaps_threshold=0.01
+        )
+        self.idType = IdType.objects.create(
+            name='PCode'
+        )
+
+    @override_settings(MEDIA_ROOT='/home/web/django_project/georepo')
+    def test_read_layer_files_concurrently(self):
+        LayerFileF.create(
+            layer_upload_session=self.upload_session,
+            level='1',
+            parent_id_field='iso3',
+            location_type_field='type',
+            name_fields=[
+                {
+                    'field': 'adm1_name',
+                    'default': True,
+                    'selectedLanguage': self.language.id
+                }
+            ],
+            id_fields=[
+                {
+                    'field': 'code_1',
+                    'default': True,
+                    'idType': {
+                        'id': self.idType.id,
+                        'name': 'PCode'
+                    }
+                }
+            ],
+            layer_file=(
+                absolute_path('georepo', 'tests',
+                              'geojson_dataset', 'level_1.geojson')
+            )
+        )
+        LayerFileF.create(
+            layer_upload_session=self.upload_session,
+            level='2',
+            location_type_field='type',
+            parent_id_field='code_1',
+            name_fields=[
+                {
+                    'field': 'adm2_name',
+                    'default': True,
+                    'selectedLanguage': self.language.id
+                }
+            ],
+            id_fields=[
+                {
+                    'field': 'code_1',
+                    'default': True,
+                    'idType': {
+                        'id': self.idType.id,
+                        'name': 'PCode'
+                    }
+                }
+            ],
+            layer_file=(
+                absolute_path('georepo', 'tests',
+                              'geojson_dataset', 'level_2.geojson')
+            )
+        )
+        staged_threads = []
+
+        def stage_in_thread(upload_session, layer_file):
+            staged_threads.append(threading.get_ident())
+            return stage_temp_layer_file(upload_session, layer_file)
+
+        with mock.patch.dict(
+                os.environ, {'LAYER_PREPROCESSING_CONCURRENCY': '2'}):
+            with mock.patch(
+                    'georepo.utils.layers.stage_temp_layer_file',
+                    mock.Mock(side_effect=stage_in_thread)):
+                read_layer_files_entity_temp(self.upload_session)
+        # both layer files are staged by the workers
+        self.assertEqual(len(staged_threads), 2)
+        self.assertNotIn(threading.get_ident(), staged_threads)
+        entity_temp = EntityTemp.objects.get(
+            upload_session=self.upload_session,
+            level=2
+        )
+        self.assertEqual(entity_temp.parent_entity_id, 'PAK003')
+        self.assertEqual(entity_temp.ancestor_entity_id, 'PAK')
+        self.upload_session.refresh_from_db()
+        self.assertEqual(
+            self.upload_session.validation_summaries['2']['parent_missing'],
+            []
+        )
+        self.assertEqual(
+            self.upload_session.progress,
+            'Reading layer files (2/2)'
+        )
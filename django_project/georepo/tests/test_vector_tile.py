@@ -22,10 +22,12 @@ from georepo.tests.model_factories import (
 from georepo.utils.vector_tile import (
     create_view_configuration_files,
     generate_view_vector_tiles,
-    dataset_view_sql_query
+    dataset_view_sql_query,
+    set_tile_alias_cache_keys
 )
 from georepo.utils.dataset_view import (
-    generate_default_view_dataset_latest
+    generate_default_view_dataset_latest,
+    calculate_entity_count_in_view
 )
 from georepo.utils.dataset_view import (
     init_view_privacy_level
@@ -235,3 +237,21 @@ class TestVectorTile(TestCase):
             generate_view_vector_tiles(view_resource)
             mocked_file.assert_not_called()
             mo_subprocess.assert_not_called()
+
+    def test_set_tile_alias_cache_keys(self):
+        calculate_entity_count_in_view(self.view_latest)
+        resources = {}
+        for view_resource in DatasetViewResource.objects.filter(
+                dataset_view=self.view_latest):
+            resources[view_resource.privacy_level] = view_resource.resource_id
+        with mock.patch('georepo.utils.vector_tile.cache') as mocked_cache:
+            aliases = set_tile_alias_cache_keys(self.view_latest)
+            # only privacy level 2 has the tiles
+            self.assertEqual(aliases, {
+                resources[3]: resources[2],
+                resources[4]: resources[2]
+            })
+            mocked_cache.set.assert_any_call(
+                f'{resources[4]}-tile-alias', resources[2], timeout=None)
+            mocked_cache.delete.assert_any_call(
+                f'{resources[1]}-tile-alias')
@@ -28,6 +28,7 @@ from georepo.api_views.entity_view import (
     ViewFindEntityFuzzySearch,
     ViewFindEntityGeometryFuzzySearch,
     ViewEntityBoundingBox,
+    ViewEntityDump,
     ViewEntityContainmentCheck,
     ViewEntityTraverseHierarchyByUCode,
     ViewEntityTraverseChildrenHierarchyByUCode,
@@ -259,6 +260,11 @@ view_entity_urls = [
 ]
 
 operation_view_entity_urls = [
+    path(
+        'operation/view/<uuid:uuid>/dump/',
+        ViewEntityDump.as_view(),
+        name='view-entity-dump'
+    ),
     path(
         'operation/view/<uuid:uuid>/bbox/<id_type>/'
         '<path:id>/',
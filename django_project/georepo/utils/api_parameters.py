@@ -38,3 +38,24 @@ common_api_params = [
         **api_pagination_params
     )
 ]
+
+
+cursor_api_params = [
+    openapi.Parameter(
+        'cursor', openapi.IN_QUERY,
+        description=(
+            'Cursor pagination; empty for the first page, then the '
+            'next value of previous page. Page is ignored.'
+        ),
+        type=openapi.TYPE_STRING,
+        required=False
+    ), openapi.Parameter(
+        'count', openapi.IN_QUERY,
+        description=(
+            'Set to approximate to include estimated total count '
+            'in cursor pagination'
+        ),
+        type=openapi.TYPE_STRING,
+        required=False
+    )
+]
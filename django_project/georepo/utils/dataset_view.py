@@ -24,6 +24,7 @@ from georepo.models.dataset_tile_config import (
 from georepo.models.dataset_view_tile_config import (
     DatasetViewTilingConfig
 )
+from georepo.utils.entity_search import invalidate_entity_search_names
 
 
 VIEW_LATEST_DESC = (
@@ -423,6 +424,8 @@ def create_sql_view(view: DatasetView, **kwargs):
                 )
             )
         cursor.execute('''%s''' % sql)
+    # entities of view may be changed by the query
+    invalidate_entity_search_names(view.id)
     end = time.time()
     if kwargs.get('log_object'):
         kwargs.get('log_object').add_log(
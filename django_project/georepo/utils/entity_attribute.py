@@ -0,0 +1,152 @@
+import time
+import logging
+from typing import List
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.fields.json import KeyTransform
+
+
+logger = logging.getLogger(__name__)
+
+# max depth of parents, guard against cycle in parent relation
+ENTITY_ATTRIBUTE_MAX_DEPTH = 32
+
+ENTITY_ATTRIBUTE_SQL = (
+    """
+    WITH RECURSIVE target(id) AS (
+        {target_sql}
+    ),
+    parents(entity_id, depth, parent_id) AS (
+        SELECT ge.id, 1, ge.parent_id
+        FROM georepo_geographicalentity ge
+        INNER JOIN target t ON t.id=ge.id
+        WHERE ge.parent_id IS NOT NULL
+        UNION ALL
+        SELECT p.entity_id, p.depth + 1, pe.parent_id
+        FROM parents p
+        INNER JOIN georepo_geographicalentity pe ON pe.id=p.parent_id
+        WHERE pe.parent_id IS NOT NULL AND p.depth < {max_depth}
+    )
+    INSERT INTO georepo_entityattribute
+        (geographical_entity_id, attributes)
+    SELECT t.id,
+        COALESCE(ids.attrs, '{{}}'::jsonb) ||
+        COALESCE(names.attrs, '{{}}'::jsonb) ||
+        COALESCE(pars.attrs, '{{}}'::jsonb)
+    FROM target t
+    LEFT JOIN (
+        SELECT ei.geographical_entity_id AS id,
+            jsonb_object_agg(
+                'id_' || ei.code_id || '__value', ei.value
+            ) AS attrs
+        FROM georepo_entityid ei
+        INNER JOIN target t ON t.id=ei.geographical_entity_id
+        GROUP BY ei.geographical_entity_id
+    ) ids ON ids.id=t.id
+    LEFT JOIN (
+        SELECT en.geographical_entity_id AS id,
+            jsonb_object_agg(kv.key, kv.value) AS attrs
+        FROM georepo_entityname en
+        INNER JOIN target t ON t.id=en.geographical_entity_id
+        LEFT JOIN georepo_language lang ON lang.id=en.language_id
+        CROSS JOIN LATERAL jsonb_each(jsonb_build_object(
+            'name_' || en.idx || '__name', en.name,
+            'name_' || en.idx || '__label', en.label,
+            'name_' || en.idx || '__language__code', lang.code
+        )) kv
+        WHERE en.idx IS NOT NULL
+        GROUP BY en.geographical_entity_id
+    ) names ON names.id=t.id
+    LEFT JOIN (
+        SELECT p.entity_id AS id,
+            jsonb_object_agg(kv.key, kv.value) AS attrs
+        FROM parents p
+        INNER JOIN georepo_geographicalentity pe ON pe.id=p.parent_id
+        LEFT JOIN georepo_entitytype pt ON pt.id=pe.type_id
+        CROSS JOIN LATERAL (
+            SELECT 'parent' || repeat('__parent', p.depth - 1) AS prefix
+        ) r
+        CROSS JOIN LATERAL jsonb_each(jsonb_build_object(
+            r.prefix || '__internal_code', pe.internal_code,
+            r.prefix || '__unique_code', pe.unique_code,
+            r.prefix || '__unique_code_version', pe.unique_code_version,
+            r.prefix || '__level', pe.level,
+            r.prefix || '__type__label', pt.label
+        )) kv
+        GROUP BY p.entity_id
+    ) pars ON pars.id=t.id
+    ON CONFLICT (geographical_entity_id) DO UPDATE
+        SET attributes=EXCLUDED.attributes
+    """
+)
+
+
+def get_entity_attribute_cache_key(dataset_id: int):
+    return f'entity-attribute-dataset-{dataset_id}'
+
+
+def is_entity_attribute_ready(dataset_id: int):
+    """Check whether entity attributes of dataset are populated."""
+    return cache.get(get_entity_attribute_cache_key(dataset_id)) is not None
+
+
+def invalidate_entity_attributes(dataset_id: int):
+    """Read entity attributes from the entity tables until repopulated."""
+    cache.delete(get_entity_attribute_cache_key(dataset_id))
+
+
+def refresh_entity_attributes(dataset_id: int,
+                              entity_ids: List[int] = None):
+    """
+    Populate entity attributes of dataset.
+
+    When entity_ids is given, only the entities and their descendants
+    are refreshed, because the parent attributes of the descendants
+    contain the codes of the updated entities.
+    :return: number of refreshed entities
+    """
+    start = time.time()
+    if entity_ids is None:
+        target_sql = (
+            'SELECT id FROM georepo_geographicalentity WHERE dataset_id=%s'
+        )
+        params = [dataset_id]
+    else:
+        if not entity_ids or not is_entity_attribute_ready(dataset_id):
+            # dataset will be populated fully when the view is synced
+            return 0
+        target_sql = (
+            'SELECT id FROM georepo_geographicalentity '
+            'WHERE dataset_id=%s AND id IN %s '
+            'UNION '
+            'SELECT ge.id FROM georepo_geographicalentity ge '
+            'INNER JOIN target t ON ge.parent_id=t.id'
+        )
+        params = [dataset_id, tuple(entity_ids)]
+    sql = ENTITY_ATTRIBUTE_SQL.format(
+        target_sql=target_sql,
+        max_depth=ENTITY_ATTRIBUTE_MAX_DEPTH
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        total_count = cursor.rowcount
+    if entity_ids is None:
+        cache.set(
+            get_entity_attribute_cache_key(dataset_id), True, timeout=None)
+    logger.info(
+        f'Refresh entity attributes of dataset {dataset_id} '
+        f'- {total_count} entities in {time.time() - start}s'
+    )
+    return total_count
+
+
+def get_entity_attribute_expressions(keys: List[str]):
+    """
+    Return annotations that read keys from entity attributes.
+
+    The values keep their json types, e.g. number of level and version.
+    """
+    return {
+        key: KeyTransform(key, 'attribute__attributes') for key in keys
+    }
@@ -1,7 +1,9 @@
 from enum import Enum
 import math
+import uuid
 from dateutil.parser import parse
 from datetime import datetime
+from django.core.cache import cache
 from django.db.models import FilteredRelation, Q, F, Max
 from georepo.models.id_type import IdType
 from georepo.models.entity import (
@@ -19,6 +21,14 @@ from georepo.models.dataset_view import DatasetView
 from georepo.utils.custom_geo_functions import (
     ForcePolygonCCW
 )
+from georepo.utils.entity_attribute import (
+    is_entity_attribute_ready,
+    get_entity_attribute_expressions
+)
+
+
+# seconds to keep schema descriptor of dataset in the cache
+ENTITY_SCHEMA_CACHE_TIMEOUT = 7 * 24 * 3600
 
 
 class GeomReturnType(Enum):
@@ -80,6 +90,61 @@ def get_return_type_key(return_type: IdType | str):
     return return_type
 
 
+def get_entity_schema_version_key(dataset_id: int):
+    return f'entity-schema-dataset-{dataset_id}-version'
+
+
+def invalidate_entity_schema(dataset_id: int):
+    """Invalidate schema descriptors of dataset after entity update."""
+    cache.delete(get_entity_schema_version_key(dataset_id))
+
+
+def get_entity_schema(dataset_id: int, admin_level: int = None):
+    """
+    Return id types, max name idx and max level of approved entities.
+
+    The descriptor is cached under the version of the dataset schema,
+    so the entity queries do not need to scan the entity ids and names
+    before the actual query. The version is replaced on entity update.
+    :return: dict of ids, names_max_idx and max_level
+    """
+    version_key = get_entity_schema_version_key(dataset_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(version_key, version, timeout=None)
+    level_key = 'all' if admin_level is None else admin_level
+    cache_key = f'entity-schema-dataset-{dataset_id}-{version}-{level_key}'
+    schema = cache.get(cache_key)
+    if schema is not None:
+        return schema
+    entity_filter = {
+        'geographical_entity__is_approved': True,
+        'geographical_entity__dataset_id': dataset_id
+    }
+    entities = GeographicalEntity.objects.filter(
+        is_approved=True,
+        dataset_id=dataset_id
+    )
+    if admin_level is not None:
+        entity_filter['geographical_entity__level'] = admin_level
+        entities = entities.filter(level=admin_level)
+    ids = EntityId.objects.filter(**entity_filter).order_by('code').values(
+        'code__id', 'code__name', 'default'
+    ).distinct('code__id')
+    names_max_idx = EntityName.objects.filter(**entity_filter).aggregate(
+        Max('idx')
+    )
+    max_level_entity = entities.values('level').order_by('level').last()
+    schema = {
+        'ids': list(ids),
+        'names_max_idx': names_max_idx,
+        'max_level': max_level_entity['level'] if max_level_entity else 0
+    }
+    cache.set(cache_key, schema, timeout=ENTITY_SCHEMA_CACHE_TIMEOUT)
+    return schema
+
+
 def do_generate_entity_query(entities, dataset_id, entity_type=None,
                              admin_level=None,
                              geom_type=GeomReturnType.NO_GEOM,
@@ -99,37 +164,50 @@ def do_generate_entity_query(entities, dataset_id, entity_type=None,
         values.append('rhr_geom')
     elif geom_type == GeomReturnType.CENTROID:
         values.append('centroid')
-    # retrieve all ids+names in current dataset
-    ids = EntityId.objects.filter(
-        geographical_entity__is_approved=True,
-        geographical_entity__dataset_id=dataset_id,
-        geographical_entity__in=entities
-    )
-    names = EntityName.objects.filter(
-        geographical_entity__is_approved=True,
-        geographical_entity__dataset_id=dataset_id,
-        geographical_entity__in=entities
-    )
-    if entity_type:
-        ids = ids.filter(
-            geographical_entity__type=entity_type.id
-        )
-        names = names.filter(
-            geographical_entity__type=entity_type.id
-        )
-    if admin_level is not None:
-        ids = ids.filter(
-            geographical_entity__level=admin_level
+    schema = None
+    if format != 'geojson':
+        # json output skips empty ids, names and parents, so the columns
+        # of the dataset can be used instead of scanning the subset
+        schema = get_entity_schema(dataset_id, admin_level)
+        ids = schema['ids']
+    else:
+        # retrieve all ids+names in current dataset
+        ids = EntityId.objects.filter(
+            geographical_entity__is_approved=True,
+            geographical_entity__dataset_id=dataset_id,
+            geographical_entity__in=entities
         )
-        names = names.filter(
-            geographical_entity__level=admin_level
+        names = EntityName.objects.filter(
+            geographical_entity__is_approved=True,
+            geographical_entity__dataset_id=dataset_id,
+            geographical_entity__in=entities
         )
-    ids = ids.order_by('code').values(
-        'code__id', 'code__name', 'default'
-    ).distinct('code__id')
+        if entity_type:
+            ids = ids.filter(
+                geographical_entity__type=entity_type.id
+            )
+            names = names.filter(
+                geographical_entity__type=entity_type.id
+            )
+        if admin_level is not None:
+            ids = ids.filter(
+                geographical_entity__level=admin_level
+            )
+            names = names.filter(
+                geographical_entity__level=admin_level
+            )
+        ids = ids.order_by('code').values(
+            'code__id', 'code__name', 'default'
+        ).distinct('code__id')
+    use_attribute = is_entity_attribute_ready(dataset_id)
+    attribute_keys = []
     # conditional join to entity id for each id
     for id in ids:
         field_key = f"id_{id['code__id']}"
+        values.append(f'{field_key}__value')
+        if use_attribute:
+            attribute_keys.append(f'{field_key}__value')
+            continue
         annotations = {
             field_key: FilteredRelation(
                 'entity_ids',
@@ -137,14 +215,22 @@ def do_generate_entity_query(entities, dataset_id, entity_type=None,
             )
         }
         entities = entities.annotate(**annotations)
-        values.append(f'{field_key}__value')
     # get max idx in the names
-    names_max_idx = names.aggregate(
-        Max('idx')
-    )
+    if schema:
+        names_max_idx = schema['names_max_idx']
+    else:
+        names_max_idx = names.aggregate(
+            Max('idx')
+        )
     if names_max_idx['idx__max'] is not None:
         for name_idx in range(names_max_idx['idx__max'] + 1):
             field_key = f"name_{name_idx}"
+            values.append(f'{field_key}__name')
+            values.append(f'{field_key}__language__code')
+            values.append(f'{field_key}__label')
+            if use_attribute:
+                attribute_keys.extend(values[-3:])
+                continue
             annotations = {
                 field_key: FilteredRelation(
                     'entity_names',
@@ -154,16 +240,16 @@ def do_generate_entity_query(entities, dataset_id, entity_type=None,
                 )
             }
             entities = entities.annotate(**annotations)
-            values.append(f'{field_key}__name')
-            values.append(f'{field_key}__language__code')
-            values.append(f'{field_key}__label')
     # find max level to build query for the parent's code
     max_level = 0
-    max_level_entity = entities.values('level').order_by(
-        'level'
-    ).last()
-    if max_level_entity:
-        max_level = max_level_entity['level']
+    if schema:
+        max_level = schema['max_level']
+    else:
+        max_level_entity = entities.values('level').order_by(
+            'level'
+        ).last()
+        if max_level_entity:
+            max_level = max_level_entity['level']
     related = ''
     for i in range(max_level):
         related = related + (
@@ -175,6 +261,13 @@ def do_generate_entity_query(entities, dataset_id, entity_type=None,
         values.append(f'{related}__unique_code_version')
         values.append(f'{related}__level')
         values.append(f'{related}__type__label')
+        if use_attribute:
+            attribute_keys.extend(values[-5:])
+    if attribute_keys:
+        # read from single join to denormalized attributes
+        entities = entities.annotate(
+            **get_entity_attribute_expressions(attribute_keys)
+        )
     entities = entities.order_by('level', 'unique_code_version',
                                  'unique_code', 'id')
     return entities, values, max_level, ids, names_max_idx
@@ -182,7 +275,17 @@ def do_generate_entity_query(entities, dataset_id, entity_type=None,
 
 def do_generate_fuzzy_query(view: DatasetView, search_text: str,
                             max_privacy_level: int, page: int,
-                            page_size: int):
+                            page_size: int,
+                            use_search_names: bool = False):
+    """
+    Generate fuzzy search sql of entity names in view.
+
+    Total count of the matching names is selected with window function,
+    count_sql is only needed when the page is out of range.
+    When use_search_names is True, the names are searched in
+    the populated search names of view instead of filtering
+    all entity names by the sql view.
+    """
     dataset: Dataset = view.dataset
     select_dicts = {
         'id': 'gg.id',
@@ -204,15 +307,22 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
         'bbox': 'gg.bbox'
     }
     other_joins = []
+    use_attribute = is_entity_attribute_ready(dataset.id)
+    if use_attribute:
+        other_joins.append(
+            'left join georepo_entityattribute ea on '
+            '(gg.id=ea.geographical_entity_id)'
+        )
+    schema = get_entity_schema(dataset.id)
     # add code/id
-    ids = EntityId.objects.filter(
-        geographical_entity__is_approved=True,
-        geographical_entity__dataset=dataset
-    ).order_by('code').values(
-        'code__id', 'code__name', 'default'
-    ).distinct('code__id')
+    ids = schema['ids']
     for id in ids:
         field_key = f"id_{id['code__id']}"
+        if use_attribute:
+            select_dicts[f'{field_key}__value'] = (
+                f"ea.attributes->>'{field_key}__value'"
+            )
+            continue
         other_joins.append(
             f"left join georepo_entityid {field_key} on (gg.id={field_key}."
             f"geographical_entity_id and {field_key}."
@@ -220,16 +330,16 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
         )
         select_dicts[f'{field_key}__value'] = f'{field_key}.value'
     # add other names
-    names = EntityName.objects.filter(
-        geographical_entity__is_approved=True,
-        geographical_entity__dataset=dataset
-    )
-    names_max_idx = names.aggregate(
-        Max('idx')
-    )
+    names_max_idx = schema['names_max_idx']
     if names_max_idx['idx__max'] is not None:
         for name_idx in range(names_max_idx['idx__max'] + 1):
             field_key = f"name_{name_idx}"
+            if use_attribute:
+                for attr in ['name', 'label', 'language__code']:
+                    select_dicts[f'{field_key}__{attr}'] = (
+                        f"ea.attributes->>'{field_key}__{attr}'"
+                    )
+                continue
             other_joins.append(
                 f"left join georepo_entityname {field_key} on "
                 f"(gg.id={field_key}.geographical_entity_id and "
@@ -245,17 +355,24 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
                 f'{field_key}_lang.code'
             )
     # add parents
-    max_level = 0
-    max_level_entity = GeographicalEntity.objects.filter(
-        is_approved=True,
-        dataset=dataset
-    ).values('level').order_by(
-        'level'
-    ).last()
-    if max_level_entity:
-        max_level = max_level_entity['level']
+    max_level = schema['max_level']
+    if max_level:
+        related = ''
         for i in range(max_level):
             field_key = f"parent_{i}"
+            related = related + (
+                '__parent' if i > 0 else 'parent'
+            )
+            if use_attribute:
+                for attr, cast in [('internal_code', ''),
+                                   ('unique_code', ''),
+                                   ('unique_code_version', '::float'),
+                                   ('level', '::int'),
+                                   ('type__label', '')]:
+                    select_dicts[f'{field_key}__{attr}'] = (
+                        f"(ea.attributes->>'{related}__{attr}'){cast}"
+                    )
+                continue
             prev_field = (
                 f"parent_{i-1}" if i > 0 else "gg"
             )
@@ -280,6 +397,8 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
             select_dicts[f'{field_key}__type__label'] = (
                 f'{field_key}_type.label'
             )
+    # total of matching names in the same pass
+    select_dicts['total_count'] = 'COUNT(*) OVER ()'
     sql_select = 'SELECT '
     selects = []
     for key, value in select_dicts.items():
@@ -287,20 +406,36 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
     sql_select = (
         sql_select + ', '.join(selects)
     )
-    sql_template = (
-        """
-        {sql_select}
-        FROM georepo_entityname ename
-        inner join georepo_geographicalentity gg
-        on gg.id=ename.geographical_entity_id
-        inner join georepo_entitytype ge on ge.id=gg.type_id
-        {other_joins}
-        WHERE %s <%% ename.name and gg.dataset_id = {dataset_id} and
-        gg.privacy_level <= {max_privacy_level}
-        and gg.id in (SELECT id from "{view_uuid}")
-        {order_by}
-        """
-    )
+    if use_search_names:
+        sql_template = (
+            """
+            {sql_select}
+            FROM georepo_entitysearchname ename
+            inner join georepo_geographicalentity gg
+            on gg.id=ename.geographical_entity_id
+            inner join georepo_entitytype ge on ge.id=gg.type_id
+            {other_joins}
+            WHERE %s <%% ename.name and
+            ename.dataset_view_id = {view_id} and
+            ename.privacy_level <= {max_privacy_level}
+            {order_by}
+            """
+        )
+    else:
+        sql_template = (
+            """
+            {sql_select}
+            FROM georepo_entityname ename
+            inner join georepo_geographicalentity gg
+            on gg.id=ename.geographical_entity_id
+            inner join georepo_entitytype ge on ge.id=gg.type_id
+            {other_joins}
+            WHERE %s <%% ename.name and gg.dataset_id = {dataset_id} and
+            gg.privacy_level <= {max_privacy_level}
+            and gg.id in (SELECT id from "{view_uuid}")
+            {order_by}
+            """
+        )
     offset = (page - 1) * page_size
     pagination = f'OFFSET {offset} LIMIT {page_size}'
     sql = sql_template.format(
@@ -308,6 +443,7 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
         other_joins=' '.join(other_joins),
         dataset_id=dataset.id,
         max_privacy_level=max_privacy_level,
+        view_id=view.id,
         view_uuid=str(view.uuid),
         order_by=f'ORDER BY similarity DESC {pagination}'
     )
@@ -316,6 +452,7 @@ def do_generate_fuzzy_query(view: DatasetView, search_text: str,
         other_joins=' '.join(other_joins),
         dataset_id=dataset.id,
         max_privacy_level=max_privacy_level,
+        view_id=view.id,
         view_uuid=str(view.uuid),
         order_by=''
     )
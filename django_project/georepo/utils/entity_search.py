@@ -0,0 +1,76 @@
+import time
+import uuid
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+# seconds to keep page of fuzzy search result
+FUZZY_SEARCH_CACHE_TIMEOUT = 60
+
+ENTITY_SEARCH_NAME_SQL = (
+    """
+    INSERT INTO georepo_entitysearchname
+        (dataset_view_id, geographical_entity_id, name, privacy_level)
+    SELECT %s, gg.id, en.name, gg.privacy_level
+    FROM georepo_entityname en
+    INNER JOIN georepo_geographicalentity gg
+        ON gg.id=en.geographical_entity_id
+    WHERE gg.dataset_id=%s AND gg.id IN (SELECT id FROM "{view_uuid}")
+    """
+)
+
+
+def get_entity_search_cache_key(view_id: int):
+    return f'entity-search-view-{view_id}'
+
+
+def get_entity_search_version(view_id: int):
+    """Return version of search names of view, None if not populated."""
+    return cache.get(get_entity_search_cache_key(view_id))
+
+
+def invalidate_entity_search_names(view_id: int):
+    """Fallback to search the sql view until the names are refreshed."""
+    cache.delete(get_entity_search_cache_key(view_id))
+
+
+def refresh_entity_search_names(view):
+    """
+    Populate search names of entities in the dataset view.
+
+    :return: number of search names
+    """
+    start = time.time()
+    sql = ENTITY_SEARCH_NAME_SQL.format(view_uuid=str(view.uuid))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM georepo_entitysearchname '
+                'WHERE dataset_view_id=%s',
+                [view.id]
+            )
+            cursor.execute(sql, [view.id, view.dataset_id])
+            total_count = cursor.rowcount
+    # new version also expires the cached search results
+    cache.set(
+        get_entity_search_cache_key(view.id), uuid.uuid4().hex,
+        timeout=None
+    )
+    logger.info(
+        f'Refresh search names of view {view.id} '
+        f'- {total_count} names in {time.time() - start}s'
+    )
+    return total_count
+
+
+def get_fuzzy_search_cache_key(view_id: int, version: str, *args):
+    """Return cache key of fuzzy search result page."""
+    digest = hashlib.md5(
+        '|'.join([str(arg) for arg in args]).encode('utf-8')
+    ).hexdigest()
+    return f'fuzzy-search-view-{view_id}-{version}-{digest}'
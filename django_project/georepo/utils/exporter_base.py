@@ -1,9 +1,12 @@
 import re
 import os
+import json
 import shutil
 import datetime
 import logging
+import threading
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from django.db import connection
 import xml.etree.ElementTree as ET
 from rest_framework.reverse import reverse
@@ -39,6 +42,10 @@ from georepo.utils.permission import (
     get_view_permission_privacy_level
 )
 from georepo.utils.entity_query import validate_datetime
+from georepo.utils.entity_attribute import (
+    is_entity_attribute_ready,
+    get_entity_attribute_expressions
+)
 from georepo.models.base_task_request import (
     PROCESSING,
     DONE,
@@ -66,6 +73,10 @@ METADATA_TEMPLATE_PATH = absolute_path(
 EXCLUDED_FILTER_KEYS = [
     'updated_at', 'points'
 ]
+# number of rows fetched per round trip of the server-side cursor
+EXPORT_CURSOR_CHUNK_SIZE = 2000
+# number of features that are joined and written to file at once
+EXPORT_WRITE_BATCH_SIZE = 500
 
 
 def get_property_type(property: str):
@@ -90,6 +101,69 @@ def has_array_filter(filters, filter_key):
     return filter_key in filters and len(filters[filter_key]) > 0
 
 
+def get_export_concurrency():
+    """Return number of admin levels that are exported concurrently."""
+    return max(int(os.getenv('EXPORT_CONCURRENCY', '1')), 1)
+
+
+def to_feature_json(data: dict, geometry: str, compact=False):
+    """
+    Serialize feature with GeoJSON geometry string.
+
+    The geometry is appended as it is, so it is not parsed nor
+    searched for placeholder after the properties are dumped.
+    """
+    separators = (',', ':') if compact else (', ', ': ')
+    data.pop('geometry', None)
+    feature_str = json.dumps(data, separators=separators)
+    if geometry is None:
+        geometry = 'null'
+    if feature_str == '{}':
+        return f'{{"geometry"{separators[1]}{geometry}}}'
+    return (
+        f'{feature_str[:-1]}{separators[0]}'
+        f'"geometry"{separators[1]}{geometry}}}'
+    )
+
+
+def write_feature_collection(file_path: str, features, compact=False):
+    """
+    Write serialized features as GeoJSON FeatureCollection.
+
+    Features are joined and written in batches, and the total count
+    is not needed upfront, so features can be streamed from cursor.
+    :param features: iterable of Feature json string
+    :return: number of written features
+    """
+    newline = '' if compact else '\n'
+    separator = f',{newline}'
+    total_count = 0
+    with open(file_path, 'w') as geojson_file:
+        if compact:
+            geojson_file.write('{"type":"FeatureCollection","features":[')
+        else:
+            geojson_file.write('{\n"type": "FeatureCollection",\n')
+            geojson_file.write('"features": [\n')
+        batch = []
+        for feature in features:
+            batch.append(feature)
+            if len(batch) >= EXPORT_WRITE_BATCH_SIZE:
+                if total_count > 0:
+                    geojson_file.write(separator)
+                geojson_file.write(separator.join(batch))
+                total_count += len(batch)
+                batch.clear()
+        if batch:
+            if total_count > 0:
+                geojson_file.write(separator)
+            geojson_file.write(separator.join(batch))
+            total_count += len(batch)
+        if total_count > 0:
+            geojson_file.write(newline)
+        geojson_file.write(f']{newline}}}{newline}')
+    return total_count
+
+
 class DatasetViewExporterBase(object):
     def __init__(self, request: ExportRequest,
                  is_temp: bool = False,
@@ -113,6 +187,7 @@ class DatasetViewExporterBase(object):
         self.tiling_configs = []
         self.has_custom_tiling_config = False
         self.exporter_ref = ref
+        self.progress_lock = threading.Lock()
 
     def get_exported_file_name(self, level: int):
         exported_name = f'adm{level}'
@@ -304,6 +379,28 @@ class DatasetViewExporterBase(object):
             return self.exporter_ref.get_serializer()
         return ExportGeojsonSerializer
 
+    def iter_entities(self, entities):
+        """Stream entity rows using server-side cursor."""
+        return entities.iterator(chunk_size=EXPORT_CURSOR_CHUNK_SIZE)
+
+    def iter_features(self, entities, context, compact=False):
+        """
+        Yield GeoJSON Feature string of each entity.
+
+        Single serializer instance is reused for all entities, so
+        the serializer fields are only bound once.
+        """
+        serializer = self.get_serializer()(context=context)
+        for entity in self.iter_entities(entities):
+            geom_data = entity['rhr_geom']
+            if geom_data is None:
+                geom_data = '{"type": "Point", "coordinates": [0, 0]}'
+            yield to_feature_json(
+                serializer.to_representation(entity),
+                geom_data,
+                compact=compact
+            )
+
     def get_extracted_on(self):
         return (
             self.request.submitted_on if self.request.submitted_on else
@@ -334,11 +431,12 @@ class DatasetViewExporterBase(object):
             if self.exporter_ref:
                 self.exporter_ref.update_progress()
             return
-        self.progress_count += inc_progress
-        self.request.progress = (
-            (self.progress_count * 100) / self.total_progress
-        ) if self.total_progress > 0 else 0
-        self.request.save(update_fields=['progress'])
+        with self.progress_lock:
+            self.progress_count += inc_progress
+            self.request.progress = (
+                (self.progress_count * 100) / self.total_progress
+            ) if self.total_progress > 0 else 0
+            self.request.save(update_fields=['progress'])
 
     def update_progress_text(self, status_text):
         if self.is_temp:
@@ -352,14 +450,7 @@ class DatasetViewExporterBase(object):
         )
         tmp_output_dir = self.get_tmp_output_dir()
         # export for each admin level
-        for level in self.levels:
-            logger.info(
-                f'Exporting {self.format} of level {level} from '
-                f'{self.dataset_view.name} - {self.privacy_level} '
-                f'({self.request.progress} %)'
-            )
-            self.do_export(level, tmp_output_dir)
-            self.update_progress()
+        self.export_levels(tmp_output_dir)
         # export readme
         if not self.is_temp:
             self.export_readme(tmp_output_dir)
@@ -370,6 +461,50 @@ class DatasetViewExporterBase(object):
         )
         logger.info(self.generated_files)
 
+    def export_level(self, level: int, tmp_output_dir: str):
+        logger.info(
+            f'Exporting {self.format} of level {level} from '
+            f'{self.dataset_view.name} - {self.privacy_level} '
+            f'({self.request.progress} %)'
+        )
+        self.do_export(level, tmp_output_dir)
+        self.update_progress()
+
+    def export_levels(self, tmp_output_dir: str):
+        """
+        Export admin levels concurrently, each level in worker thread.
+
+        The heavy work of a level is done by PostGIS and by the
+        ogr2ogr/mapshaper subprocess, so the levels run in parallel
+        while each worker uses its own db connection.
+        Generated files are sorted by level order afterwards.
+        """
+        concurrency = min(get_export_concurrency(), len(self.levels))
+        if concurrency <= 1:
+            for level in self.levels:
+                self.export_level(level, tmp_output_dir)
+            return
+
+        def export_level_in_thread(level):
+            try:
+                self.export_level(level, tmp_output_dir)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(export_level_in_thread, self.levels))
+        exported_names = [
+            self.get_exported_file_name(level) for level in self.levels
+        ]
+
+        def get_level_order(file_path):
+            file_name = os.path.splitext(os.path.basename(file_path))[0]
+            if file_name in exported_names:
+                return exported_names.index(file_name)
+            return len(exported_names)
+
+        self.generated_files.sort(key=get_level_order)
+
     def do_export(self, level: int,
                   tmp_output_dir: str):
         exported_name = self.get_exported_file_name(level)
@@ -434,6 +569,9 @@ class DatasetViewExporterBase(object):
         ).last()
         if max_level_entity:
             max_level = max_level_entity.level
+        use_attribute = is_entity_attribute_ready(
+            self.dataset_view.dataset.id)
+        attribute_keys = []
         related = ''
         for i in range(max_level):
             related = related + (
@@ -445,6 +583,8 @@ class DatasetViewExporterBase(object):
             values.append(f'{related}__unique_code_version')
             values.append(f'{related}__level')
             values.append(f'{related}__type__label')
+            if use_attribute:
+                attribute_keys.extend(values[-5:])
         # raw_sql to view to select id
         raw_sql = (
             'SELECT id from "{}"'
@@ -464,6 +604,10 @@ class DatasetViewExporterBase(object):
         # conditional join to entity id for each id
         for id in ids:
             field_key = f"id_{id['code__id']}"
+            values.append(f'{field_key}__value')
+            if use_attribute:
+                attribute_keys.append(f'{field_key}__value')
+                continue
             annotations = {
                 field_key: FilteredRelation(
                     'entity_ids',
@@ -471,7 +615,6 @@ class DatasetViewExporterBase(object):
                 )
             }
             entities = entities.annotate(**annotations)
-            values.append(f'{field_key}__value')
         names = EntityName.objects.filter(
             geographical_entity__dataset__id=self.dataset_view.dataset.id,
             geographical_entity__is_approved=True,
@@ -487,6 +630,12 @@ class DatasetViewExporterBase(object):
         if names_max_idx['idx__max'] is not None:
             for name_idx in range(names_max_idx['idx__max'] + 1):
                 field_key = f"name_{name_idx}"
+                values.append(f'{field_key}__name')
+                values.append(f'{field_key}__language__code')
+                values.append(f'{field_key}__label')
+                if use_attribute:
+                    attribute_keys.extend(values[-3:])
+                    continue
                 annotations = {
                     field_key: FilteredRelation(
                         'entity_names',
@@ -496,9 +645,11 @@ class DatasetViewExporterBase(object):
                     )
                 }
                 entities = entities.annotate(**annotations)
-                values.append(f'{field_key}__name')
-                values.append(f'{field_key}__language__code')
-                values.append(f'{field_key}__label')
+        if attribute_keys:
+            # read from single join to denormalized attributes
+            entities = entities.annotate(
+                **get_entity_attribute_expressions(attribute_keys)
+            )
         entities = entities.values(*values)
         return entities, max_level, ids, names_max_idx
 
@@ -1,9 +1,14 @@
 import os
 import json
+import time
+import uuid
+import shutil
+import hashlib
 import logging
 import subprocess
 from uuid import UUID
 from datetime import date, datetime
+from django.conf import settings
 
 from georepo.models import (
     ExportRequestStatusText,
@@ -13,17 +18,22 @@ from georepo.models import (
     GEOPACKAGE_EXPORT_TYPE
 )
 from georepo.utils.exporter_base import (
-    DatasetViewExporterBase
+    DatasetViewExporterBase,
+    write_feature_collection
 )
 from georepo.utils.fiona_utils import (
     open_collection_by_file
 )
+from georepo.utils.tile_configs import get_admin_level_tiling_config
 
 
 logger = logging.getLogger(__name__)
 # buffer the data before writing/flushing to file
 GEOJSON_RECORDS_BUFFER_TX = 250
 GEOJSON_RECORDS_BUFFER = 500
+# directory of cached intermediate geojson inside export output dir
+GEOJSON_CACHE_DIR = 'geojson_cache'
+GEOJSON_CACHE_MANIFEST = 'manifest.json'
 
 
 def get_geojson_feature_count(layer_file):
@@ -61,6 +71,106 @@ def json_serial(obj):
     raise TypeError("Type %s not serializable" % type(obj))
 
 
+def get_geojson_cache_root():
+    return os.path.join(settings.EXPORT_FOLDER_OUTPUT, GEOJSON_CACHE_DIR)
+
+
+def get_dir_size(dir_path):
+    total_size = 0
+    for entry in os.scandir(dir_path):
+        if entry.is_file():
+            total_size += entry.stat().st_size
+    return total_size
+
+
+def restore_geojson_cache(cache_key, output_dir):
+    """
+    Link cached geojson files into output directory.
+
+    :return: list of restored file paths or None if cache is missed
+    """
+    cache_dir = os.path.join(get_geojson_cache_root(), cache_key)
+    manifest_path = os.path.join(cache_dir, GEOJSON_CACHE_MANIFEST)
+    file_paths = []
+    try:
+        with open(manifest_path, 'r') as manifest_file:
+            file_names = json.load(manifest_file)
+        for file_name in file_names:
+            file_path = os.path.join(output_dir, file_name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            # files are only read by the conversion, so hard link is enough
+            os.link(os.path.join(cache_dir, file_name), file_path)
+            file_paths.append(file_path)
+        # mark as recently used
+        os.utime(cache_dir)
+    except (OSError, ValueError):
+        # remove the links, so the export does not write to cached files
+        for file_path in file_paths:
+            os.remove(file_path)
+        return None
+    return file_paths
+
+
+def store_geojson_cache(cache_key, file_paths):
+    """
+    Store generated geojson files in the cache.
+
+    Files are copied to a staging directory that is renamed to the
+    cache key, so readers never see incomplete entry.
+    """
+    max_size = settings.EXPORT_GEOJSON_CACHE_SIZE_MB * 1024 * 1024
+    cache_root = get_geojson_cache_root()
+    cache_dir = os.path.join(cache_root, cache_key)
+    if os.path.exists(cache_dir):
+        return
+    total_size = sum([os.path.getsize(path) for path in file_paths])
+    if total_size > max_size:
+        return
+    staging_dir = os.path.join(cache_root, f'temp_{uuid.uuid4().hex}')
+    try:
+        os.makedirs(staging_dir)
+        for file_path in file_paths:
+            shutil.copyfile(
+                file_path,
+                os.path.join(staging_dir, os.path.basename(file_path))
+            )
+        with open(os.path.join(staging_dir, GEOJSON_CACHE_MANIFEST),
+                  'w') as manifest_file:
+            json.dump(
+                [os.path.basename(path) for path in file_paths],
+                manifest_file
+            )
+        os.rename(staging_dir, cache_dir)
+    except OSError as ex:
+        # e.g. the same entry is stored by other export request
+        logger.error(f'Unable to store geojson cache {cache_key}: {ex}')
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return
+    evict_geojson_cache(max_size)
+
+
+def evict_geojson_cache(max_size):
+    """Remove least recently used entries until cache fits max_size."""
+    cache_root = get_geojson_cache_root()
+    entries = []
+    for entry in os.scandir(cache_root):
+        if not entry.is_dir() or entry.name.startswith('temp_'):
+            continue
+        try:
+            entries.append(
+                (entry.stat().st_mtime, get_dir_size(entry.path), entry.path)
+            )
+        except OSError:
+            continue
+    total_size = sum([size for _, size, _ in entries])
+    for _, size, entry_path in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(entry_path, ignore_errors=True)
+        total_size -= size
+
+
 class GeojsonViewExporter(DatasetViewExporterBase):
 
     def write_entities(self, entities, context,
@@ -71,35 +181,10 @@ class GeojsonViewExporter(DatasetViewExporterBase):
             tmp_output_dir,
             exported_name
         ) + suffix
-        with open(geojson_file_path, "w") as geojson_file:
-            geojson_file.write('{\n')
-            geojson_file.write('"type": "FeatureCollection",\n')
-            geojson_file.write('"features": [\n')
-            idx = 0
-            total_count = entities.count()
-            for entity in entities.iterator(chunk_size=1):
-                data = self.get_serializer()(
-                    entity,
-                    many=False,
-                    context=context
-                ).data
-                data['geometry'] = '{geom_placeholder}'
-                feature_str = json.dumps(data)
-                geom_data = entity['rhr_geom']
-                if geom_data is None:
-                    geom_data = '{"type": "Point", "coordinates": [0, 0]}'
-                feature_str = feature_str.replace(
-                    '"{geom_placeholder}"',
-                    geom_data
-                )
-                geojson_file.write(feature_str)
-                if idx == total_count - 1:
-                    geojson_file.write('\n')
-                else:
-                    geojson_file.write(',\n')
-                idx += 1
-            geojson_file.write(']\n')
-            geojson_file.write('}\n')
+        write_feature_collection(
+            geojson_file_path,
+            self.iter_features(entities, context)
+        )
         return geojson_file_path
 
 
@@ -137,7 +222,7 @@ class GeojsonBasedExporter(DatasetViewExporterBase):
             ExportRequestStatusText.PREPARING_GEOJSON
         )
         # extract the geojson first
-        self.geojson_exporter.run()
+        self.run_geojson_exporter()
         # validate geojson files are extracted successfully
         if len(self.geojson_exporter.generated_files) != len(self.levels):
             logger.error(
@@ -151,6 +236,74 @@ class GeojsonBasedExporter(DatasetViewExporterBase):
         )
         super().run()
 
+    def get_geojson_cache_key(self):
+        """
+        Return hash of the inputs of intermediate geojson files.
+
+        Dataset and view last update is changed when their entities
+        are updated, so stale geojson files are never reused.
+        Tolerance of each level is resolved from the current tiling
+        config, because the config can change without entity update.
+        """
+        serializer = self.get_serializer()
+        dataset = self.dataset_view.dataset
+        tolerances = None
+        if self.request.is_simplified_entities:
+            tolerances = [
+                [level, get_admin_level_tiling_config(
+                    level,
+                    self.tiling_configs,
+                    self.request.simplification_zoom_level
+                )[1]] for level in self.levels
+            ]
+        parts = [
+            str(self.dataset_view.uuid),
+            self.dataset_view.last_update.isoformat() if
+            self.dataset_view.last_update else '',
+            dataset.last_update.isoformat() if dataset.last_update else '',
+            self.privacy_level,
+            json.dumps(self.request.filters or {}, sort_keys=True),
+            self.request.is_simplified_entities,
+            self.request.simplification_zoom_level if
+            self.request.is_simplified_entities else None,
+            tolerances,
+            self.has_custom_tiling_config,
+            f'{serializer.__module__}.{serializer.__name__}'
+        ]
+        return hashlib.md5(
+            json.dumps(parts, default=str).encode('utf-8')
+        ).hexdigest()
+
+    def run_geojson_exporter(self):
+        """
+        Export intermediate geojson files or reuse them from the cache.
+
+        Identical geojson is exported for every format, so cached files
+        only need the format conversion.
+        """
+        if settings.EXPORT_GEOJSON_CACHE_SIZE_MB <= 0:
+            self.geojson_exporter.run()
+            return
+        start = time.time()
+        cache_key = self.get_geojson_cache_key()
+        file_paths = restore_geojson_cache(
+            cache_key,
+            self.geojson_exporter.get_tmp_output_dir()
+        )
+        if file_paths is not None:
+            logger.info(
+                f'Reuse cached geojson {cache_key} for {self.format} '
+                f'exporter in {time.time() - start}s'
+            )
+            self.geojson_exporter.generated_files = file_paths
+            for _ in self.levels:
+                self.update_progress()
+            return
+        self.geojson_exporter.run()
+        if len(self.geojson_exporter.generated_files) == len(self.levels):
+            store_geojson_cache(
+                cache_key, self.geojson_exporter.generated_files)
+
     def get_env(self) -> dict:
         """Get dictionary env variables for running ogr2ogr.
 
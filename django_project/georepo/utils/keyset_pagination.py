@@ -0,0 +1,94 @@
+import json
+import base64
+import binascii
+
+from django.db.models import Q
+
+
+# sort key of entity query, see do_generate_entity_query
+KEYSET_FIELDS = ['level', 'unique_code_version', 'unique_code', 'id']
+
+
+def encode_cursor(row: dict):
+    """Encode sort key of the last row into opaque cursor token."""
+    key = [row[field] for field in KEYSET_FIELDS]
+    return base64.urlsafe_b64encode(
+        json.dumps(key, separators=(',', ':')).encode('utf-8')
+    ).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode cursor token into sort key values.
+
+    :raises ValueError: if cursor is not valid
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        key = json.loads(
+            base64.urlsafe_b64decode(cursor + padding).decode('utf-8')
+        )
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    if not isinstance(key, list) or len(key) != len(KEYSET_FIELDS):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    level, version, unique_code, id = key
+    if (
+        not isinstance(level, int) or not isinstance(id, int) or
+        not isinstance(unique_code, str) or
+        not (version is None or isinstance(version, (int, float)))
+    ):
+        raise ValueError(f'Invalid cursor: {cursor}')
+    return key
+
+
+def get_keyset_filter(cursor: str):
+    """
+    Return filter of rows after the cursor in the entity sort order.
+
+    Null unique_code_version is sorted last in PostgreSQL ascending
+    order, so the rows with null version follow the versioned rows
+    of the same level.
+    """
+    level, version, unique_code, id = decode_cursor(cursor)
+    after_code = (
+        Q(unique_code__gt=unique_code) |
+        Q(unique_code=unique_code, id__gt=id)
+    )
+    if version is None:
+        after_level = Q(unique_code_version__isnull=True) & after_code
+    else:
+        after_level = (
+            Q(unique_code_version__gt=version) |
+            Q(unique_code_version__isnull=True) |
+            (Q(unique_code_version=version) & after_code)
+        )
+    return Q(level__gt=level) | (Q(level=level) & after_level)
+
+
+def paginate_by_keyset(entities, page_size: int, cursor: str = None):
+    """
+    Return rows of the page after the cursor and the next cursor.
+
+    The queryset must be a values queryset ordered by KEYSET_FIELDS.
+    One extra row is fetched to check whether there is next page,
+    so no COUNT query is needed.
+    :return: Tuple of (rows, next cursor or None)
+    """
+    if cursor:
+        entities = entities.filter(get_keyset_filter(cursor))
+    rows = list(entities[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1])
+    return rows, next_cursor
+
+
+def get_approximate_count(entities):
+    """Return row estimate of the query from PostgreSQL planner."""
+    plan = json.loads(entities.explain(format='json'))
+    if isinstance(plan, str):
+        # plan may be returned as json text by the driver
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
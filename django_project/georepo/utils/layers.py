@@ -1,3 +1,4 @@
+import os
 from typing import Tuple
 import time
 import json
@@ -5,7 +6,9 @@ import logging
 import traceback
 import csv
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.contrib.gis.geos import GEOSGeometry, Polygon, MultiPolygon
+from django.db import connection, transaction
 from django.db.models import IntegerField
 from django.core.files.base import ContentFile
 from django.db.models.functions import Cast
@@ -39,6 +42,59 @@ from georepo.utils.fiona_utils import (
 
 logger = logging.getLogger(__name__)
 
+# number of features sent in one COPY to EntityTemp
+ENTITY_TEMP_COPY_BATCH_SIZE = 1000
+ENTITY_TEMP_COPY_COLUMNS = [
+    'level',
+    'layer_file_id',
+    'upload_session_id',
+    'feature_index',
+    'entity_name',
+    'entity_id',
+    'parent_entity_id',
+    'ancestor_entity_id',
+    'geometry',
+    'metadata',
+    'is_parent_rematched',
+    'overlap_percentage'
+]
+ENTITY_TEMP_ANCESTOR_SQL = (
+    """
+    UPDATE dashboard_entitytemp et
+    SET ancestor_entity_id=parent.ancestor_entity_id
+    FROM (
+        SELECT DISTINCT ON (entity_id) entity_id, ancestor_entity_id
+        FROM dashboard_entitytemp
+        WHERE upload_session_id=%(upload_session_id)s
+            AND level=%(parent_level)s
+        ORDER BY entity_id, id
+    ) parent
+    WHERE et.upload_session_id=%(upload_session_id)s
+        AND et.layer_file_id=%(layer_file_id)s
+        AND et.level=%(level)s
+        AND et.parent_entity_id<>''
+        AND et.parent_entity_id=parent.entity_id
+    """
+)
+ENTITY_TEMP_PARENT_MISSING_SQL = (
+    """
+    SELECT et.feature_index, et.entity_name, et.entity_id,
+        et.parent_entity_id
+    FROM dashboard_entitytemp et
+    WHERE et.upload_session_id=%(upload_session_id)s
+        AND et.layer_file_id=%(layer_file_id)s
+        AND et.level=%(level)s
+        AND et.parent_entity_id<>''
+        AND NOT EXISTS (
+            SELECT 1 FROM dashboard_entitytemp parent
+            WHERE parent.upload_session_id=%(upload_session_id)s
+                AND parent.level=%(parent_level)s
+                AND parent.entity_id=et.parent_entity_id
+        )
+    ORDER BY et.feature_index
+    """
+)
+
 
 def get_attributes(collection):
     attrs = []
@@ -181,9 +237,43 @@ def build_geom_object(geom_str: str):
     return geom
 
 
-def read_temp_layer_file(upload_session: LayerUploadSession,
-                         layer_file: LayerFile):
-    """Read layer file and store to EntityTemp table."""
+def copy_text_value(value) -> str:
+    """Format value as a column of COPY text format."""
+    if value is None:
+        return '\\N'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').
+        replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_entity_temp_rows(cursor, rows):
+    """COPY batch of EntityTemp rows, see ENTITY_TEMP_COPY_COLUMNS."""
+    buffer = StringIO()
+    for row in rows:
+        buffer.write('\t'.join([copy_text_value(value) for value in row]))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(
+        f'COPY {EntityTemp._meta.db_table} '
+        f'({", ".join(ENTITY_TEMP_COPY_COLUMNS)}) FROM STDIN',
+        buffer
+    )
+
+
+def get_layer_preprocessing_concurrency():
+    """Return number of layer files that are read concurrently."""
+    return max(int(os.getenv('LAYER_PREPROCESSING_CONCURRENCY', '2')), 1)
+
+
+def stage_temp_layer_file(upload_session: LayerUploadSession,
+                          layer_file: LayerFile):
+    """
+    Stream features of layer file into EntityTemp table using COPY.
+
+    Ancestor of level > 1 is not resolved, so layer files of
+    different levels can be staged at the same time.
+    """
     level = int(layer_file.level)
     validation_result = {
         'level': level,
@@ -207,8 +297,10 @@ def read_temp_layer_file(upload_session: LayerUploadSession,
         [name_field['field'] for name_field in layer_file.name_fields
             if name_field['default']][0]
     )
+    geom_srid = EntityTemp._meta.get_field('geometry').srid
     with open_collection_by_file(layer_file.layer_file,
-                                 layer_file.layer_type) as features:
+                                 layer_file.layer_type) as features, \
+            transaction.atomic(), connection.cursor() as cursor:
         data = []
         for feature_idx, feature in enumerate(features):
             # default code
@@ -221,7 +313,7 @@ def read_temp_layer_file(upload_session: LayerUploadSession,
             )
             # parent code
             feature_parent_code = None
-            # find ancestor
+            # ancestor of level > 1 is resolved after all features are read
             ancestor = None
             if level > 0:
                 feature_parent_code = (
@@ -230,24 +322,8 @@ def read_temp_layer_file(upload_session: LayerUploadSession,
                     )
                 )
                 if feature_parent_code:
-                    parent = EntityTemp.objects.filter(
-                        upload_session=upload_session,
-                        level=level - 1,
-                        entity_id=feature_parent_code
-                    ).first()
                     if level == 1:
                         ancestor = feature_parent_code
-                    elif parent:
-                        ancestor = parent.ancestor_entity_id
-                    if parent is None and level > 1:
-                        # parent missing
-                        validation_result['parent_missing'].append({
-                            'level': level,
-                            'feature_id': feature_idx,
-                            'name': entity_name,
-                            'entity_id': entity_id,
-                            'parent': feature_parent_code
-                        })
                 elif level > 1:
                     # parent code missing error
                     validation_result['parent_code_missing'].append({
@@ -262,7 +338,9 @@ def read_temp_layer_file(upload_session: LayerUploadSession,
             geom_str = json.dumps(feature['geometry'])
             geom = build_geom_object(geom_str)
             if geom and isinstance(geom, Polygon):
-                geom = MultiPolygon([geom])
+                geom = MultiPolygon([geom], srid=geom.srid)
+            if geom is not None and geom.srid is None:
+                geom.srid = geom_srid
             # add metadata
             location_type_value = None
             if layer_file.location_type_field:
@@ -322,29 +400,76 @@ def read_temp_layer_file(upload_session: LayerUploadSession,
                 'boundary_type': layer_file.boundary_type,
                 'boundary_type_value': boundary_type_value
             }
-            data.append(
-                EntityTemp(
-                    level=level,
-                    layer_file=layer_file,
-                    upload_session=upload_session,
-                    feature_index=feature_idx,
-                    entity_name=entity_name,
-                    entity_id=entity_id,
-                    parent_entity_id=feature_parent_code,
-                    ancestor_entity_id=ancestor,
-                    geometry=geom,
-                    metadata=metadata
-                )
-            )
-            if len(data) == 5:
-                EntityTemp.objects.bulk_create(data, batch_size=5)
+            data.append([
+                level,
+                layer_file.id,
+                upload_session.id,
+                feature_idx,
+                entity_name,
+                entity_id,
+                feature_parent_code,
+                ancestor,
+                geom.hexewkb.decode() if geom is not None else None,
+                json.dumps(metadata),
+                'f',
+                0
+            ])
+            if len(data) >= ENTITY_TEMP_COPY_BATCH_SIZE:
+                copy_entity_temp_rows(cursor, data)
                 data.clear()
         if len(data) > 0:
-            EntityTemp.objects.bulk_create(data)
+            copy_entity_temp_rows(cursor, data)
         delete_tmp_shapefile(features.path)
         return validation_result
 
 
+def resolve_temp_layer_file_ancestor(upload_session: LayerUploadSession,
+                                     layer_file: LayerFile,
+                                     validation_result):
+    """
+    Resolve ancestor of staged features from the parent level.
+
+    Parent level must have been resolved before this level.
+    """
+    level = int(layer_file.level)
+    if level <= 1:
+        return validation_result
+    params = {
+        'upload_session_id': upload_session.id,
+        'layer_file_id': layer_file.id,
+        'level': level,
+        'parent_level': level - 1
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(ENTITY_TEMP_ANCESTOR_SQL, params)
+        cursor.execute(ENTITY_TEMP_PARENT_MISSING_SQL, params)
+        for row in cursor.fetchall():
+            validation_result['parent_missing'].append({
+                'level': level,
+                'feature_id': row[0],
+                'name': row[1],
+                'entity_id': row[2],
+                'parent': row[3]
+            })
+    return validation_result
+
+
+def read_temp_layer_file(upload_session: LayerUploadSession,
+                         layer_file: LayerFile):
+    """
+    Read layer file and store to EntityTemp table.
+
+    Features are streamed into EntityTemp using COPY, then the ancestor
+    of the features is resolved from the parent level with one UPDATE.
+    """
+    validation_result = stage_temp_layer_file(upload_session, layer_file)
+    return resolve_temp_layer_file_ancestor(
+        upload_session,
+        layer_file,
+        validation_result
+    )
+
+
 def read_layer_files_entity_temp(upload_session: LayerUploadSession):
     """Read all features from session to EntityTemp."""
     layer_files = LayerFile.objects.annotate(
@@ -352,8 +477,48 @@ def read_layer_files_entity_temp(upload_session: LayerUploadSession):
     ).filter(
         layer_upload_session=upload_session
     ).order_by('level_int')
+    layer_files = list(layer_files)
+    total_layers = len(layer_files)
+    validation_results = {}
+
+    def update_progress():
+        upload_session.progress = (
+            'Reading layer files '
+            f'({len(validation_results)}/{total_layers})'
+        )
+        upload_session.save(update_fields=['progress'])
+
+    def stage_layer_file_in_thread(layer_file):
+        try:
+            return stage_temp_layer_file(upload_session, layer_file)
+        finally:
+            connection.close()
+
+    update_progress()
+    concurrency = min(get_layer_preprocessing_concurrency(), total_layers)
+    if concurrency <= 1 or connection.in_atomic_block:
+        # other connections cannot see uncommitted data of the transaction
+        for layer_file in layer_files:
+            validation_results[layer_file.id] = stage_temp_layer_file(
+                upload_session, layer_file)
+            update_progress()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(
+                    stage_layer_file_in_thread, layer_file
+                ): layer_file for layer_file in layer_files
+            }
+            for future in as_completed(futures):
+                validation_results[futures[future].id] = future.result()
+                update_progress()
+    # ancestor is resolved from top level after all files are staged
     for layer_file in layer_files:
-        validation_result = read_temp_layer_file(upload_session, layer_file)
+        validation_result = resolve_temp_layer_file_ancestor(
+            upload_session,
+            layer_file,
+            validation_results[layer_file.id]
+        )
         if validation_result['level'] > 1:
             # save into upload session
             upload_session.validation_summaries[validation_result['level']] = (
@@ -1,13 +1,19 @@
+import io
 import os
 import subprocess
 import logging
 import json
 import fiona
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.db.models import F
 from django.db.models.expressions import RawSQL
-from django.contrib.gis.geos import GEOSGeometry, Polygon, MultiPolygon
 from django.contrib.gis.db.models.functions import AsGeoJSON
+from django.contrib.gis.geos import GEOSGeometry
 from django.core.files.temp import NamedTemporaryFile
 from django.conf import settings
 from georepo.models import (
@@ -20,15 +26,23 @@ from georepo.models import (
     ViewAdminLevelTilingConfig,
     DatasetView
 )
-from georepo.serializers.entity import SimpleGeographicalGeojsonSerializer
 from georepo.utils.custom_geo_functions import ForcePolygonCCW
 from georepo.utils.directory_helper import convert_size
+from georepo.utils.exporter_base import (
+    EXPORT_CURSOR_CHUNK_SIZE,
+    to_feature_json,
+    write_feature_collection
+)
 
 logger = logging.getLogger(__name__)
 
 SIMPLIFICATION_DOUGLAS_PEUCKER = 'dp'
 SIMPLIFICATION_VISVALINGAM = 'visvalingam'
 SIMPLIFICATION_VISVALINGAM_WEIGHTED = 'visvalingam_weighted'
+# number of simplified features sent in one COPY
+SIMPLIFICATION_COPY_BATCH_SIZE = 5000
+# bump when mapshaper commands change, so cached results are not reused
+SIMPLIFICATION_CACHE_VERSION = 1
 
 
 def filter_entities_view(view: DatasetView, level: int, entities):
@@ -74,48 +88,74 @@ def mapshaper_commands(input_path: str, output_path: str,
 
 
 def export_entities_to_geojson(file_path, queryset, level):
-    with open(file_path, "w") as geojson_file:
-        geojson_file.write('{\n')
-        geojson_file.write('"type": "FeatureCollection",\n')
-        geojson_file.write('"features": [\n')
-        idx = 0
-        total_count = queryset.count()
-        for entity in queryset.iterator(chunk_size=2):
-            data = SimpleGeographicalGeojsonSerializer(
-                entity,
-                many=False
-            ).data
-            data['geometry'] = '{geom_placeholder}'
-            feature_str = json.dumps(data)
-            feature_str = feature_str.replace(
-                '"{geom_placeholder}"',
-                entity['rhr_geom']
-            )
-            geojson_file.write(feature_str)
-            if idx == total_count - 1:
-                geojson_file.write('\n')
-            else:
-                geojson_file.write(',\n')
-            idx += 1
-        geojson_file.write(']\n')
-        geojson_file.write('}\n')
+    features = (
+        to_feature_json(
+            {
+                'id': entity['id'],
+                'type': 'Feature',
+                'properties': {}
+            },
+            entity['rhr_geom']
+        ) for entity in
+        queryset.iterator(chunk_size=EXPORT_CURSOR_CHUNK_SIZE)
+    )
+    write_feature_collection(file_path, features)
     file_size = os.path.getsize(file_path)
     logger.info(f'Entities level {level} are exported '
                 f'to {file_path} with size {convert_size(file_size)}')
 
 
-def do_simplify(input_file_path, tolerance, level):
-    if tolerance == 1:
-        return input_file_path
-    output_file = NamedTemporaryFile(
-        delete=False,
-        suffix='.geojson',
-        dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
-    )
-    commands = mapshaper_commands(
+def mapshaper_multi_commands(input_path: str,
+                             outputs: Dict[float, str],
+                             simplify_algo: str = (
+                                 SIMPLIFICATION_DOUGLAS_PEUCKER
+                             ),
+                             keep_shapes = True):
+    """
+    Generate single mapshaper command with output of each tolerance.
+
+    Mapshaper simplification is non-destructive, so every -simplify
+    is calculated from the input arcs that are only parsed once.
+    :param outputs: dict of tolerance: output path
+    """
+    command_list = [
+        'mapshaper-xl',
+        input_path
+    ]
+    for simplify, output_path in outputs.items():
+        command_list.extend(
+            mapshaper_commands(
+                input_path,
+                output_path,
+                simplify,
+                simplify_algo=simplify_algo,
+                keep_shapes=keep_shapes
+            )[2:]
+        )
+    return command_list
+
+
+def do_simplify(input_file_path, tolerances: List[float], level):
+    """
+    Simplify input file for all tolerances in one mapshaper run.
+
+    :return: dict of tolerance: output file path, tolerance 1 is skipped
+    """
+    outputs = {}
+    for tolerance in tolerances:
+        if tolerance == 1:
+            continue
+        output_file = NamedTemporaryFile(
+            delete=False,
+            suffix='.geojson',
+            dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
+        )
+        outputs[tolerance] = output_file.name
+    if not outputs:
+        return outputs
+    commands = mapshaper_multi_commands(
         input_file_path,
-        output_file.name,
-        tolerance
+        outputs
     )
     logger.info('Mapshaper commands:')
     logger.info(commands)
@@ -127,45 +167,108 @@ def do_simplify(input_file_path, tolerance, level):
         logger.error('Failed to simplify with commands')
         logger.error(commands)
         logger.error(error)
+        remove_simplification_files(outputs.values())
         raise RuntimeError(error)
-    file_size = os.path.getsize(output_file.name)
-    logger.info(f'Entities level {level} are simplified '
-                f'to {output_file.name} with size {convert_size(file_size)}')
-    return output_file.name
+    for tolerance, output_file_path in outputs.items():
+        file_size = os.path.getsize(output_file_path)
+        logger.info(f'Entities level {level} are simplified with '
+                    f'{tolerance} to {output_file_path} '
+                    f'with size {convert_size(file_size)}')
+    return outputs
 
 
-def read_output_simplification(output_file_path, tolerance, view=None):
-    """Read output simplification geojson and insert into Temp table"""
-    data = []
+def remove_simplification_files(file_paths):
+    for file_path in file_paths:
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def iter_simplification_rows(output_file_path):
+    """
+    Yield (entity_id, WKT geometry) from mapshaper output.
+
+    Features without geometry, numeric id or with invalid geometry are
+    skipped, so one bad feature does not fail the whole insert.
+    """
     with fiona.open(output_file_path, encoding='utf-8') as collection:
         for feature in collection:
-            entity_id = feature['id']
-            entity = GeographicalEntity.objects.filter(
-                id=entity_id
-            ).first()
-            if entity is None:
+            entity_id = str(feature['id'])
+            if not entity_id.isdigit() or not feature['geometry']:
                 continue
-            geom_str = json.dumps(feature['geometry'])
-            geom = None
             try:
-                geom = GEOSGeometry(geom_str)
+                geom = GEOSGeometry(json.dumps(feature['geometry']))
             except Exception:
-                pass
-            if geom is None:
+                logger.warning(
+                    f'Skipped simplified feature {entity_id} '
+                    f'with invalid geometry from {output_file_path}'
+                )
                 continue
-            elif isinstance(geom, Polygon):
-                geom = MultiPolygon([geom])
-            data.append(EntitySimplified(
-                geographical_entity=entity,
-                simplify_tolerance=tolerance,
-                simplified_geometry=geom,
-                dataset_view=view
-            ))
-            if len(data) == 5:
-                EntitySimplified.objects.bulk_create(data, batch_size=5)
-                data.clear()
-        if len(data) > 0:
-            EntitySimplified.objects.bulk_create(data)
+            yield entity_id, geom.wkt
+
+
+def copy_simplification_rows(cursor, rows):
+    """COPY batch of (entity_id, geometry) into staging table."""
+    buffer = io.StringIO()
+    for entity_id, geom_str in rows:
+        geom_str = geom_str.replace('\\', '\\\\')
+        buffer.write(f'{entity_id}\t{geom_str}\n')
+    buffer.seek(0)
+    cursor.copy_expert(
+        'COPY temp_entity_simplified (entity_id, geom) FROM STDIN',
+        buffer
+    )
+
+
+def read_output_simplification(output_file_path, tolerance, view=None):
+    """
+    Read output simplification geojson and insert into EntitySimplified.
+
+    Features are streamed into a temporary staging table using COPY,
+    then inserted with a single INSERT SELECT that is joined to
+    the existing entities, so unknown ids are skipped set-wise.
+    :return: number of inserted simplified entities
+    """
+    staged_count = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        # staging table may exist when called inside outer transaction
+        cursor.execute('DROP TABLE IF EXISTS temp_entity_simplified')
+        cursor.execute(
+            'CREATE TEMP TABLE temp_entity_simplified '
+            '(entity_id integer, geom text) ON COMMIT DROP'
+        )
+        rows = []
+        for row in iter_simplification_rows(output_file_path):
+            rows.append(row)
+            if len(rows) >= SIMPLIFICATION_COPY_BATCH_SIZE:
+                copy_simplification_rows(cursor, rows)
+                staged_count += len(rows)
+                rows.clear()
+        if rows:
+            copy_simplification_rows(cursor, rows)
+            staged_count += len(rows)
+        cursor.execute(
+            'INSERT INTO georepo_entitysimplified '
+            '(geographical_entity_id, simplify_tolerance, '
+            'simplified_geometry, dataset_view_id) '
+            'SELECT t.entity_id, %s, '
+            '  CASE WHEN GeometryType(t.g)=\'POLYGON\' '
+            '  THEN ST_Multi(t.g) ELSE t.g END, %s '
+            'FROM ('
+            '  SELECT entity_id, '
+            '    ST_GeomFromText(geom, 4326) AS g '
+            '  FROM temp_entity_simplified'
+            ') AS t '
+            'INNER JOIN georepo_geographicalentity ge ON '
+            '  ge.id=t.entity_id',
+            [tolerance, view.id if view else None]
+        )
+        inserted_count = cursor.rowcount
+    if inserted_count < staged_count:
+        logger.warning(
+            f'Skipped {staged_count - inserted_count} simplified features '
+            f'with unknown entity id from {output_file_path}'
+        )
+    return inserted_count
 
 
 def get_dataset_simplification(dataset: Dataset):
@@ -234,6 +337,237 @@ def copy_entities(dataset: Dataset, level: int, view: DatasetView = None):
         EntitySimplified.objects.bulk_create(data)
 
 
+def get_simplification_concurrency():
+    """Return number of levels that are simplified concurrently."""
+    return max(int(os.getenv('SIMPLIFICATION_CONCURRENCY', '2')), 1)
+
+
+def clear_simplified_entities(dataset: Dataset, level: int,
+                              view: DatasetView = None,
+                              keep_tolerances: List[float] = None):
+    """Remove existing simplified entities of dataset or view level."""
+    if view:
+        existing_entities = EntitySimplified.objects.filter(
+            geographical_entity__level=level,
+            dataset_view=view
+        )
+    else:
+        existing_entities = EntitySimplified.objects.filter(
+            geographical_entity__dataset=dataset,
+            geographical_entity__level=level
+        )
+    if keep_tolerances:
+        existing_entities = existing_entities.exclude(
+            simplify_tolerance__in=keep_tolerances
+        )
+    existing_entities._raw_delete(existing_entities.db)
+
+
+def get_level_fingerprint(dataset: Dataset, level: int,
+                          view: DatasetView = None):
+    """
+    Return hash of entity ids and geometries of simplification input.
+
+    Mapshaper simplification is topology-aware and the tolerance is
+    a percentage of all vertices in the level, so the whole level is
+    a single topology group: any changed geometry invalidates it.
+    """
+    view_cond = ''
+    if view:
+        view_cond = (
+            f'AND ge.id IN (SELECT id FROM "{str(view.uuid)}" '
+            f'WHERE level={level})'
+        )
+    sql = (
+        'SELECT md5(string_agg('
+        "  ge.id::text || ':' || COALESCE(md5(ST_AsBinary(ge.geometry)), ''),"
+        "  ',' ORDER BY ge.id"
+        ')) FROM georepo_geographicalentity ge '
+        'WHERE ge.dataset_id=%s AND ge.level=%s '
+        f'{view_cond}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [dataset.id, level])
+        fingerprint = cursor.fetchone()[0]
+    return f'{SIMPLIFICATION_CACHE_VERSION}-{fingerprint}'
+
+
+def get_simplification_cache_key(dataset: Dataset, level: int,
+                                 tolerance: float,
+                                 view: DatasetView = None):
+    # uuid is not used, saving dataset/view clears the keys with its uuid
+    if view:
+        return f'simplification-view-{view.id}-{level}-{tolerance}'
+    return f'simplification-dataset-{dataset.id}-{level}-{tolerance}'
+
+
+def is_simplification_cached(dataset: Dataset, level: int,
+                             tolerance: float, fingerprint: str,
+                             entity_count: int,
+                             view: DatasetView = None):
+    """
+    Check whether simplified entities of tolerance are still valid.
+
+    Stored fingerprint must match the current input and all entities
+    must have the simplified geometry.
+    """
+    cache_key = get_simplification_cache_key(
+        dataset, level, tolerance, view)
+    if cache.get(cache_key) != fingerprint:
+        return False
+    simplified_count = EntitySimplified.objects.filter(
+        geographical_entity__dataset=dataset,
+        geographical_entity__level=level,
+        simplify_tolerance=tolerance,
+        dataset_view=view
+    ).count()
+    return simplified_count == entity_count
+
+
+def get_level_entities(dataset: Dataset, level: int,
+                       view: DatasetView = None):
+    entities = GeographicalEntity.objects.filter(
+        dataset=dataset,
+        level=level
+    )
+    if view:
+        entities = filter_entities_view(view, level, entities)
+    return entities
+
+
+def simplify_level(dataset: Dataset, level: int, values: List[float],
+                   view: DatasetView = None, on_progress=None):
+    """
+    Simplify entities of a level for all tolerances.
+
+    Entities are exported once and all tolerances are produced by
+    single mapshaper run, then each output is loaded into
+    EntitySimplified. Tolerances whose input has not changed since
+    the last simplification are skipped.
+    :param on_progress: callback that is called after each tolerance
+    :return: number of simplified tolerances
+    """
+    name = f'view {view}' if view else f'dataset {dataset}'
+    entities = get_level_entities(dataset, level, view)
+    total_entities = entities.count()
+    if total_entities == 0:
+        clear_simplified_entities(dataset, level, view)
+        return 0
+    fingerprint = get_level_fingerprint(dataset, level, view)
+    cached_values = [
+        simplify_factor for simplify_factor in values if
+        is_simplification_cached(
+            dataset, level, simplify_factor, fingerprint,
+            total_entities, view
+        )
+    ]
+    values = [
+        simplify_factor for simplify_factor in values if
+        simplify_factor not in cached_values
+    ]
+    clear_simplified_entities(
+        dataset, level, view, keep_tolerances=cached_values)
+    cache.delete_many([
+        get_simplification_cache_key(dataset, level, simplify_factor, view)
+        for simplify_factor in values
+    ])
+    processed_count = 0
+    for simplify_factor in cached_values:
+        logger.info(f'Simplification for {name} level {level} simplify '
+                    f'{simplify_factor} is unchanged')
+        processed_count += 1
+        if on_progress:
+            on_progress()
+    if not values:
+        return processed_count
+    entities = entities.annotate(
+        rhr_geom=AsGeoJSON(
+            ForcePolygonCCW(F('geometry')),
+            precision=6
+        )
+    )
+    entities = entities.values('id', 'rhr_geom')
+    logger.info(f'Simplification for {name} level {level} '
+                f'total entities: {total_entities}')
+    input_file = None
+    output_files = {}
+    try:
+        if any([simplify_factor != 1 for simplify_factor in values]):
+            # export entities to geojson file
+            input_file = NamedTemporaryFile(
+                delete=False,
+                suffix='.geojson',
+                dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
+            )
+            export_entities_to_geojson(input_file.name, entities, level)
+            output_files = do_simplify(input_file.name, values, level)
+        for simplify_factor in values:
+            start = time.time()
+            if simplify_factor == 1:
+                # skip simplification and just copy over the entities
+                copy_entities(dataset, level, view)
+            else:
+                read_output_simplification(
+                    output_files[simplify_factor],
+                    simplify_factor,
+                    view
+                )
+            cache.set(
+                get_simplification_cache_key(
+                    dataset, level, simplify_factor, view),
+                fingerprint,
+                timeout=None
+            )
+            end = time.time()
+            logger.info(f'Simplification for {name} '
+                        f'level {level} simplify '
+                        f'{simplify_factor} '
+                        f'finished: {end-start}s')
+            processed_count += 1
+            if on_progress:
+                on_progress()
+    finally:
+        remove_simplification_files(
+            [input_file.name if input_file else None] +
+            list(output_files.values())
+        )
+    return processed_count
+
+
+def simplify_levels(dataset: Dataset, tolerances: Dict[int, List[float]],
+                    view: DatasetView = None, on_progress=None):
+    """
+    Simplify levels concurrently, each level in its own worker thread.
+
+    Each worker runs mapshaper subprocess and loads the outputs
+    using its own db connection.
+    :return: number of simplified tolerances from all levels
+    """
+    name = f'view {view}' if view else f'dataset {dataset}'
+
+    def run_level(level):
+        try:
+            return simplify_level(
+                dataset, level, tolerances[level], view, on_progress)
+        except Exception as ex:
+            logger.error(f'Failed to simplify {name} level {level}!')
+            logger.error(ex)
+            return 0
+
+    def run_level_in_thread(level):
+        try:
+            return run_level(level)
+        finally:
+            connection.close()
+
+    levels = list(tolerances.keys())
+    concurrency = min(get_simplification_concurrency(), len(levels))
+    if concurrency <= 1:
+        return sum([run_level(level) for level in levels])
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return sum(executor.map(run_level_in_thread, levels))
+
+
 def simplify_for_dataset(
     dataset: Dataset,
     **kwargs
@@ -252,118 +586,41 @@ def simplify_for_dataset(
     tolerances = get_dataset_simplification(dataset)
     logger.info(tolerances)
     total_simplification = 0
+    level_tolerances = {}
     for level, values in tolerances.items():
-        entities = GeographicalEntity.objects.filter(
-            dataset=dataset,
-            level=level
-        )
-        if not entities.exists():
+        if not get_level_entities(dataset, level).exists():
+            clear_simplified_entities(dataset, level)
             continue
         total_simplification += len(values)
+        level_tolerances[level] = values
     processed_count = 0
     dataset.simplification_progress = '0%'
     dataset.simplification_progress_num = 0
     dataset.save(update_fields=['simplification_progress',
                                 'simplification_progress_num'])
-    for level, values in tolerances.items():
-        input_file = None
-        try:
-            # clear all existing simplified entities
-            existing_entities = EntitySimplified.objects.filter(
-                geographical_entity__dataset=dataset,
-                geographical_entity__level=level
-            )
-            existing_entities._raw_delete(existing_entities.db)
-            entities = GeographicalEntity.objects.filter(
-                dataset=dataset,
-                level=level
+    progress_lock = threading.Lock()
+
+    def on_progress():
+        nonlocal processed_count
+        with progress_lock:
+            processed_count += 1
+            progress = (
+                (100 * processed_count) / total_simplification
             )
-            entities = entities.annotate(
-                rhr_geom=AsGeoJSON(
-                    ForcePolygonCCW(F('geometry')),
-                    precision=6
-                )
+            dataset.simplification_progress = f'{progress:.2f}%'
+            dataset.simplification_progress_num = progress
+            dataset.save(
+                update_fields=['simplification_progress',
+                               'simplification_progress_num']
             )
-            entities = entities.values('id', 'rhr_geom')
-            if entities.count() == 0:
-                continue
-            logger.info(f'Simplification for dataset {dataset} level {level} '
-                        f'total entities: {entities.count()}')
-            # export entities to geojson file
-            input_file = NamedTemporaryFile(
-                delete=False,
-                suffix='.geojson',
-                dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
-            )
-            if len(values) == 1 and values[0] == 1:
-                # skip simplification and just copy over the entities
-                copy_entities(dataset, level)
-                processed_count += 1
-                progress = (
-                    (100 * processed_count) / total_simplification
-                )
-                dataset.simplification_progress = f'{progress:.2f}%'
-                dataset.simplification_progress_num = progress
-                dataset.save(
-                    update_fields=['simplification_progress',
-                                   'simplification_progress_num']
-                )
-                logger.info(f'Simplification for dataset {dataset} '
-                            f'{progress:.2f}%')
-            else:
-                export_entities_to_geojson(input_file.name, entities, level)
-                for simplify_factor in values:
-                    start = time.time()
-                    output_file_path = ''
-                    try:
-                        if simplify_factor == 1:
-                            copy_entities(dataset, level)
-                        else:
-                            output_file_path = do_simplify(
-                                input_file.name,
-                                simplify_factor,
-                                level
-                            )
-                            read_output_simplification(
-                                output_file_path,
-                                simplify_factor
-                            )
-                        end = time.time()
-                        logger.info(f'Simplification for dataset {dataset} '
-                                    f'level {level} simplify '
-                                    f'{simplify_factor} '
-                                    f'finished: {end-start}s')
-                        processed_count += 1
-                        progress = (
-                            (100 * processed_count) / total_simplification
-                        )
-                        dataset.simplification_progress = f'{progress:.2f}%'
-                        dataset.simplification_progress_num = progress
-                        dataset.save(
-                            update_fields=['simplification_progress',
-                                           'simplification_progress_num']
-                        )
-                        logger.info(f'Simplification for dataset {dataset} '
-                                    f'{progress:.2f}%')
-                    except Exception as ex:
-                        logger.error(
-                            f'Failed to simplify dataset {dataset} '
-                            f'level {level} factor {simplify_factor}!'
-                        )
-                        logger.error(ex)
-                        raise ex
-                    finally:
-                        if (
-                            output_file_path != input_file.name and
-                            os.path.exists(output_file_path)
-                        ):
-                            os.remove(output_file_path)
-        except Exception:
-            logger.error(f'Failed to simplify dataset {dataset} '
-                         f'level {level}!')
-        finally:
-            if input_file and os.path.exists(input_file.name):
-                os.remove(input_file.name)
+            logger.info(f'Simplification for dataset {dataset} '
+                        f'{progress:.2f}%')
+
+    processed_count = simplify_levels(
+        dataset,
+        level_tolerances,
+        on_progress=on_progress
+    )
     if processed_count == total_simplification:
         # success
         dataset.simplification_progress = (
@@ -422,121 +679,42 @@ def simplify_for_dataset_view(
                              'simplification_progress_num'])
     logger.info(view.simplification_progress)
     total_simplification = 0
+    level_tolerances = {}
     for level, values in tolerances.items():
-        entities = GeographicalEntity.objects.filter(
-            dataset=view.dataset,
-            level=level
-        )
-        entities = filter_entities_view(view, level, entities)
-        if not entities.exists():
+        if not get_level_entities(view.dataset, level, view).exists():
+            clear_simplified_entities(view.dataset, level, view)
             continue
         total_simplification += len(values)
+        level_tolerances[level] = values
     processed_count = 0
     view.simplification_progress = '0%'
     view.simplification_progress_num = 0
     view.save(update_fields=['simplification_progress',
                              'simplification_progress_num'])
-    for level, values in tolerances.items():
-        input_file = None
-        try:
-            # clear all existing simplified entities
-            existing_entities = EntitySimplified.objects.filter(
-                geographical_entity__level=level,
-                dataset_view=view
-            )
-            existing_entities._raw_delete(existing_entities.db)
-            entities = GeographicalEntity.objects.filter(
-                dataset=view.dataset,
-                level=level
-            )
-            entities = filter_entities_view(view, level, entities)
-            entities = entities.annotate(
-                rhr_geom=AsGeoJSON(
-                    ForcePolygonCCW(F('geometry')),
-                    precision=6
-                )
+    progress_lock = threading.Lock()
+
+    def on_progress():
+        nonlocal processed_count
+        with progress_lock:
+            processed_count += 1
+            progress = (
+                (100 * processed_count) / total_simplification
             )
-            entities = entities.values('id', 'rhr_geom')
-            if entities.count() == 0:
-                continue
-            logger.info(f'Simplification for view {view} level {level} '
-                        f'total entities: {entities.count()}')
-            # export entities to geojson file
-            input_file = NamedTemporaryFile(
-                delete=False,
-                suffix='.geojson',
-                dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
+            view.simplification_progress = f'{progress:.2f}%'
+            view.simplification_progress_num = progress
+            view.save(
+                update_fields=['simplification_progress',
+                               'simplification_progress_num']
             )
-            if len(values) == 1 and values[0] == 1:
-                # skip simplification and just copy over the entities
-                copy_entities(view.dataset, level, view)
-                processed_count += 1
-                progress = (
-                    (100 * processed_count) / total_simplification
-                )
-                view.simplification_progress = f'{progress:.2f}%'
-                view.simplification_progress_num = progress
-                view.save(
-                    update_fields=['simplification_progress',
-                                   'simplification_progress_num']
-                )
-                logger.info(f'Simplification for view {view} '
-                            f'{progress:.2f}%')
-            else:
-                export_entities_to_geojson(input_file.name, entities, level)
-                for simplify_factor in values:
-                    start = time.time()
-                    output_file_path = ''
-                    try:
-                        if simplify_factor == 1:
-                            copy_entities(view.dataset, level, view)
-                        else:
-                            output_file_path = do_simplify(
-                                input_file.name,
-                                simplify_factor,
-                                level
-                            )
-                            read_output_simplification(
-                                output_file_path,
-                                simplify_factor,
-                                view
-                            )
-                        end = time.time()
-                        logger.info(f'Simplification for view {view} '
-                                    f'level {level} simplify '
-                                    f'{simplify_factor} '
-                                    f'finished: {end-start}s')
-                        processed_count += 1
-                        progress = (
-                            (100 * processed_count) / total_simplification
-                        )
-                        view.simplification_progress = f'{progress:.2f}%'
-                        view.simplification_progress_num = progress
-                        view.save(
-                            update_fields=['simplification_progress',
-                                           'simplification_progress_num']
-                        )
-                        logger.info(f'Simplification for view {view} '
-                                    f'{progress:.2f}%')
-                    except Exception as ex:
-                        logger.error(
-                            f'Failed to simplify view {view} '
-                            f'level {level} at factor {simplify_factor}!'
-                        )
-                        logger.error(ex)
-                        raise ex
-                    finally:
-                        if (
-                            output_file_path != input_file.name and
-                            os.path.exists(output_file_path)
-                        ):
-                            os.remove(output_file_path)
-        except Exception:
-            logger.error(f'Failed to simplify view {view} '
-                         f'level {level}!')
-        finally:
-            if input_file and os.path.exists(input_file.name):
-                os.remove(input_file.name)
+            logger.info(f'Simplification for view {view} '
+                        f'{progress:.2f}%')
+
+    processed_count = simplify_levels(
+        view.dataset,
+        level_tolerances,
+        view=view,
+        on_progress=on_progress
+    )
     if processed_count == total_simplification:
         # success
         view.simplification_progress = (
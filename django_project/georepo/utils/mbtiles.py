@@ -0,0 +1,332 @@
+import os
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+MBTILES_STORAGE = 'mbtiles'
+# seconds to wait when the archive is locked by other writer
+MBTILES_BUSY_TIMEOUT = 30
+# max number of open read-only archives per thread
+MBTILES_MAX_READERS = 16
+# max number of open archives for writing live tiles per thread
+MBTILES_MAX_WRITERS = 4
+# number of tiles inserted per executemany call
+MBTILES_BATCH_SIZE = 1000
+
+_readers = threading.local()
+_writers = threading.local()
+
+
+def is_mbtiles_storage():
+    """
+    Check whether vector tiles are stored as MBTiles archive.
+
+    The archive storage is only available for local file system,
+    when using Azure the tiles are stored in blob directories.
+    """
+    return (
+        settings.VECTOR_TILE_STORAGE == MBTILES_STORAGE and
+        not settings.USE_AZURE
+    )
+
+
+def get_mbtiles_path(resource_id: str, is_temp=False):
+    """Return path of MBTiles archive of view resource."""
+    file_name = (
+        f'temp_{resource_id}.mbtiles' if is_temp else
+        f'{resource_id}.mbtiles'
+    )
+    return os.path.join(settings.LAYER_TILES_PATH, file_name)
+
+
+def to_tms_row(z: int, y: int):
+    """Convert XYZ tile row to TMS row that is used in MBTiles."""
+    return (2 ** z - 1) - y
+
+
+def open_mbtiles(path: str, resource_id: str = None):
+    """Open MBTiles archive for writing, create schema if needed."""
+    conn = sqlite3.connect(path, timeout=MBTILES_BUSY_TIMEOUT)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS metadata (name text, value text)'
+    )
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS tiles (zoom_level integer, '
+        'tile_column integer, tile_row integer, tile_data blob)'
+    )
+    conn.execute(
+        'CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles '
+        '(zoom_level, tile_column, tile_row)'
+    )
+    has_metadata = conn.execute(
+        'SELECT 1 FROM metadata LIMIT 1'
+    ).fetchone()
+    if not has_metadata:
+        conn.executemany(
+            'INSERT INTO metadata (name, value) VALUES (?, ?)',
+            [
+                ('name', resource_id or os.path.basename(path)),
+                ('format', 'pbf'),
+                ('compression', 'gzip')
+            ]
+        )
+    conn.commit()
+    return conn
+
+
+def write_tile(path: str, z: int, x: int, y: int, data: bytes):
+    """
+    Write gzipped tile to MBTiles archive.
+
+    The connection is kept per thread, so the schema is only checked
+    when the archive is opened.
+    """
+    conn = _get_writer(path)
+    with conn:
+        conn.execute(
+            'INSERT OR REPLACE INTO tiles (zoom_level, tile_column, '
+            'tile_row, tile_data) VALUES (?, ?, ?, ?)',
+            (z, x, to_tms_row(z, y), sqlite3.Binary(data))
+        )
+
+
+def write_tiles(path: str, tiles):
+    """
+    Write batch of gzipped tiles to MBTiles archive in one transaction.
+
+    :param tiles: list of (z, x, y, data)
+    """
+    conn = open_mbtiles(path)
+    try:
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO tiles (zoom_level, tile_column, '
+                'tile_row, tile_data) VALUES (?, ?, ?, ?)',
+                [
+                    (z, x, to_tms_row(z, y), sqlite3.Binary(data))
+                    for z, x, y, data in tiles
+                ]
+            )
+    finally:
+        conn.close()
+
+
+def delete_tiles(path: str, tiles):
+    """
+    Delete batch of tiles from MBTiles archive.
+
+    :param tiles: list of (z, x, y)
+    """
+    if not os.path.exists(path):
+        return
+    conn = open_mbtiles(path)
+    try:
+        with conn:
+            conn.executemany(
+                'DELETE FROM tiles WHERE zoom_level=? AND tile_column=? '
+                'AND tile_row=?',
+                [(z, x, to_tms_row(z, y)) for z, x, y in tiles]
+            )
+    finally:
+        conn.close()
+
+
+def _get_cached_connection(local, path: str, inode: int, connect,
+                           max_connections: int):
+    """
+    Return connection to the archive that is cached in the thread.
+
+    The archive is replaced atomically on regeneration, so the
+    connection is reopened when the inode of the path changes.
+    """
+    connections = getattr(local, 'connections', None)
+    if connections is None:
+        connections = OrderedDict()
+        local.connections = connections
+    cached = connections.get(path)
+    if cached and cached[0] == inode:
+        connections.move_to_end(path)
+        return cached[1]
+    if cached:
+        cached[1].close()
+    conn = connect()
+    connections[path] = (inode, conn)
+    while len(connections) > max_connections:
+        _, (_, evicted) = connections.popitem(last=False)
+        evicted.close()
+    return conn
+
+
+def _get_reader(path: str):
+    """Return cached read-only connection to the archive."""
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+    return _get_cached_connection(
+        _readers,
+        path,
+        inode,
+        lambda: sqlite3.connect(
+            f'file:{path}?mode=ro', uri=True, timeout=MBTILES_BUSY_TIMEOUT
+        ),
+        MBTILES_MAX_READERS
+    )
+
+
+def _get_writer(path: str):
+    """Return cached connection to write to the archive."""
+    if not os.path.exists(path):
+        # create the archive with schema
+        open_mbtiles(path).close()
+    return _get_cached_connection(
+        _writers,
+        path,
+        os.stat(path).st_ino,
+        lambda: sqlite3.connect(path, timeout=MBTILES_BUSY_TIMEOUT),
+        MBTILES_MAX_WRITERS
+    )
+
+
+def read_tile(path: str, z: int, x: int, y: int):
+    """
+    Read gzipped tile from MBTiles archive.
+
+    :return: tile bytes or None if tile does not exist
+    """
+    conn = _get_reader(path)
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            'SELECT tile_data FROM tiles WHERE zoom_level=? AND '
+            'tile_column=? AND tile_row=?',
+            (z, x, to_tms_row(z, y))
+        ).fetchone()
+    except sqlite3.OperationalError as ex:
+        # archive may be created without schema yet
+        logger.error(f'Unable to read tile from {path}: {ex}')
+        return None
+    return bytes(row[0]) if row else None
+
+
+def import_zoom_directory(path: str, zoom_dir: str, zoom: int):
+    """
+    Pack z/x/y tile files of a zoom level into MBTiles archive.
+
+    :param path: archive path
+    :param zoom_dir: directory of the zoom level, e.g. tegola output
+    :param zoom: zoom level
+    :return: Tuple of (total size, tile count)
+    """
+    total_size = 0
+    tile_count = 0
+    if not os.path.exists(zoom_dir):
+        return total_size, tile_count
+    conn = open_mbtiles(path)
+    try:
+        with conn:
+            conn.execute('DELETE FROM tiles WHERE zoom_level=?', (zoom,))
+            batch = []
+            for x_dir in os.scandir(zoom_dir):
+                if not x_dir.is_dir():
+                    continue
+                for y_file in os.scandir(x_dir.path):
+                    if not y_file.is_file():
+                        continue
+                    with open(y_file.path, 'rb') as f:
+                        data = f.read()
+                    total_size += len(data)
+                    tile_count += 1
+                    batch.append((
+                        zoom,
+                        int(x_dir.name),
+                        to_tms_row(zoom, int(y_file.name)),
+                        sqlite3.Binary(data)
+                    ))
+                    if len(batch) >= MBTILES_BATCH_SIZE:
+                        conn.executemany(
+                            'INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                            batch
+                        )
+                        batch = []
+            if batch:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)',
+                    batch
+                )
+    finally:
+        conn.close()
+    return total_size, tile_count
+
+
+def get_zoom_info(path: str, zoom: int):
+    """Return Tuple of (total size, tile count) of zoom in archive."""
+    if not os.path.exists(path):
+        return 0, 0
+    conn = open_mbtiles(path)
+    try:
+        row = conn.execute(
+            'SELECT COALESCE(SUM(LENGTH(tile_data)), 0), COUNT(*) '
+            'FROM tiles WHERE zoom_level=?',
+            (zoom,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0], row[1]
+
+
+def publish_zoom(resource_id: str, zoom: int):
+    """
+    Copy zoom level from temp archive to live archive.
+
+    Zoom level 0 marks new generation of the tiles: a new live archive
+    is built and swapped atomically with the existing one.
+    Other zoom levels are replaced in a single transaction.
+    """
+    temp_path = get_mbtiles_path(resource_id, is_temp=True)
+    live_path = get_mbtiles_path(resource_id)
+    target_path = live_path
+    if zoom == 0:
+        target_path = f'{live_path}.swap'
+        if os.path.exists(target_path):
+            os.remove(target_path)
+    # ensure temp archive has the schema, e.g. when all tiles are empty
+    open_mbtiles(temp_path, resource_id).close()
+    conn = open_mbtiles(target_path, resource_id)
+    try:
+        conn.execute('ATTACH DATABASE ? AS temp_tiles', (temp_path,))
+        with conn:
+            conn.execute('DELETE FROM tiles WHERE zoom_level=?', (zoom,))
+            conn.execute(
+                'INSERT INTO tiles SELECT * FROM temp_tiles.tiles '
+                'WHERE zoom_level=?',
+                (zoom,)
+            )
+        conn.execute('DETACH DATABASE temp_tiles')
+    finally:
+        conn.close()
+    if target_path != live_path:
+        os.replace(target_path, live_path)
+
+
+def remove_mbtiles(resource_id: str, is_temp=False):
+    """Remove MBTiles archive of view resource."""
+    path = get_mbtiles_path(resource_id, is_temp=is_temp)
+    for file_path in [path, f'{path}.swap', f'{path}-journal']:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def get_mbtiles_size(resource_id: str):
+    """Return size of live MBTiles archive of view resource."""
+    path = get_mbtiles_path(resource_id)
+    if not os.path.exists(path):
+        return 0
+    return os.path.getsize(path)
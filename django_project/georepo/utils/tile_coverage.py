@@ -0,0 +1,272 @@
+import time
+import logging
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+from django.db import connection
+
+from georepo.models.dataset_view import DatasetViewResource
+from georepo.utils.tile_seeder import lonlat_to_tile
+
+
+logger = logging.getLogger(__name__)
+
+# max number of vertices of subdivided geometry to compute the coverage
+COVERAGE_SUBDIVIDE_VERTICES = 256
+# max number of dirty bboxes kept per view resource, merged when exceeded
+DIRTY_TILE_MAX_BBOXES = 500
+
+
+class TileCoverage(object):
+    """
+    Occupied tiles of a zoom level.
+
+    Tiles are stored per column (x) as sorted list of merged
+    (min_y, max_y) intervals, so lookup is O(log n) per column.
+    """
+
+    def __init__(self, zoom: int, columns: Dict[int, list] = None) -> None:
+        self.zoom = zoom
+        self.columns = columns or {}
+
+    def add_range(self, min_x: int, min_y: int, max_x: int, max_y: int):
+        for x in range(min_x, max_x + 1):
+            self.columns.setdefault(x, []).append((min_y, max_y))
+
+    def add_bbox(self, bbox: List[float]):
+        """Add tiles that intersect bbox [minx, miny, maxx, maxy]."""
+        min_x, min_y = lonlat_to_tile(bbox[0], bbox[3], self.zoom)
+        max_x, max_y = lonlat_to_tile(bbox[2], bbox[1], self.zoom)
+        self.add_range(min_x, min_y, max_x, max_y)
+
+    def merge(self):
+        """Merge overlapping or adjacent intervals of each column."""
+        for x, intervals in self.columns.items():
+            intervals.sort()
+            merged = []
+            for min_y, max_y in intervals:
+                if merged and min_y <= merged[-1][1] + 1:
+                    if max_y > merged[-1][1]:
+                        merged[-1] = (merged[-1][0], max_y)
+                else:
+                    merged.append((min_y, max_y))
+            self.columns[x] = merged
+        return self
+
+    def contains(self, x: int, y: int):
+        return column_contains(self.columns.get(x), y)
+
+    def count(self):
+        return sum([
+            max_y - min_y + 1 for intervals in self.columns.values()
+            for min_y, max_y in intervals
+        ])
+
+    def iter_batches(self, batch_size: int):
+        """Yield list of (x, y) of occupied tiles."""
+        batch = []
+        for x in sorted(self.columns.keys()):
+            for min_y, max_y in self.columns[x]:
+                for y in range(min_y, max_y + 1):
+                    batch.append((x, y))
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+
+def column_contains(intervals: List[Tuple[int, int]], y: int):
+    """Check whether y is in sorted list of merged intervals."""
+    if not intervals:
+        return False
+    idx = bisect_right(intervals, (y, float('inf'))) - 1
+    return idx >= 0 and intervals[idx][0] <= y <= intervals[idx][1]
+
+
+def get_coverage_cache_key(resource_id: str, zoom: int, x: int = None):
+    if x is None:
+        return f'{resource_id}-{zoom}-tile-coverage'
+    return f'{resource_id}-{zoom}-{x}-tile-coverage'
+
+
+def build_tile_coverage(view_resource: DatasetViewResource,
+                        zoom: int,
+                        level_tolerances: Dict[int, float],
+                        using_view_tiling_config=False) -> TileCoverage:
+    """
+    Build occupied tiles of a zoom level from simplified geometries.
+
+    Geometries are subdivided in PostGIS, so the bbox of each part
+    follows the footprint (e.g. islands, coastline) instead of
+    the extent of the whole entity.
+
+    :param level_tolerances: dict of admin level: simplify tolerance
+        that is rendered at this zoom level
+    """
+    start = time.time()
+    coverage = TileCoverage(zoom)
+    dataset_view = view_resource.dataset_view
+    view_tiling_config_where_cond = ''
+    if using_view_tiling_config:
+        view_tiling_config_where_cond = (
+            f'AND ges.dataset_view_id={dataset_view.id}'
+        )
+    for level, tolerance in level_tolerances.items():
+        sql = (
+            'SELECT ST_XMin(b), ST_YMin(b), ST_XMax(b), ST_YMax(b) FROM ('
+            '  SELECT Box2D(ST_Subdivide(ges.simplified_geometry, %s)) AS b '
+            '  FROM georepo_entitysimplified ges '
+            '  INNER JOIN georepo_geographicalentity gg ON '
+            '    gg.id=ges.geographical_entity_id '
+            '  WHERE ges.simplify_tolerance=%s '
+            f'  {view_tiling_config_where_cond} '
+            '  AND gg.level=%s AND gg.dataset_id=%s '
+            '  AND gg.is_approved=True AND gg.privacy_level<=%s '
+            f'  AND gg.id IN (SELECT id FROM "{str(dataset_view.uuid)}")'
+            ') AS parts'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                COVERAGE_SUBDIVIDE_VERTICES,
+                tolerance,
+                level,
+                dataset_view.dataset.id,
+                view_resource.privacy_level
+            ])
+            for row in cursor.fetchall():
+                coverage.add_bbox(row)
+    coverage.merge()
+    logger.info(
+        f'Tile coverage of {view_resource.resource_id} at zoom {zoom} '
+        f'- {coverage.count()} tiles in {time.time() - start}s'
+    )
+    return coverage
+
+
+def store_tile_coverage(resource_id: str, coverage: TileCoverage):
+    """
+    Store coverage in cache for the live tile view.
+
+    Columns are stored in separate keys, so the view only loads
+    the column of the requested tile.
+    """
+    clear_tile_coverage(resource_id, coverage.zoom)
+    values = {}
+    for x, intervals in coverage.columns.items():
+        values[get_coverage_cache_key(resource_id, coverage.zoom, x)] = (
+            intervals
+        )
+    cache.set_many(values, timeout=None)
+    min_x = min(coverage.columns.keys()) if coverage.columns else 0
+    max_x = max(coverage.columns.keys()) if coverage.columns else -1
+    cache.set(
+        get_coverage_cache_key(resource_id, coverage.zoom),
+        {
+            'min_x': min_x,
+            'max_x': max_x
+        },
+        timeout=None
+    )
+
+
+def clear_tile_coverage(resource_id: str, zoom: int = None):
+    """Remove coverage of a zoom level or all zoom levels from cache."""
+    zooms = [zoom] if zoom is not None else range(25)
+    for zoom_level in zooms:
+        meta_key = get_coverage_cache_key(resource_id, zoom_level)
+        meta = cache.get(meta_key)
+        if meta is None:
+            continue
+        cache.delete_many([
+            get_coverage_cache_key(resource_id, zoom_level, x) for x in
+            range(meta['min_x'], meta['max_x'] + 1)
+        ])
+        cache.delete(meta_key)
+
+
+def write_tile_list_file(coverage: TileCoverage, file_path: str):
+    """Write occupied tiles as z/x/y lines for tegola tile-list seeding."""
+    with open(file_path, 'w') as tile_list_file:
+        for batch in coverage.iter_batches(1000):
+            tile_list_file.write(''.join([
+                f'{coverage.zoom}/{x}/{y}\n' for x, y in batch
+            ]))
+    return file_path
+
+
+def is_tile_covered(resource_id: str, z: int, x: int, y: int):
+    """
+    Check whether tile has any geometry using cached coverage.
+
+    :return: None if there is no coverage for the zoom level,
+        otherwise True/False
+    """
+    meta_key = get_coverage_cache_key(resource_id, z)
+    column_key = get_coverage_cache_key(resource_id, z, x)
+    values = cache.get_many([meta_key, column_key])
+    if meta_key not in values:
+        return None
+    return column_contains(values.get(column_key), y)
+
+
+def get_entity_bboxes(dataset_id: int, entity_ids: List[int]):
+    """
+    Return bboxes of entities including their other revisions.
+
+    Other revisions share the unique_code, so the bbox of the replaced
+    geometry is included when a revision is approved.
+    :return: list of [minx, miny, maxx, maxy]
+    """
+    if not entity_ids:
+        return []
+    sql = (
+        'SELECT ST_XMin(b), ST_YMin(b), ST_XMax(b), ST_YMax(b) FROM ('
+        '  SELECT Box2D(ge.geometry) AS b '
+        '  FROM georepo_geographicalentity ge '
+        '  WHERE ge.dataset_id=%s AND ge.geometry IS NOT NULL AND ('
+        '    ge.id IN %s OR ge.unique_code IN ('
+        '      SELECT unique_code FROM georepo_geographicalentity '
+        '      WHERE id IN %s AND unique_code IS NOT NULL'
+        '    )'
+        '  )'
+        ') AS boxes'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            dataset_id,
+            tuple(entity_ids),
+            tuple(entity_ids)
+        ])
+        return [list(row) for row in cursor.fetchall()]
+
+
+def merge_dirty_bboxes(existing: List[List[float]],
+                       bboxes: List[List[float]]):
+    """
+    Append bboxes to dirty bboxes of view resource.
+
+    When there are too many bboxes, they are merged into their extent,
+    so the list stays small while still covering all changed areas.
+    """
+    merged = list(existing) + [
+        bbox for bbox in bboxes if bbox not in existing
+    ]
+    if len(merged) > DIRTY_TILE_MAX_BBOXES:
+        merged = [[
+            min([bbox[0] for bbox in merged]),
+            min([bbox[1] for bbox in merged]),
+            max([bbox[2] for bbox in merged]),
+            max([bbox[3] for bbox in merged])
+        ]]
+    return merged
+
+
+def build_dirty_tile_coverage(bboxes: List[List[float]],
+                              zoom: int) -> TileCoverage:
+    """Build tiles of a zoom level that intersect dirty bboxes."""
+    coverage = TileCoverage(zoom)
+    for bbox in bboxes:
+        coverage.add_bbox(bbox)
+    return coverage.merge()
@@ -0,0 +1,239 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.utils import ProgrammingError
+
+
+logger = logging.getLogger(__name__)
+
+# max number of prepared statements that are kept per db connection
+LIVE_TILE_PREPARED_STATEMENT_CACHE_SIZE = int(
+    os.getenv('LIVE_TILE_PREPARED_STATEMENT_CACHE_SIZE', '64')
+)
+
+# seconds to wait for other worker that renders the same tile
+LIVE_TILE_LOCK_TIMEOUT = int(os.getenv('LIVE_TILE_LOCK_TIMEOUT', '60'))
+# seconds the rendered tile bytes are kept for the waiting workers
+LIVE_TILE_RESULT_TIMEOUT = 30
+LIVE_TILE_POLL_INTERVAL = 0.1
+
+# bind parameters of the prepared tile query: z, x, y
+TILE_BBOX_PARAM = 'TileBBox($1, $2, $3, 3857)'
+TILE_INTERSECTS_PARAM = 'TileBBox($1, $2, $3, 4326)'
+
+
+def get_tile_alias_cache_key(resource_id: str):
+    return f'{resource_id}-tile-alias'
+
+
+def resolve_tile_alias(resource_id: str) -> str:
+    """Return resource that serves the tiles of resource_id."""
+    return cache.get(get_tile_alias_cache_key(resource_id), resource_id)
+
+
+def build_tile_query_template(cache_value: dict) -> str:
+    """
+    Combine the per-level sqls from pending tile cache into one query.
+
+    The query uses $1, $2, $3 as bind parameters for z, x, y, so it can
+    be registered as a server-side prepared statement.
+
+    :param cache_value: dict of level: sql from set_pending_tile_cache_keys
+    :return: sql template that returns the tile in data column
+    """
+    sqls = []
+    for level in cache_value:
+        sql = cache_value[level]
+        q = sql.format(
+            bbox_param=TILE_BBOX_PARAM,
+            intersects_param=TILE_INTERSECTS_PARAM
+        )
+        fsql = (
+            '(SELECT ST_AsMVT(q,\'{mvt_name}\',4096,\'geometry\',\'id\') '
+            'AS data '
+            'FROM ({query}) AS q)'
+        ).format(
+            mvt_name=f'Level-{level}',
+            query=q
+        )
+        sqls.append(fsql)
+    return 'SELECT ({sub_sqls}) AS data'.format(sub_sqls='||'.join(sqls))
+
+
+def get_statement_name(sql_template: str) -> str:
+    """
+    Return deterministic prepared statement name of the sql template.
+
+    The name is derived from the query text, so the same query is only
+    prepared once in each db session. Statements are not shared between
+    sessions, each worker connection prepares its own.
+    """
+    digest = hashlib.md5(sql_template.encode('utf-8')).hexdigest()
+    return f'live_tile_{digest}'
+
+
+class PreparedTileStatements(object):
+    """LRU of prepared tile statements in a single db connection."""
+
+    def __init__(self, raw_connection_id,
+                 max_size=LIVE_TILE_PREPARED_STATEMENT_CACHE_SIZE) -> None:
+        self.raw_connection_id = raw_connection_id
+        self.max_size = max_size
+        self.statements = OrderedDict()
+
+    def prepare(self, cursor, name, sql_template):
+        """Prepare the statement if it is not in this connection yet."""
+        if name in self.statements:
+            self.statements.move_to_end(name)
+            return
+        cursor.execute(
+            f'PREPARE {name} (integer, integer, integer) AS {sql_template}'
+        )
+        self.statements[name] = True
+        while len(self.statements) > self.max_size:
+            evicted, _ = self.statements.popitem(last=False)
+            cursor.execute(f'DEALLOCATE {evicted}')
+
+    def discard(self, name):
+        self.statements.pop(name, None)
+
+
+def get_prepared_tile_statements() -> PreparedTileStatements:
+    """
+    Return LRU of prepared statements for current db connection.
+
+    Prepared statements only live in the session that created them,
+    so the LRU is reset when Django opens a new connection.
+    """
+    connection.ensure_connection()
+    raw_connection_id = id(connection.connection)
+    statements = getattr(connection, '_prepared_tile_statements', None)
+    if (
+        statements is None or
+        statements.raw_connection_id != raw_connection_id
+    ):
+        statements = PreparedTileStatements(raw_connection_id)
+        connection._prepared_tile_statements = statements
+    return statements
+
+
+def execute_prepared_tile_query(sql_template: str, z: int, x: int, y: int):
+    """
+    Execute tile query as prepared statement with z, x, y bind params.
+
+    :return: tile bytes
+    """
+    name = get_statement_name(sql_template)
+    statements = get_prepared_tile_statements()
+    with connection.cursor() as cursor:
+        statements.prepare(cursor, name, sql_template)
+        try:
+            # savepoint keeps outer transaction usable for the retry
+            with transaction.atomic():
+                cursor.execute(
+                    f'EXECUTE {name} (%s, %s, %s)', [z, x, y])
+        except ProgrammingError:
+            # the statement could be removed by the server,
+            # e.g. DISCARD ALL from connection pooler
+            logger.warning(f'Re-preparing live tile statement {name}')
+            statements.discard(name)
+            statements.prepare(cursor, name, sql_template)
+            cursor.execute(f'EXECUTE {name} (%s, %s, %s)', [z, x, y])
+        row = cursor.fetchone()
+    tile = row[0] if row else None
+    return bytes(tile) if tile else bytes()
+
+
+def generate_live_tile(cache_value: dict, z: int, x: int, y: int):
+    """
+    Generate vector tile from the pending tile cache of a zoom level.
+
+    :param cache_value: dict of level: sql from set_pending_tile_cache_keys
+    :return: tile bytes
+    """
+    if not cache_value:
+        return bytes()
+    sql_template = build_tile_query_template(cache_value)
+    return execute_prepared_tile_query(sql_template, z, x, y)
+
+
+# in-process map of tile key to the future of the tile being rendered
+_inflight_tiles = {}
+_inflight_tiles_lock = threading.Lock()
+
+
+def render_tile_with_lock(tile_key: str, render):
+    """
+    Render tile once across workers using lock in the cache.
+
+    Worker that acquires the lock renders the tile and shares the
+    bytes through the cache, other workers wait for the bytes.
+    The keys use pending-tile suffix, so they are not removed by
+    DatasetViewResource.clear_permission_cache.
+
+    :param tile_key: key of resource, z, x, y
+    :param render: function that returns the tile bytes
+    :return: tile bytes
+    """
+    lock_key = f'{tile_key}-pending-tile-lock'
+    result_key = f'{tile_key}-pending-tile-result'
+    deadline = time.time() + LIVE_TILE_LOCK_TIMEOUT
+    while True:
+        result = cache.get(result_key)
+        if result is not None:
+            return result
+        if cache.add(lock_key, True, timeout=LIVE_TILE_LOCK_TIMEOUT):
+            try:
+                result = render()
+                cache.set(result_key, result,
+                          timeout=LIVE_TILE_RESULT_TIMEOUT)
+                return result
+            finally:
+                cache.delete(lock_key)
+        if time.time() > deadline:
+            logger.warning(f'Timeout waiting for live tile {tile_key}')
+            return render()
+        time.sleep(LIVE_TILE_POLL_INTERVAL)
+
+
+def single_flight_tile(tile_key: str, render):
+    """
+    Deduplicate concurrent renders of the same tile.
+
+    Requests in the same process wait for the future of the first
+    request, while requests in other workers are coalesced by
+    render_tile_with_lock.
+
+    :param tile_key: key of resource, z, x, y
+    :param render: function that returns the tile bytes
+    :return: tile bytes
+    """
+    with _inflight_tiles_lock:
+        future = _inflight_tiles.get(tile_key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight_tiles[tile_key] = future
+    if not is_leader:
+        try:
+            return future.result(timeout=LIVE_TILE_LOCK_TIMEOUT)
+        except TimeoutError:
+            logger.warning(f'Timeout waiting for live tile {tile_key}')
+            return render()
+    try:
+        result = render_tile_with_lock(tile_key, render)
+        future.set_result(result)
+        return result
+    except Exception as ex:
+        future.set_exception(ex)
+        raise ex
+    finally:
+        with _inflight_tiles_lock:
+            _inflight_tiles.pop(tile_key, None)
@@ -0,0 +1,399 @@
+import os
+import io
+import gzip
+import math
+import time
+import queue
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+from georepo.utils.azure_blob_storage import StorageContainerClient
+from georepo.utils.mbtiles import (
+    is_mbtiles_storage,
+    get_mbtiles_path,
+    write_tiles,
+    delete_tiles
+)
+from georepo.utils.tile_engine import execute_prepared_tile_query
+
+
+logger = logging.getLogger(__name__)
+
+NATIVE_RENDERER = 'native'
+# number of tiles rendered by worker in one batch
+TILE_SEEDER_BATCH_SIZE = 64
+# max latitude of web mercator
+MAX_LATITUDE = 85.0511287798066
+
+
+def is_native_renderer():
+    """Check whether vector tiles are rendered in-process."""
+    return settings.VECTOR_TILE_RENDERER == NATIVE_RENDERER
+
+
+def get_seeder_concurrency():
+    concurrency = int(os.getenv('VECTOR_TILE_RENDERER_CONCURRENCY', '0'))
+    if concurrency <= 0:
+        concurrency = os.cpu_count() or 2
+    return concurrency
+
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    """Return x, y of tile at zoom z that contains lon, lat."""
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    n = 2 ** z
+    x = int(math.floor((lon + 180.0) / 360.0 * n))
+    lat_rad = math.radians(lat)
+    y = int(math.floor(
+        (1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n
+    ))
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def get_tile_range(bbox: List[float], z: int) -> Tuple[int, int, int, int]:
+    """
+    Return tile range that covers bbox at zoom z.
+
+    :param bbox: [min_lon, min_lat, max_lon, max_lat]
+    :return: Tuple of (min_x, min_y, max_x, max_y)
+    """
+    if not bbox:
+        n = 2 ** z
+        return 0, 0, n - 1, n - 1
+    min_x, min_y = lonlat_to_tile(bbox[0], bbox[3], z)
+    max_x, max_y = lonlat_to_tile(bbox[2], bbox[1], z)
+    return min_x, min_y, max_x, max_y
+
+
+def parse_bbox(bbox_str: str) -> List[float]:
+    """Parse bbox string of view resource."""
+    if not bbox_str:
+        return []
+    return [float(coord) for coord in bbox_str.split(',')]
+
+
+def iter_tile_batches(z: int, tile_range: Tuple[int, int, int, int],
+                      batch_size=TILE_SEEDER_BATCH_SIZE):
+    """Yield list of (x, y) tiles in tile range."""
+    min_x, min_y, max_x, max_y = tile_range
+    batch = []
+    for x in range(min_x, max_x + 1):
+        for y in range(min_y, max_y + 1):
+            batch.append((x, y))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def count_tiles(tile_range: Tuple[int, int, int, int]):
+    min_x, min_y, max_x, max_y = tile_range
+    return (max_x - min_x + 1) * (max_y - min_y + 1)
+
+
+def gzip_tile(data: bytes) -> bytes:
+    bytesbuffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=bytesbuffer, mode='w') as w:
+        w.write(data)
+    return bytesbuffer.getvalue()
+
+
+def get_temp_tile_path(resource_id: str, z: int, x: int, y: int):
+    return os.path.join(
+        settings.LAYER_TILES_PATH,
+        f'temp_{resource_id}',
+        f'{z}',
+        f'{x}',
+        f'{y}'
+    )
+
+
+def get_live_tile_path(resource_id: str, z: int, x: int, y: int):
+    return os.path.join(
+        settings.LAYER_TILES_PATH,
+        resource_id,
+        f'{z}',
+        f'{x}',
+        f'{y}'
+    )
+
+
+def write_temp_tiles(resource_id: str, z: int,
+                     tiles: List[Tuple[int, int, bytes]]):
+    """
+    Write gzipped tiles to temp store of the resource.
+
+    The temp store is published per zoom by on_zoom_level_ends.
+    """
+    if not tiles:
+        return
+    if settings.USE_AZURE:
+        if not StorageContainerClient:
+            return
+        for x, y, data in tiles:
+            StorageContainerClient.upload_blob(
+                f'layer_tiles/temp_{resource_id}/{z}/{x}/{y}',
+                data,
+                overwrite=True
+            )
+    elif is_mbtiles_storage():
+        write_tiles(
+            get_mbtiles_path(resource_id, is_temp=True),
+            [(z, x, y, data) for x, y, data in tiles]
+        )
+    else:
+        for x, y, data in tiles:
+            tile_path = get_temp_tile_path(resource_id, z, x, y)
+            os.makedirs(os.path.dirname(tile_path), exist_ok=True)
+            with open(tile_path, 'wb') as f:
+                f.write(data)
+
+
+def write_live_tiles(resource_id: str, z: int,
+                     tiles: List[Tuple[int, int, bytes]],
+                     empty_tiles: List[Tuple[int, int]] = None):
+    """
+    Replace tiles in live store of the resource.
+
+    Used by incremental regeneration, so existing tiles that become
+    empty are removed from the live store.
+    """
+    empty_tiles = empty_tiles or []
+    if settings.USE_AZURE:
+        if not StorageContainerClient:
+            return
+        for x, y, data in tiles:
+            StorageContainerClient.upload_blob(
+                f'layer_tiles/{resource_id}/{z}/{x}/{y}',
+                data,
+                overwrite=True
+            )
+        if empty_tiles:
+            StorageContainerClient.delete_blobs(
+                *[
+                    f'layer_tiles/{resource_id}/{z}/{x}/{y}' for
+                    x, y in empty_tiles
+                ],
+                raise_on_any_failure=False
+            )
+    elif is_mbtiles_storage():
+        live_path = get_mbtiles_path(resource_id)
+        if tiles:
+            write_tiles(
+                live_path,
+                [(z, x, y, data) for x, y, data in tiles]
+            )
+        if empty_tiles:
+            delete_tiles(
+                live_path,
+                [(z, x, y) for x, y in empty_tiles]
+            )
+    else:
+        for x, y, data in tiles:
+            tile_path = get_live_tile_path(resource_id, z, x, y)
+            os.makedirs(os.path.dirname(tile_path), exist_ok=True)
+            # write to temp file first, so tile is never read half-written
+            with open(f'{tile_path}.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(f'{tile_path}.tmp', tile_path)
+        for x, y in empty_tiles:
+            tile_path = get_live_tile_path(resource_id, z, x, y)
+            if os.path.exists(tile_path):
+                os.remove(tile_path)
+
+
+class TileSeeder(object):
+    """
+    Render vector tiles of a view resource with bounded worker pool.
+
+    Each worker thread has its own db connection, renders batches of
+    tiles using prepared tile query of the zoom level, then writes the
+    gzipped tiles to the temp store. Batches from all zoom levels share
+    the same queue, so zoom levels are processed concurrently.
+    """
+
+    def __init__(self, resource_id: str,
+                 zoom_queries: Dict[int, str],
+                 tile_ranges: Dict[int, Tuple[int, int, int, int]],
+                 concurrency: int = None,
+                 overwrite: bool = True,
+                 is_temp: bool = True) -> None:
+        """
+        :param resource_id: uuid of view resource
+        :param zoom_queries: dict of zoom: sql template from
+            build_tile_query_template
+        :param tile_ranges: dict of zoom: tile range or TileCoverage
+            to be rendered
+        :param is_temp: False to write tiles directly to live store
+            and remove the tiles that become empty
+        """
+        self.resource_id = resource_id
+        self.zoom_queries = zoom_queries
+        self.tile_ranges = tile_ranges
+        self.concurrency = concurrency or get_seeder_concurrency()
+        self.overwrite = overwrite
+        self.is_temp = is_temp
+        # bounded queue, so batches of high zooms are not kept in memory
+        self.batches = queue.Queue(maxsize=self.concurrency * 4)
+        self.results = queue.Queue()
+        self.stop_event = threading.Event()
+
+    def get_zoom_batches(self, zoom):
+        tiles = self.tile_ranges[zoom]
+        if hasattr(tiles, 'iter_batches'):
+            # TileCoverage with only the occupied tiles
+            return tiles.iter_batches(TILE_SEEDER_BATCH_SIZE)
+        return iter_tile_batches(zoom, tiles)
+
+    def get_total_tiles(self, zoom):
+        tiles = self.tile_ranges[zoom]
+        if hasattr(tiles, 'iter_batches'):
+            return tiles.count()
+        return count_tiles(tiles)
+
+    def skip_existing_tile(self, z, x, y):
+        if (
+            self.overwrite or not self.is_temp or settings.USE_AZURE or
+            is_mbtiles_storage()
+        ):
+            return False
+        return os.path.exists(
+            get_temp_tile_path(self.resource_id, z, x, y))
+
+    def render_batch(self, zoom, batch):
+        sql_template = self.zoom_queries[zoom]
+        tiles = []
+        empty_tiles = []
+        size = 0
+        for x, y in batch:
+            if self.skip_existing_tile(zoom, x, y):
+                continue
+            tile = execute_prepared_tile_query(sql_template, zoom, x, y)
+            if not len(tile):
+                empty_tiles.append((x, y))
+                continue
+            data = gzip_tile(tile)
+            size += len(data)
+            tiles.append((x, y, data))
+        if self.is_temp:
+            write_temp_tiles(self.resource_id, zoom, tiles)
+        else:
+            write_live_tiles(self.resource_id, zoom, tiles, empty_tiles)
+        return size, len(tiles)
+
+    def put_batch(self, item):
+        while not self.stop_event.is_set():
+            try:
+                self.batches.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer(self, zooms):
+        # lower zooms are queued first, so they are finished first
+        for zoom in zooms:
+            for batch in self.get_zoom_batches(zoom):
+                if not self.put_batch((zoom, batch)):
+                    return
+        for _ in range(self.concurrency):
+            if not self.put_batch((None, None)):
+                return
+
+    def worker(self):
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    zoom, batch = self.batches.get(timeout=1)
+                except queue.Empty:
+                    continue
+                if zoom is None:
+                    break
+                try:
+                    size, tile_count = self.render_batch(zoom, batch)
+                    self.results.put(
+                        (zoom, len(batch), size, tile_count, None))
+                except Exception as ex:
+                    logger.error(f'Failed to render tiles at zoom {zoom}')
+                    logger.error(ex)
+                    self.results.put((zoom, len(batch), 0, 0, ex))
+        finally:
+            connection.close()
+
+    def run(self, on_progress=None, on_zoom_done=None,
+            progress_interval=5):
+        """
+        Render all tiles.
+
+        :param on_progress: callback(zoom_stats) that is called at most
+            every progress_interval seconds
+        :param on_zoom_done: callback(zoom, stats) that is called in
+            ascending zoom order after all tiles of the zoom are rendered
+            and all lower zooms are done
+        """
+        zooms = sorted(self.zoom_queries.keys())
+        zoom_stats = {}
+        for zoom in zooms:
+            zoom_stats[zoom] = {
+                'total_tiles': self.get_total_tiles(zoom),
+                'processed_tiles': 0,
+                'size': 0,
+                'total_files': 0,
+                'start_time': time.time()
+            }
+        producer = threading.Thread(
+            target=self.producer, args=(zooms,), daemon=True)
+        producer.start()
+        workers = []
+        for _ in range(self.concurrency):
+            worker = threading.Thread(target=self.worker, daemon=True)
+            worker.start()
+            workers.append(worker)
+        pending_zooms = list(zooms)
+        last_progress = time.time()
+        error = None
+        try:
+            while pending_zooms:
+                try:
+                    zoom, processed, size, tile_count, ex = (
+                        self.results.get(timeout=progress_interval)
+                    )
+                except queue.Empty:
+                    zoom = None
+                if zoom is not None:
+                    if ex:
+                        error = ex
+                        break
+                    stats = zoom_stats[zoom]
+                    stats['processed_tiles'] += processed
+                    stats['size'] += size
+                    stats['total_files'] += tile_count
+                # publish zooms in order, zoom 0 may reset the live cache
+                while (
+                    pending_zooms and
+                    zoom_stats[pending_zooms[0]]['processed_tiles'] >=
+                    zoom_stats[pending_zooms[0]]['total_tiles']
+                ):
+                    done_zoom = pending_zooms.pop(0)
+                    zoom_stats[done_zoom]['end_time'] = time.time()
+                    if on_zoom_done:
+                        on_zoom_done(done_zoom, zoom_stats[done_zoom])
+                if (
+                    on_progress and
+                    time.time() - last_progress >= progress_interval
+                ):
+                    on_progress(zoom_stats)
+                    last_progress = time.time()
+        finally:
+            self.stop_event.set()
+            producer.join()
+            for worker in workers:
+                worker.join()
+        if error:
+            raise error
+        return zoom_stats
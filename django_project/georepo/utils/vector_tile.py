@@ -4,7 +4,7 @@ import logging
 import toml
 import os
 import time
-from typing import List
+from typing import List, Dict
 
 from django.core.cache import cache
 from django.conf import settings
@@ -26,6 +26,35 @@ from georepo.utils.azure_blob_storage import (
     get_tegola_cache_config
 )
 from georepo.utils.tile_configs import get_view_tiling_configs
+from georepo.utils.entity_attribute import is_entity_attribute_ready
+from georepo.utils.mbtiles import (
+    is_mbtiles_storage,
+    get_mbtiles_path,
+    import_zoom_directory,
+    publish_zoom,
+    remove_mbtiles,
+    get_mbtiles_size,
+    get_zoom_info
+)
+from georepo.utils.tile_engine import (
+    build_tile_query_template,
+    get_tile_alias_cache_key
+)
+from georepo.utils.tile_seeder import (
+    is_native_renderer,
+    parse_bbox,
+    get_tile_range,
+    write_live_tiles,
+    TileSeeder
+)
+from georepo.utils.tile_coverage import (
+    TileCoverage,
+    build_tile_coverage,
+    build_dirty_tile_coverage,
+    store_tile_coverage,
+    clear_tile_coverage,
+    write_tile_list_file
+)
 
 
 logger = logging.getLogger(__name__)
@@ -76,12 +105,23 @@ def dataset_view_sql_query(dataset_view: DatasetView, level,
     ids = ids.order_by('code').values(
         'code__id', 'code__name', 'default'
     ).distinct('code__id')
+    use_attribute = is_entity_attribute_ready(dataset_view.dataset.id)
     id_field_left_joins = []
     id_field_select = []
+    if use_attribute:
+        id_field_left_joins.append(
+            'LEFT JOIN georepo_entityattribute ea ON '
+            'ea.geographical_entity_id=gg.id'
+        )
     for id in ids:
         code_id = id['code__id']
         code_name = id['code__name']
         join_name = f'id_{code_id}'
+        if use_attribute:
+            id_field_select.append(
+                f"ea.attributes->>'{join_name}__value' as \"{code_name}\""
+            )
+            continue
         id_field_select.append(
             f'{join_name}.value as "{code_name}"'
         )
@@ -117,8 +157,16 @@ def dataset_view_sql_query(dataset_view: DatasetView, level,
                 'label', flat=True
             )
             has_empty = False
+            name_key = f'name_{name_idx}'
             for label_idx, label in enumerate(name_labels_qs):
-                if label:
+                if label and use_attribute:
+                    name_field_select.append(
+                        f"CASE WHEN ea.attributes->>'{name_key}__label'="
+                        f"'{label}' THEN "
+                        f"ea.attributes->>'{name_key}__name' "
+                        f'END as "{label}"'
+                    )
+                elif label:
                     label_join_name = f'{join_name}_{label_idx}'
                     name_field_select.append(
                         f'{label_join_name}.name as "{label}"'
@@ -129,6 +177,16 @@ def dataset_view_sql_query(dataset_view: DatasetView, level,
                         f'{label_join_name}.idx={name_idx} AND '
                         f'{label_join_name}.label=\'{label}\''
                     )
+                elif not has_empty and use_attribute:
+                    has_empty = True
+                    name_label = f'name_{empty_label_idx}'
+                    empty_label_idx += 1
+                    name_field_select.append(
+                        f"CASE WHEN COALESCE("
+                        f"ea.attributes->>'{name_key}__label', '')='' THEN "
+                        f"ea.attributes->>'{name_key}__name' "
+                        f'END as "{name_label}"'
+                    )
                 elif not has_empty:
                     has_empty = True
                     name_label = f'name_{empty_label_idx}'
@@ -381,6 +439,33 @@ def generate_view_vector_tiles(view_resource: DatasetViewResource,
         view_resource.entity_count = entity_count
         view_resource.save(update_fields=['entity_count'])
 
+    is_incremental = is_incremental_generation(view_resource)
+    if not is_incremental and view_resource.dirty_tile_bboxes is not None:
+        # full generation replaces the live cache, so any interrupted
+        # generation needs to be a full generation as well
+        view_resource.dirty_tile_bboxes = None
+        view_resource.save(update_fields=['dirty_tile_bboxes'])
+    if is_incremental or is_native_renderer():
+        if is_incremental:
+            is_generated = generate_view_vector_tiles_incremental(
+                view_resource,
+                entity_count,
+                **kwargs
+            )
+        else:
+            is_generated = generate_view_vector_tiles_native(
+                view_resource,
+                entity_count,
+                overwrite=overwrite,
+                **kwargs
+            )
+        end = time.time()
+        if kwargs.get('log_object'):
+            kwargs.get('log_object').add_log(
+                'generate_view_vector_tiles',
+                end - start)
+        return is_generated
+
     toml_config_files = create_view_configuration_files(view_resource)
     logger.info(
         f'Config files {view_resource.id} - {view_resource.uuid} '
@@ -398,6 +483,8 @@ def generate_view_vector_tiles(view_resource: DatasetViewResource,
                 end - start)
         return False
     bbox_str = generate_view_resource_bbox(view_resource)
+    tile_coverages = generate_view_resource_tile_coverage(
+        view_resource, **kwargs)
 
     processed_count = 0
     tegola_concurrency = int(os.getenv('TEGOLA_CONCURRENCY', '2'))
@@ -437,33 +524,53 @@ def generate_view_vector_tiles(view_resource: DatasetViewResource,
         view_resource.save(update_fields=[
             'vector_tile_detail_logs'
         ])
-        command_list = (
-            [
-                '/opt/tegola',
-                'cache',
-                'seed',
-                '--config',
-                toml_config_file['config_file'],
-                '--overwrite' if overwrite else '',
-            ]
-        )
+        tile_coverage = tile_coverages.get(current_zoom)
+        if tile_coverage:
+            # seed only the tiles that have geometries
+            tile_list_file = toml_config_file['config_file'].replace(
+                '.toml', '.tiles')
+            write_tile_list_file(tile_coverage, tile_list_file)
+            toml_config_file['tile_list_file'] = tile_list_file
+            command_list = (
+                [
+                    '/opt/tegola',
+                    'cache',
+                    'seed',
+                    'tile-list',
+                    tile_list_file,
+                    '--config',
+                    toml_config_file['config_file'],
+                    '--overwrite' if overwrite else '',
+                ]
+            )
+        else:
+            command_list = (
+                [
+                    '/opt/tegola',
+                    'cache',
+                    'seed',
+                    '--config',
+                    toml_config_file['config_file'],
+                    '--overwrite' if overwrite else '',
+                ]
+            )
         if tegola_concurrency > 0:
             command_list.extend([
                 '--concurrency',
                 f'{tegola_concurrency}',
             ])
-        if bbox_str:
+        if bbox_str and not tile_coverage:
             command_list.extend([
                 '--bounds',
                 bbox_str
             ])
-
-        command_list.extend([
-            '--min-zoom',
-            str(toml_config_file['zoom']),
-            '--max-zoom',
-            str(toml_config_file['zoom'])
-        ])
+        if not tile_coverage:
+            command_list.extend([
+                '--min-zoom',
+                str(toml_config_file['zoom']),
+                '--max-zoom',
+                str(toml_config_file['zoom'])
+            ])
         logger.info('Tegola commands:')
         logger.info(command_list)
         subprocess_started = time.time()
@@ -556,6 +663,324 @@ def generate_view_vector_tiles(view_resource: DatasetViewResource,
     return True
 
 
+def generate_view_resource_tile_coverage(
+        view_resource: DatasetViewResource,
+        **kwargs) -> Dict[int, TileCoverage]:
+    """
+    Build occupied tiles of each zoom level in the tiling configs.
+
+    The coverage is stored in cache, so live tile view can return
+    empty tile without querying the database.
+    Empty dict is returned when VECTOR_TILE_SKIP_EMPTY_TILES is off.
+    """
+    start = time.time()
+    clear_tile_coverage(view_resource.resource_id)
+    if not settings.VECTOR_TILE_SKIP_EMPTY_TILES:
+        return {}
+    tiling_configs, using_view_tiling_config = get_view_tiling_configs(
+        view_resource.dataset_view)
+    tile_coverages = {}
+    for tiling_config in tiling_configs:
+        level_tolerances = {}
+        for item in tiling_config.items:
+            level_tolerances[item.level] = item.tolerance
+        coverage = build_tile_coverage(
+            view_resource,
+            tiling_config.zoom_level,
+            level_tolerances,
+            using_view_tiling_config=using_view_tiling_config
+        )
+        store_tile_coverage(view_resource.resource_id, coverage)
+        tile_coverages[tiling_config.zoom_level] = coverage
+    end = time.time()
+    if kwargs.get('log_object'):
+        kwargs.get('log_object').add_log(
+            'generate_view_resource_tile_coverage',
+            end - start)
+    return tile_coverages
+
+
+def generate_view_vector_tiles_native(view_resource: DatasetViewResource,
+                                      entity_count: int,
+                                      overwrite: bool = False,
+                                      **kwargs):
+    """
+    Generate vector tiles for view resource using in-process renderer.
+
+    Tiles are rendered with ST_AsMVT by TileSeeder worker pool and
+    written to the temp store, then each zoom level is published
+    in ascending order using on_zoom_level_ends.
+    :param view_resource: DatasetViewResource object
+    :param entity_count: number of entities in view resource
+    :param overwrite: True to overwrite existing tiles
+
+    :return boolean: True if vector tiles are generated
+    """
+    start = time.time()
+    tiling_configs, using_view_tiling_config = get_view_tiling_configs(
+        view_resource.dataset_view)
+    zoom_queries = {}
+    for tiling_config in tiling_configs:
+        sqls = get_zoom_level_tile_sqls(
+            view_resource,
+            tiling_config,
+            using_view_tiling_config
+        )
+        if sqls:
+            zoom_queries[tiling_config.zoom_level] = (
+                build_tile_query_template(sqls)
+            )
+    if len(zoom_queries) == 0:
+        # no need to generate the view tiles
+        remove_vector_tiles_dir(view_resource.resource_id, **kwargs)
+        save_view_resource_on_success(view_resource, entity_count)
+        calculate_vector_tiles_size(view_resource, **kwargs)
+        return False
+    bbox = parse_bbox(generate_view_resource_bbox(view_resource))
+    tile_coverages = generate_view_resource_tile_coverage(
+        view_resource, **kwargs)
+    tile_ranges = {}
+    for zoom in zoom_queries:
+        if zoom in tile_coverages:
+            tile_ranges[zoom] = tile_coverages[zoom]
+        else:
+            tile_ranges[zoom] = get_tile_range(bbox, zoom)
+    seeder = TileSeeder(
+        view_resource.resource_id,
+        zoom_queries,
+        tile_ranges,
+        overwrite=overwrite
+    )
+    logger.info(
+        'Starting native vector tile generation for '
+        f'view_resource {view_resource.id} - {view_resource.uuid} '
+        f'- {view_resource.privacy_level} - concurrency '
+        f'- {seeder.concurrency}'
+    )
+    detail_logs = {}
+    total_tiles = 0
+    for zoom in zoom_queries:
+        detail_logs[zoom] = {
+            'zoom': zoom,
+            'command_list': '',
+            'return_code': -1,
+            'time': 0,
+            'status': 'pending',
+            'error': '',
+            'size': 0,
+            'total_files': 0,
+            'total_tiles': seeder.get_total_tiles(zoom),
+            'processed_tiles': 0,
+            'cp_time': 0,
+            'start_time': 0,
+            'end_time': 0
+        }
+        total_tiles += detail_logs[zoom]['total_tiles']
+    view_resource.vector_tile_detail_logs = detail_logs
+    view_resource.save(update_fields=['vector_tile_detail_logs'])
+
+    def update_zoom_log(zoom, stats):
+        zoom_log = view_resource.vector_tile_detail_logs[zoom]
+        if zoom_log['status'] == 'pending' and stats['processed_tiles']:
+            zoom_log['status'] = 'processing'
+            zoom_log['start_time'] = timezone.now().timestamp()
+        zoom_log['processed_tiles'] = stats['processed_tiles']
+        zoom_log['size'] = stats['size']
+        zoom_log['total_files'] = stats['total_files']
+        zoom_log['time'] = time.time() - stats['start_time']
+        return zoom_log
+
+    def update_progress(zoom_stats):
+        processed_tiles = 0
+        for zoom, stats in zoom_stats.items():
+            update_zoom_log(zoom, stats)
+            processed_tiles += stats['processed_tiles']
+        view_resource.vector_tiles_progress = (
+            (100 * processed_tiles) / total_tiles if total_tiles else 100
+        )
+        view_resource.save(update_fields=[
+            'vector_tile_detail_logs',
+            'vector_tiles_progress'
+        ])
+
+    def on_zoom_done(zoom, stats):
+        zoom_log = update_zoom_log(zoom, stats)
+        zoom_log['return_code'] = 0
+        zoom_log['status'] = 'copying temp directory'
+        if is_mbtiles_storage():
+            zoom_log['size'], zoom_log['total_files'] = get_zoom_info(
+                get_mbtiles_path(view_resource.resource_id, is_temp=True),
+                zoom
+            )
+        view_resource.save(update_fields=['vector_tile_detail_logs'])
+        cp_started = time.time()
+        on_zoom_level_ends(view_resource, zoom)
+        zoom_log['status'] = 'done'
+        zoom_log['cp_time'] = time.time() - cp_started
+        zoom_log['end_time'] = timezone.now().timestamp()
+        if zoom == 0:
+            view_resource.vector_tiles_size = zoom_log['size']
+        else:
+            view_resource.vector_tiles_size += zoom_log['size']
+        view_resource.save(update_fields=[
+            'vector_tile_detail_logs',
+            'vector_tiles_size'
+        ])
+
+    try:
+        zoom_stats = seeder.run(
+            on_progress=update_progress,
+            on_zoom_done=on_zoom_done
+        )
+    except Exception as ex:
+        logger.error(ex)
+        view_resource.status = DatasetView.DatasetViewStatus.ERROR
+        view_resource.vector_tiles_log = str(ex)
+        view_resource.save(update_fields=['status', 'vector_tiles_log'])
+        raise RuntimeError(view_resource.vector_tiles_log)
+    update_progress(zoom_stats)
+    logger.info(
+        'Finished native vector tile generation for '
+        f'view_resource {view_resource.id} '
+        f'- {view_resource.vector_tiles_progress}'
+    )
+    post_process_vector_tiles(view_resource, [], **kwargs)
+    save_view_resource_on_success(view_resource, entity_count)
+    end = time.time()
+    if kwargs.get('log_object'):
+        kwargs.get('log_object').add_log(
+            'generate_view_vector_tiles_native',
+            end - start)
+    return True
+
+
+def is_incremental_generation(view_resource: DatasetViewResource):
+    """
+    Check whether only tiles of changed entities need to be rendered.
+
+    Dirty bboxes are only tracked for entity changes after a successful
+    generation, any other change resets them to None.
+    """
+    return (
+        settings.VECTOR_TILE_INCREMENTAL and
+        bool(view_resource.dirty_tile_bboxes) and
+        view_resource.vector_tiles_size > 0
+    )
+
+
+def generate_view_vector_tiles_incremental(
+        view_resource: DatasetViewResource,
+        entity_count: int,
+        **kwargs):
+    """
+    Re-render tiles that intersect dirty bboxes of view resource.
+
+    Tiles are rendered in-process and written directly to the live
+    store, existing tiles that become empty are removed.
+    :param view_resource: DatasetViewResource object
+    :param entity_count: number of entities in view resource
+
+    :return boolean: True if vector tiles are generated
+    """
+    start = time.time()
+    dirty_bboxes = view_resource.dirty_tile_bboxes
+    tiling_configs, using_view_tiling_config = get_view_tiling_configs(
+        view_resource.dataset_view)
+    zoom_queries = {}
+    tile_ranges = {}
+    for tiling_config in tiling_configs:
+        zoom = tiling_config.zoom_level
+        dirty_tiles = build_dirty_tile_coverage(dirty_bboxes, zoom)
+        sqls = get_zoom_level_tile_sqls(
+            view_resource,
+            tiling_config,
+            using_view_tiling_config
+        )
+        if not sqls:
+            # no entity left at this zoom, remove existing tiles
+            for batch in dirty_tiles.iter_batches(1000):
+                write_live_tiles(
+                    view_resource.resource_id, zoom, [], batch)
+            continue
+        zoom_queries[zoom] = build_tile_query_template(sqls)
+        tile_ranges[zoom] = dirty_tiles
+    seeder = TileSeeder(
+        view_resource.resource_id,
+        zoom_queries,
+        tile_ranges,
+        is_temp=False
+    )
+    total_tiles = sum([
+        seeder.get_total_tiles(zoom) for zoom in zoom_queries
+    ])
+    logger.info(
+        'Starting incremental vector tile generation for '
+        f'view_resource {view_resource.id} - {view_resource.uuid} '
+        f'- {view_resource.privacy_level} - {len(dirty_bboxes)} bboxes '
+        f'- {total_tiles} tiles'
+    )
+    detail_logs = {}
+    for zoom in zoom_queries:
+        detail_logs[zoom] = {
+            'zoom': zoom,
+            'command_list': '',
+            'return_code': -1,
+            'time': 0,
+            'status': 'pending',
+            'error': '',
+            'size': 0,
+            'total_files': 0,
+            'total_tiles': seeder.get_total_tiles(zoom),
+            'processed_tiles': 0,
+            'cp_time': 0,
+            'start_time': 0,
+            'end_time': 0
+        }
+    view_resource.vector_tile_detail_logs = detail_logs
+    view_resource.save(update_fields=['vector_tile_detail_logs'])
+
+    def update_progress(zoom_stats):
+        processed_tiles = 0
+        for zoom, stats in zoom_stats.items():
+            zoom_log = view_resource.vector_tile_detail_logs[zoom]
+            zoom_log['processed_tiles'] = stats['processed_tiles']
+            zoom_log['size'] = stats['size']
+            zoom_log['total_files'] = stats['total_files']
+            zoom_log['time'] = time.time() - stats['start_time']
+            if 'end_time' in stats:
+                zoom_log['return_code'] = 0
+                zoom_log['status'] = 'done'
+                zoom_log['end_time'] = timezone.now().timestamp()
+            processed_tiles += stats['processed_tiles']
+        view_resource.vector_tiles_progress = (
+            (100 * processed_tiles) / total_tiles if total_tiles else 100
+        )
+        view_resource.save(update_fields=[
+            'vector_tile_detail_logs',
+            'vector_tiles_progress'
+        ])
+
+    try:
+        zoom_stats = seeder.run(on_progress=update_progress)
+    except Exception as ex:
+        logger.error(ex)
+        view_resource.status = DatasetView.DatasetViewStatus.ERROR
+        view_resource.vector_tiles_log = str(ex)
+        view_resource.save(update_fields=['status', 'vector_tiles_log'])
+        raise RuntimeError(view_resource.vector_tiles_log)
+    update_progress(zoom_stats)
+    # occupied tiles may be changed
+    generate_view_resource_tile_coverage(view_resource, **kwargs)
+    calculate_vector_tiles_size(view_resource, **kwargs)
+    save_view_resource_on_success(view_resource, entity_count)
+    end = time.time()
+    if kwargs.get('log_object'):
+        kwargs.get('log_object').add_log(
+            'generate_view_vector_tiles_incremental',
+            end - start)
+    return True
+
+
 def save_view_resource_on_success(view_resource: DatasetViewResource,
                                   entity_count):
     view_resource.status = (
@@ -570,12 +995,15 @@ def save_view_resource_on_success(view_resource: DatasetViewResource,
     view_resource.vector_tiles_code_version = (
         f"{settings.CODE_RELEASE_VERSION}-{settings.CODE_COMMIT_HASH}"
     )
+    # live cache is up to date, start tracking changed entities
+    view_resource.dirty_tile_bboxes = []
     view_resource.save(update_fields=['status', 'vector_tile_sync_status',
                                       'vector_tiles_updated_at',
                                       'vector_tiles_progress',
                                       'entity_count',
                                       'vector_tiles_code_version',
-                                      'max_zoom'])
+                                      'max_zoom',
+                                      'dirty_tile_bboxes'])
     # clear any pending tile cache keys
     reset_pending_tile_cache_keys(view_resource)
 
@@ -609,6 +1037,8 @@ def remove_vector_tiles_dir(
     is_temp=False,
     **kwargs):
     start = time.time()
+    if not is_temp:
+        clear_tile_coverage(resource_id)
     if settings.USE_AZURE:
         client = DirectoryClient(settings.AZURE_STORAGE,
                                  settings.AZURE_STORAGE_CONTAINER)
@@ -629,6 +1059,7 @@ def remove_vector_tiles_dir(
             )
         if os.path.exists(original_vector_tile_path):
             shutil.rmtree(original_vector_tile_path)
+        remove_mbtiles(resource_id, is_temp=is_temp)
     end = time.time()
     if kwargs.get('log_object'):
         kwargs.get('log_object').add_log(
@@ -667,6 +1098,21 @@ def on_zoom_level_ends(view_resource: DatasetViewResource,
                 view_resource.vector_tile_detail_logs[
                     current_zoom]['warnings'] = warns
                 view_resource.save(update_fields=['vector_tile_detail_logs'])
+        elif is_mbtiles_storage():
+            # pack tegola output into archive and free the inodes
+            temp_zoom_dir = os.path.join(
+                settings.LAYER_TILES_PATH,
+                f'temp_{view_resource.resource_id}',
+                f'{current_zoom}'
+            )
+            import_zoom_directory(
+                get_mbtiles_path(view_resource.resource_id, is_temp=True),
+                temp_zoom_dir,
+                current_zoom
+            )
+            if os.path.exists(temp_zoom_dir):
+                shutil.rmtree(temp_zoom_dir)
+            publish_zoom(view_resource.resource_id, current_zoom)
         else:
             original_vector_tile_path = os.path.join(
                 settings.LAYER_TILES_PATH,
@@ -682,12 +1128,15 @@ def on_zoom_level_ends(view_resource: DatasetViewResource,
                 )
             if os.path.exists(directory_to_be_cleared):
                 shutil.rmtree(directory_to_be_cleared)
+            temp_zoom_dir = os.path.join(
+                settings.LAYER_TILES_PATH,
+                f'temp_{view_resource.resource_id}',
+                f'{current_zoom}'
+            )
+            # zoom directory does not exist when all tiles are empty
+            os.makedirs(temp_zoom_dir, exist_ok=True)
             shutil.copytree(
-                os.path.join(
-                    settings.LAYER_TILES_PATH,
-                    f'temp_{view_resource.resource_id}',
-                    f'{current_zoom}'
-                ),
+                temp_zoom_dir,
                 original_vector_tile_path
             )
         if current_zoom == 0:
@@ -721,12 +1170,17 @@ def post_process_vector_tiles(view_resource: DatasetViewResource,
         start = time.time()
         if not settings.DEBUG:
             for toml_config_file in toml_config_files:
-                if not os.path.exists(toml_config_file['config_file']):
-                    continue
-                try:
-                    os.remove(toml_config_file['config_file'])
-                except Exception as ex:
-                    logger.error('Unable to remove config file ', ex)
+                config_files = [
+                    toml_config_file['config_file'],
+                    toml_config_file.get('tile_list_file')
+                ]
+                for config_file in config_files:
+                    if not config_file or not os.path.exists(config_file):
+                        continue
+                    try:
+                        os.remove(config_file)
+                    except Exception as ex:
+                        logger.error('Unable to remove config file ', ex)
         if settings.USE_AZURE:
             client = DirectoryClient(settings.AZURE_STORAGE,
                                      settings.AZURE_STORAGE_CONTAINER)
@@ -740,6 +1194,7 @@ def post_process_vector_tiles(view_resource: DatasetViewResource,
             )
             if os.path.exists(layer_tiles_tmp):
                 shutil.rmtree(layer_tiles_tmp)
+            remove_mbtiles(view_resource.resource_id, is_temp=True)
         calculate_vector_tiles_size(view_resource, **kwargs)
         end = time.time()
         if kwargs.get('log_object'):
@@ -796,6 +1251,8 @@ def calculate_vector_tiles_size(
                                  settings.AZURE_STORAGE_CONTAINER)
         layer_tiles_dest = f'layer_tiles/{view_resource.resource_id}'
         total_size = client.dir_size(layer_tiles_dest)
+    elif is_mbtiles_storage():
+        total_size = get_mbtiles_size(view_resource.resource_id)
     else:
         original_vector_tile_path = os.path.join(
             settings.LAYER_TILES_PATH,
@@ -839,6 +1296,65 @@ def reset_pending_tile_cache_keys(view_resource: DatasetViewResource):
     cache.delete_many(cache_keys)
 
 
+def set_tile_alias_cache_keys(dataset_view: DatasetView):
+    """
+    Point resources without entities to resource with the same tiles.
+
+    Resource contains entities with privacy level up to its level, so
+    resource without entities at its own level has the same entities
+    as the nearest lower resource with entities. It is not tiled and
+    its tile requests are served from that resource.
+    :return: dict of resource_id: resource_id serving the tiles
+    """
+    view_resources = DatasetViewResource.objects.filter(
+        dataset_view=dataset_view
+    ).order_by('privacy_level')
+    aliases = {}
+    target = None
+    for view_resource in view_resources:
+        cache_key = get_tile_alias_cache_key(view_resource.resource_id)
+        if view_resource.entity_count > 0:
+            target = view_resource
+            cache.delete(cache_key)
+        elif target:
+            aliases[view_resource.resource_id] = target.resource_id
+            cache.set(cache_key, target.resource_id, timeout=None)
+        else:
+            cache.delete(cache_key)
+    return aliases
+
+
+def get_zoom_level_tile_sqls(view_resource: DatasetViewResource,
+                             tiling_config,
+                             using_view_tiling_config: bool):
+    """
+    Generate tile sql for each admin level in the tiling config of a zoom.
+
+    The sqls use {bbox_param} and {intersects_param} placeholders.
+    :return: dict of level: sql
+    """
+    sqls = {}
+    for item in tiling_config.items:
+        # check if view resource has entity at this level
+        entity_count = get_entities_count_in_view(
+            view_resource.dataset_view,
+            view_resource.privacy_level,
+            item.level
+        )
+        if entity_count == 0:
+            continue
+        sqls[item.level] = dataset_view_sql_query(
+            view_resource.dataset_view,
+            item.level,
+            view_resource.privacy_level,
+            item.tolerance,
+            using_view_tiling_config=using_view_tiling_config,
+            bbox_param='{bbox_param}',
+            intersects_param='{intersects_param}'
+        )
+    return sqls
+
+
 def set_pending_tile_cache_keys(
         view_resource: DatasetViewResource,
         skip_zoom_0=False):
@@ -859,25 +1375,11 @@ def set_pending_tile_cache_keys(
         if skip_zoom_0 and zoom_level == 0:
             continue
         # for each level in tiling config, generate query
-        sqls = {}
-        for item in tiling_config.items:
-            # check if view resource has entity at this level
-            entity_count = get_entities_count_in_view(
-                view_resource.dataset_view,
-                view_resource.privacy_level,
-                item.level
-            )
-            if entity_count == 0:
-                continue
-            sqls[item.level] = dataset_view_sql_query(
-                view_resource.dataset_view,
-                item.level,
-                view_resource.privacy_level,
-                item.tolerance,
-                using_view_tiling_config=is_from_view_config,
-                bbox_param='{bbox_param}',
-                intersects_param='{intersects_param}'
-            )
+        sqls = get_zoom_level_tile_sqls(
+            view_resource,
+            tiling_config,
+            is_from_view_config
+        )
         cache_key = (
             f'{view_resource.resource_id}-{tiling_config.zoom_level}-'
             'pending-tile'
@@ -92,3 +92,31 @@ def create_level_error_report(level: int, entity_type: str,
     for error_type in ErrorType:
         level_error_report[error_type.value] = 0
     return level_error_report
+
+
+class ValidationReport(object):
+    """
+    Error rows of features in validation, in the order of the report.
+
+    Rows are indexed by level and entity code, so the error of a feature
+    can be found without scanning the rows.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.row_index = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def append(self, layer_error):
+        self.rows.append(layer_error)
+        key = (layer_error.get(LEVEL), layer_error.get(ENTITY_CODE))
+        self.row_index.setdefault(key, layer_error)
+
+    def find(self, level: int, code: str):
+        """Return the first error row of the feature, None if not found."""
+        return self.row_index.get((level, code))
@@ -1,23 +1,23 @@
-from typing import Tuple, List
+from typing import Tuple, List, Union
 from django.db.models import QuerySet
 from django.contrib.gis.geos import (
     GEOSGeometry
 )
 from georepo.models import GeographicalEntity
 from .geometry_check_errors import DuplicateCheckError
+from .geometry_index import GeometryIndex, find_bbox_overlaps
 
 
 def duplicate_check(
         geom: GEOSGeometry, feature_id: str,
-        other_geom_queryset: QuerySet[GeographicalEntity]) -> Tuple[
+        other_geom_queryset: Union[
+            QuerySet[GeographicalEntity], GeometryIndex]) -> Tuple[
             List[DuplicateCheckError], str]:
     errors: List[DuplicateCheckError] = []
     if not geom.valid:
         return errors, geom.valid_reason
     # find other geometry that has overlaping bbox
-    other_geometries = other_geom_queryset.filter(
-        geometry__bboverlaps=geom
-    )
+    other_geometries = find_bbox_overlaps(other_geom_queryset, geom)
     for obj in other_geometries:
         if not obj.geometry.valid:
             continue
@@ -8,7 +8,7 @@ from .geometry_utils import (
     part_at,
     ring_count,
     ring_at,
-    vertex_at,
+    ring_vertices,
     poly_line_size,
     sqr_distance_2d
 )
@@ -27,11 +27,12 @@ def duplicate_nodes_check(
             n_verts, _ = poly_line_size(ring_part, tolerance)
             if n_verts < 2:
                 continue
+            vertices = ring_vertices(ring_part)
             i_vert = n_verts - 1
             j_vert = 0
             while j_vert < n_verts:
-                pi = vertex_at(ring_part, 0, i_vert)
-                pj = vertex_at(ring_part, 0, j_vert)
+                pi = vertices[i_vert]
+                pj = vertices[j_vert]
                 if sqr_distance_2d(pi, pj) < tolerance * tolerance:
                     errors.append(
                         SingleGeometryCheckError([pj], i_part,
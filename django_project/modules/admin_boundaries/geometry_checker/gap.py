@@ -8,6 +8,7 @@ from django.contrib.gis.geos import (
 from georepo.models import GeographicalEntity
 from .qrectangle import QRectangle
 from .geometry_check_errors import GapCheckError
+from .geometry_index import GeometryIndex, find_bbox_overlaps
 from .geometry_utils import (
     part_count,
     part_at
@@ -18,7 +19,8 @@ def gap_check(
         geom_queryset: QuerySet[GeographicalEntity],
         tolerance: float,
         gap_threshold_map_units: float,
-        reduced_tolerance: float = None) -> Tuple[List[GapCheckError], str]:
+        reduced_tolerance: float = None,
+        geom_index: GeometryIndex = None) -> Tuple[List[GapCheckError], str]:
     errors: List[GapCheckError] = []
     if reduced_tolerance is None:
         # use root square from tolerance
@@ -64,8 +66,9 @@ def gap_check(
         # Get neighboring polygons
         neighboring_ids = []
         gap_area_bbox: QRectangle = QRectangle.from_tuple(gap_geom.extent)
-        other_geometries = geom_queryset.filter(
-            geometry__bboverlaps=gap_geom
+        other_geometries = find_bbox_overlaps(
+            geom_index if geom_index is not None else geom_queryset,
+            gap_geom
         )
         for geom in other_geometries:
             if gap_geom.distance(geom.geometry) < tolerance:
@@ -0,0 +1,165 @@
+import copy
+import math
+from typing import List, Tuple, Union
+
+from django.contrib.gis.db.models.functions import NumPoints
+from django.contrib.gis.geos import GEOSGeometry, Polygon
+from django.db.models import QuerySet, Sum
+
+from georepo.models import GeographicalEntity
+
+# max number of vertices that are loaded into memory,
+# larger level is checked using bboverlaps queries to PostGIS
+GEOMETRY_INDEX_MAX_POINTS = 2000000
+
+
+class GeometryIndex(object):
+    """
+    In-memory uniform grid of bounding boxes of entities.
+
+    The geometries of a level are loaded once, then the checks find the
+    entities with overlapping bounding box (same as bboverlaps filter)
+    without a query per entity.
+    """
+    # entity that spans more cells is compared with all queries
+    MAX_CELLS_PER_ENTITY = 256
+
+    def __init__(self, entities: List[GeographicalEntity] = None,
+                 cell_size: float = None):
+        entities = entities or []
+        if cell_size is None:
+            sizes = [
+                max(extent[2] - extent[0], extent[3] - extent[1]) for
+                extent in [entity.geometry.extent for entity in entities
+                           if self.has_geometry(entity)]
+            ]
+            cell_size = sum(sizes) / len(sizes) if sizes else 0
+        self.cell_size = cell_size if cell_size > 0 else 1
+        self.entities = []
+        self.boxes = []
+        self.cells = {}
+        self.large_entities = []
+        self.excluded_ids = set()
+        for entity in entities:
+            self.add(entity)
+
+    @staticmethod
+    def has_geometry(entity: GeographicalEntity) -> bool:
+        return entity.geometry is not None and not entity.geometry.empty
+
+    def get_cells(self, box):
+        """Return cells covered by box, None if it spans too many cells."""
+        min_x = math.floor(box[0] / self.cell_size)
+        min_y = math.floor(box[1] / self.cell_size)
+        max_x = math.floor(box[2] / self.cell_size)
+        max_y = math.floor(box[3] / self.cell_size)
+        if (
+            (max_x - min_x + 1) * (max_y - min_y + 1) >
+            self.MAX_CELLS_PER_ENTITY
+        ):
+            return None
+        return [
+            (x, y) for x in range(min_x, max_x + 1)
+            for y in range(min_y, max_y + 1)
+        ]
+
+    @staticmethod
+    def is_box_overlap(box1, box2) -> bool:
+        return (
+            box1[0] <= box2[2] and box2[0] <= box1[2] and
+            box1[1] <= box2[3] and box2[1] <= box1[3]
+        )
+
+    def add(self, entity: GeographicalEntity):
+        """Add entity, e.g. after it is inserted during validation."""
+        if not self.has_geometry(entity):
+            return
+        idx = len(self.entities)
+        box = entity.geometry.extent
+        self.entities.append(entity)
+        self.boxes.append(box)
+        cells = self.get_cells(box)
+        if cells is None:
+            self.large_entities.append(idx)
+            return
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(idx)
+
+    def exclude(self, entity_id: int) -> 'GeometryIndex':
+        """Return index that shares the grid but skips the entity."""
+        index = copy.copy(self)
+        index.excluded_ids = self.excluded_ids | {entity_id}
+        return index
+
+    def query(self, geom: GEOSGeometry) -> List[GeographicalEntity]:
+        """Return entities whose bounding box overlaps geom bounding box."""
+        if geom.empty:
+            return []
+        box = geom.extent
+        cells = self.get_cells(box)
+        if cells is None:
+            candidates = range(len(self.boxes))
+        else:
+            candidates = set(self.large_entities)
+            for cell in cells:
+                candidates.update(self.cells.get(cell, []))
+        return [
+            self.entities[idx] for idx in sorted(candidates) if
+            self.is_box_overlap(box, self.boxes[idx]) and
+            self.entities[idx].id not in self.excluded_ids
+        ]
+
+
+def find_bbox_overlaps(
+        other_geoms: Union[QuerySet[GeographicalEntity], GeometryIndex],
+        geom: GEOSGeometry):
+    """Find entities that has overlapping bbox with geom."""
+    if isinstance(other_geoms, GeometryIndex):
+        return other_geoms.query(geom)
+    return other_geoms.filter(
+        geometry__bboverlaps=geom
+    )
+
+
+def get_cell_size(extent: Tuple[float, float, float, float],
+                  total_features: int) -> float:
+    """Estimate size of an entity when the features cover the extent."""
+    if not extent or total_features <= 0:
+        return 0
+    return (
+        max(extent[2] - extent[0], extent[3] - extent[1]) /
+        math.sqrt(total_features)
+    )
+
+
+def load_geometry_index(
+        geom_queryset: QuerySet[GeographicalEntity],
+        max_points: int = GEOMETRY_INDEX_MAX_POINTS,
+        cell_size: float = None) -> GeometryIndex:
+    """
+    Load geometries of queryset into GeometryIndex.
+
+    :return: None if the geometries have more than max_points vertices
+    """
+    total_points = geom_queryset.aggregate(
+        total_points=Sum(NumPoints('geometry'))
+    )['total_points'] or 0
+    if total_points > max_points:
+        return None
+    entities = geom_queryset.only(
+        'id', 'internal_code', 'label', 'geometry'
+    )
+    return GeometryIndex(list(entities), cell_size)
+
+
+def load_layer_file_index(
+        layer_file,
+        extent: Tuple[float, float, float, float],
+        max_points: int = GEOMETRY_INDEX_MAX_POINTS,
+        cell_size: float = None) -> GeometryIndex:
+    """Load entities of layer file that overlap the extent."""
+    geom_queryset = GeographicalEntity.objects.filter(
+        layer_file=layer_file,
+        geometry__bboverlaps=Polygon.from_bbox(extent)
+    )
+    return load_geometry_index(geom_queryset, max_points, cell_size)
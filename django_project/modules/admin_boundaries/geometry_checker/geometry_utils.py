@@ -1,4 +1,5 @@
 import sys
+import struct
 from typing import List, Tuple
 from ctypes import byref, c_double
 from django.contrib.gis.geos import prototypes as capi
@@ -78,6 +79,120 @@ def ring_at(geom_part: GEOSGeometry, ring: int) -> GEOSGeometry:
     return geom_part
 
 
+def ring_vertices(ring_part: GEOSGeometry) -> List[QVector]:
+    """
+    Return all vertices of the ring.
+
+    The coordinates are unpacked from WKB of the ring at once,
+    instead of reading each vertex from GEOS.
+    """
+    if isinstance(ring_part, Point):
+        return [QVector(ring_part.x, ring_part.y)]
+    if ring_part.empty:
+        return []
+    wkb = bytes(ring_part.wkb)
+    byte_order = '<' if wkb[0] == 1 else '>'
+    n = struct.unpack_from(f'{byte_order}I', wkb, 5)[0]
+    dim = 3 if ring_part.hasz else 2
+    values = struct.unpack_from(f'{byte_order}{n * dim}d', wkb, 9)
+    return [
+        QVector(values[i], values[i + 1]) for i in range(0, n * dim, dim)
+    ]
+
+
+class SegmentGrid(object):
+    """
+    Uniform grid of bounding boxes of polyline segments.
+
+    Segment i is from vertex i to vertex i + 1. Segments are only
+    compared with the segments in the same grid cells, so the checks
+    do not need to test every pair of segments.
+    """
+    # segment that spans more cells is compared with all segments
+    MAX_CELLS_PER_SEGMENT = 64
+
+    def __init__(self, vertices: List[QVector], padding: float):
+        self.boxes = []
+        total_size = 0
+        for i in range(len(vertices) - 1):
+            p1 = vertices[i]
+            p2 = vertices[i + 1]
+            box = (
+                min(p1.x, p2.x) - padding, min(p1.y, p2.y) - padding,
+                max(p1.x, p2.x) + padding, max(p1.y, p2.y) + padding
+            )
+            self.boxes.append(box)
+            total_size += max(box[2] - box[0], box[3] - box[1])
+        self.cell_size = (
+            total_size / len(self.boxes) if self.boxes else 0
+        )
+        if self.cell_size <= 0:
+            self.cell_size = 1
+        self.cells = {}
+        self.large_segments = []
+        for idx, box in enumerate(self.boxes):
+            cells = self.get_cells(box)
+            if cells is None:
+                self.large_segments.append(idx)
+                continue
+            for cell in cells:
+                self.cells.setdefault(cell, []).append(idx)
+
+    def get_cells(self, box):
+        """Return cells covered by box, None if it spans too many cells."""
+        min_x = math.floor(box[0] / self.cell_size)
+        min_y = math.floor(box[1] / self.cell_size)
+        max_x = math.floor(box[2] / self.cell_size)
+        max_y = math.floor(box[3] / self.cell_size)
+        if (
+            (max_x - min_x + 1) * (max_y - min_y + 1) >
+            self.MAX_CELLS_PER_SEGMENT
+        ):
+            return None
+        return [
+            (x, y) for x in range(min_x, max_x + 1)
+            for y in range(min_y, max_y + 1)
+        ]
+
+    @staticmethod
+    def is_box_overlap(box1, box2) -> bool:
+        return (
+            box1[0] <= box2[2] and box2[0] <= box1[2] and
+            box1[1] <= box2[3] and box2[1] <= box1[3]
+        )
+
+    def candidate_pairs(self) -> List[Tuple[int, int]]:
+        """Return sorted pairs (i, k), i < k of overlapping segments."""
+        pairs = set()
+        for members in self.cells.values():
+            # members are added in ascending order of segment
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pairs.add((members[a], members[b]))
+        for idx in self.large_segments:
+            for other in range(len(self.boxes)):
+                if other != idx:
+                    pairs.add((min(idx, other), max(idx, other)))
+        return sorted([
+            pair for pair in pairs if
+            self.is_box_overlap(self.boxes[pair[0]], self.boxes[pair[1]])
+        ])
+
+    def query(self, box) -> List[int]:
+        """Return sorted segments that overlap the box."""
+        cells = self.get_cells(box)
+        if cells is None:
+            candidates = range(len(self.boxes))
+        else:
+            candidates = set(self.large_segments)
+            for cell in cells:
+                candidates.update(self.cells.get(cell, []))
+        return sorted([
+            idx for idx in candidates if
+            self.is_box_overlap(box, self.boxes[idx])
+        ])
+
+
 def sqr_distance_2d(pt1: QVector, pt2: QVector) -> float:
     return (
         (pt1.x - pt2.x) * (pt1.x - pt2.x) +
@@ -237,37 +352,25 @@ def self_intersections(geom_part: GEOSGeometry, ring: int,
     returns The list of self intersections
     """
     intersections = []
-    ring_part = ring_at(geom_part, ring)
-    n = vertex_count(ring_part, 0)
-    is_closed = vertex_at(ring_part, 0, 0) == vertex_at(ring_part, 0, n - 1)
-    i = 0
-    j = 1
-    while j < n:
-        pi = vertex_at(ring_part, 0, i)
-        pj = vertex_at(ring_part, 0, j)
-        if sqr_distance_2d(pi, pj) >= tolerance * tolerance:
-            start = j + 1
-            end = n - 1 if i == 0 and is_closed else n
-
-            k = start
-            m = start + 1
-            while m < end:
-                pk = vertex_at(ring_part, 0, k)
-                pl = vertex_at(ring_part, 0, m)
-                is_intersect, _, inter = segment_intersections(pi, pj, pk, pl,
-                                                               tolerance)
-                if is_intersect:
-                    intersection: SelfIntersection
-                    if i > k:
-                        intersection = SelfIntersection(k, i, inter)
-                    else:
-                        intersection = SelfIntersection(i, k, inter)
-                    intersections.append(intersection)
-                k = m
-                m += 1
-
-        i = j
-        j += 1
+    vertices = ring_vertices(ring_at(geom_part, ring))
+    n = len(vertices)
+    if n < 4:
+        return intersections
+    is_closed = vertices[0] == vertices[n - 1]
+    # only segments with overlapping bounding boxes can intersect
+    grid = SegmentGrid(vertices, tolerance)
+    for i, k in grid.candidate_pairs():
+        # skip adjacent segments and the closing segment of first one
+        if k < i + 2 or (i == 0 and is_closed and k > n - 3):
+            continue
+        pi = vertices[i]
+        pj = vertices[i + 1]
+        if sqr_distance_2d(pi, pj) < tolerance * tolerance:
+            continue
+        is_intersect, _, inter = segment_intersections(
+            pi, pj, vertices[k], vertices[k + 1], tolerance)
+        if is_intersect:
+            intersections.append(SelfIntersection(i, k, inter))
     return intersections
 
 
@@ -1,4 +1,4 @@
-from typing import Tuple, List
+from typing import Tuple, List, Union
 from django.db.models import QuerySet
 import math
 from django.contrib.gis.geos import (
@@ -6,6 +6,7 @@ from django.contrib.gis.geos import (
 )
 from georepo.models import GeographicalEntity
 from .geometry_check_errors import OverlapCheckError
+from .geometry_index import GeometryIndex, find_bbox_overlaps
 from .geometry_utils import (
     part_count,
     part_at
@@ -14,7 +15,8 @@ from .geometry_utils import (
 
 def overlap_check(
         geom: GEOSGeometry,
-        other_geom_queryset: QuerySet[GeographicalEntity],
+        other_geom_queryset: Union[
+            QuerySet[GeographicalEntity], GeometryIndex],
         tolerance: float,
         overlap_threshold_map_units: float,
         reduced_tolerance: float = None) -> Tuple[
@@ -28,9 +30,7 @@ def overlap_check(
         # this is tolerance for area
         reduced_tolerance = math.sqrt(tolerance)
     # find other geometry that has overlaping bbox
-    other_geometries = other_geom_queryset.filter(
-        geometry__bboverlaps=geom
-    )
+    other_geometries = find_bbox_overlaps(other_geom_queryset, geom)
     for obj in other_geometries:
         if not prep_geom.overlaps(obj.geometry):
             continue
@@ -7,12 +7,12 @@ from .qvector import QVector
 from .geometry_utils import (
     part_count,
     ring_count,
-    vertex_at,
-    vertex_count,
+    ring_vertices,
     sqr_distance_2d,
     project_point_on_segment,
     part_at,
-    ring_at
+    ring_at,
+    SegmentGrid
 )
 
 
@@ -27,19 +27,19 @@ def self_contact_check(
         n_rings = ring_count(geom_part)
         for i_ring in range(n_rings):
             # Test for self-contacts
-            ring_part = ring_at(geom_part, i_ring)
-            n = vertex_count(ring_part, 0)
-            is_closed = vertex_at(ring_part, 0, 0).equals_exact(
-                vertex_at(ring_part, 0, n - 1), tolerance)
+            vertices = ring_vertices(ring_at(geom_part, i_ring))
+            n = len(vertices)
+            is_closed = vertices[0].equals_exact(
+                vertices[n - 1], tolerance)
 
             # Geometry ring without duplicate nodes
             vtx_map: List[int] = []
             ring: List[QVector] = []
             vtx_map.append(0)
-            ring.append(vertex_at(ring_part, 0, 0))
+            ring.append(vertices[0])
             i = 1
             while i < n:
-                p = vertex_at(ring_part, 0, i)
+                p = vertices[i]
                 if sqr_distance_2d(p, ring[-1]) > square_tolerance:
                     vtx_map.append(i)
                     ring.append(p)
@@ -56,19 +56,18 @@ def self_contact_check(
             n = len(ring)
 
             # For each vertex, check whether it lies on a segment
+            # that is near the vertex
+            grid = SegmentGrid(ring, tolerance)
             i_vert = 0
             n_verts = n - 1 if is_closed else n
             while i_vert < n_verts:
                 p = ring[i_vert]
-                i = 0
-                j = 1
-                while j < n:
+                for i in grid.query((p.x, p.y, p.x, p.y)):
+                    j = i + 1
                     if (
                         i_vert == i or i_vert == j or
                         (is_closed and i_vert == 0 and j == n - 1)
                     ):
-                        i = j
-                        j += 1
                         continue
                     si = ring[i]
                     sj = ring[j]
@@ -81,8 +80,5 @@ def self_contact_check(
                         # No need to report same contact on
                         # ifferent segments multiple times
                         break
-
-                    i = j
-                    j += 1
                 i_vert += 1
     return errors
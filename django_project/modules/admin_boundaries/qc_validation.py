@@ -8,8 +8,10 @@ import time
 
 from django.contrib.gis.geos import GEOSGeometry, Polygon, MultiPolygon
 from django.core.files.base import ContentFile
-from django.db import IntegrityError
-from django.db.models import IntegerField, Max
+from django.db import IntegrityError, transaction
+from django.contrib.gis.db.models import Extent
+from django.contrib.gis.db.models.functions import NumPoints
+from django.db.models import IntegerField, Max, Sum, Count
 from django.db.models.functions import Cast
 
 from dashboard.models import LayerFile, ERROR
@@ -27,7 +29,8 @@ from modules.admin_boundaries.error_type import (
     create_layer_error,
     create_level_error_report,
     ALLOWABLE_ERROR_TYPES,
-    SUPERADMIN_BYPASS_ERROR
+    SUPERADMIN_BYPASS_ERROR,
+    ValidationReport
 )
 from georepo.utils.layers import (
     check_value_as_string_valid,
@@ -43,11 +46,22 @@ from modules.admin_boundaries.geometry_checker import (
     gap_check,
     self_intersects_check_with_flag
 )
+from modules.admin_boundaries.geometry_checker.geometry_index import (
+    GEOMETRY_INDEX_MAX_POINTS,
+    GeometryIndex,
+    get_cell_size,
+    load_layer_file_index
+)
 from georepo.utils.mapshaper import simplify_for_dataset
 from georepo.utils.celery_helper import cancel_task
 
 logger = logging.getLogger(__name__)
 
+# number of validated entities that are inserted in one batch
+ENTITY_BULK_CREATE_BATCH_SIZE = 500
+# number of features between updates of entity upload progress
+PROGRESS_UPDATE_INTERVAL = 100
+
 
 def do_self_intersects_check(geom: GEOSGeometry,
                              internal_code: str,
@@ -149,13 +163,16 @@ def do_duplicate_check(geom: GEOSGeometry,
                        internal_code: str,
                        entity_upload: EntityUploadStatus,
                        layer_file: LayerFile,
+                       geometry_index: GeometryIndex = None,
                        **kwargs) -> bool:
     is_valid = False
     start = time.time()
     try:
-        other_geoms = GeographicalEntity.objects.filter(
-            layer_file=layer_file
-        )
+        other_geoms = geometry_index
+        if other_geoms is None:
+            other_geoms = GeographicalEntity.objects.filter(
+                layer_file=layer_file
+            )
         errors, geom_error = duplicate_check(geom, internal_code, other_geoms)
         is_valid = len(errors) == 0
     except Exception as ex:
@@ -216,15 +233,19 @@ def do_hierarchy_check(geom: GEOSGeometry,
 def do_contained_check(entity: GeographicalEntity,
                        entity_upload: EntityUploadStatus,
                        layer_file: LayerFile,
+                       geometry_index: GeometryIndex = None,
                        **kwargs) -> bool:
     is_valid = False
     start = time.time()
     try:
-        other_geoms = GeographicalEntity.objects.filter(
-            layer_file=layer_file
-        ).exclude(
-            id=entity.id
-        )
+        if geometry_index is not None:
+            other_geoms = geometry_index.exclude(entity.id)
+        else:
+            other_geoms = GeographicalEntity.objects.filter(
+                layer_file=layer_file
+            ).exclude(
+                id=entity.id
+            )
         errors, geom_error = contained_check(
             entity.geometry,
             entity.internal_code,
@@ -255,6 +276,7 @@ def do_overlap_check(geom: GEOSGeometry,
                      internal_code: str,
                      entity_upload: EntityUploadStatus,
                      layer_file: LayerFile,
+                     geometry_index: GeometryIndex = None,
                      **kwargs) -> bool:
     is_valid = False
     start = time.time()
@@ -262,9 +284,11 @@ def do_overlap_check(geom: GEOSGeometry,
         upload_session: LayerUploadSession = entity_upload.upload_session
         tolerance = upload_session.tolerance
         overlap_threshold_map_units = upload_session.overlaps_threshold
-        other_geoms = GeographicalEntity.objects.filter(
-            layer_file=layer_file
-        )
+        other_geoms = geometry_index
+        if other_geoms is None:
+            other_geoms = GeographicalEntity.objects.filter(
+                layer_file=layer_file
+            )
         errors, geom_error = overlap_check(
             geom,
             other_geoms,
@@ -295,6 +319,7 @@ def do_overlap_check(geom: GEOSGeometry,
 def do_gap_check(entity_upload: EntityUploadStatus,
                  layer_file: LayerFile,
                  level: int,
+                 geometry_index: GeometryIndex = None,
                  **kwargs):
     is_valid = False
     errors = []
@@ -312,7 +337,8 @@ def do_gap_check(entity_upload: EntityUploadStatus,
         errors, geom_error = gap_check(
             geoms,
             tolerance,
-            gap_threshold_map_units
+            gap_threshold_map_units,
+            geom_index=geometry_index
         )
         is_valid = len(errors) == 0
     except Exception as ex:
@@ -366,6 +392,100 @@ def get_temp_entity_count(upload_session: LayerUploadSession, level: int,
     ).count()
 
 
+def load_upload_level_index(layer_file: LayerFile,
+                            temp_entities,
+                            **kwargs) -> GeometryIndex:
+    """
+    Load entities of layer file around the level features into memory.
+
+    The index is used by overlap, duplicate, contained and gap checks
+    instead of querying PostGIS for each feature. The new entities are
+    added to the index when they are inserted.
+    :return: None if the level is too big to be loaded
+    """
+    start = time.time()
+    temp_info = temp_entities.aggregate(
+        extent=Extent('geometry'),
+        total_points=Sum(NumPoints('geometry')),
+        total=Count('id')
+    )
+    extent = temp_info['extent']
+    max_points = (
+        GEOMETRY_INDEX_MAX_POINTS - (temp_info['total_points'] or 0)
+    )
+    geometry_index = None
+    if extent and max_points > 0:
+        geometry_index = load_layer_file_index(
+            layer_file,
+            extent,
+            max_points,
+            get_cell_size(extent, temp_info['total'])
+        )
+    end = time.time()
+    logger.debug(f'load_upload_level_index {(end - start)} seconds')
+    if kwargs.get('log_object'):
+        kwargs['log_object'].add_log(
+            'admin_boundaries.qc_validation.load_upload_level_index',
+            end - start)
+    return geometry_index
+
+
+def bulk_create_entity_rows(model, rows):
+    """
+    Insert names or ids of entities in bulk.
+
+    When the batch fails, the rows are inserted one by one and
+    the invalid rows are skipped, like inserting each row before.
+    """
+    if not rows:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(rows, ignore_conflicts=True)
+    except IntegrityError:
+        for row in rows:
+            try:
+                with transaction.atomic():
+                    row.save()
+            except IntegrityError:
+                pass
+
+
+def create_validated_entities(pending_entities):
+    """
+    Insert batch of (entity, name_fields, id_fields) from validation.
+
+    The entity objects have id after they are inserted.
+    """
+    if not pending_entities:
+        return
+    GeographicalEntity.objects.bulk_create(
+        [entity for entity, _, _ in pending_entities]
+    )
+    entity_names = []
+    entity_ids = []
+    for entity, name_fields, id_fields in pending_entities:
+        for name_field in name_fields:
+            entity_names.append(EntityName(
+                language_id=name_field['language'],
+                name=name_field['value'],
+                geographical_entity=entity,
+                default=name_field['default'],
+                label=name_field['label'],
+                idx=name_field['name_field_idx']
+            ))
+        for id_field in id_fields:
+            entity_ids.append(EntityId(
+                code_id=id_field['id_type'],
+                value=id_field['value'],
+                default=id_field['default'],
+                geographical_entity=entity
+            ))
+    bulk_create_entity_rows(EntityName, entity_names)
+    bulk_create_entity_rows(EntityId, entity_ids)
+    pending_entities.clear()
+
+
 def check_mandatory_fields_in_entity_temp(entity_temp: EntityTemp,
                                           layer_error,
                                           level_error_report,
@@ -492,7 +612,7 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
             children = children.exclude(id=ancestor.id)
         children.delete()
 
-    validation_summaries = []
+    validation_summaries = ValidationReport()
     error_summaries = []
 
     # fetch included child level 1 for this entity upload
@@ -555,11 +675,35 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
             layer_file=layer_file,
             level=level
         ).order_by('feature_index')
+        # level 0 checks only 1 feature, so it does not need the index
+        geometry_index = None
+        if level > 0 and ancestor:
+            # only features of this upload, same as total_features
+            geometry_index = load_upload_level_index(
+                layer_file,
+                temp_entities.filter(
+                    ancestor_entity_id=ancestor.internal_code
+                ),
+                **kwargs
+            )
         layer_index = 0
         feature_included_idx = 0
+        # entities are inserted in batch when the checks use the index,
+        # otherwise the checks need previous entities in the database
+        pending_entities = []
+        level_codes = set()
         for temp_entity in temp_entities.iterator(chunk_size=1):
             feature_idx = temp_entity.feature_index
             layer_index += 1
+            # throttled by read features, so progress keeps moving
+            # when features of other uploads are skipped
+            if layer_index % PROGRESS_UPDATE_INTERVAL == 1:
+                entity_upload.progress = (
+                    f'Level {level} - Validation Checks '
+                    f'({min(feature_included_idx + 1, total_features)} of '
+                    f'{total_features} polygons)'
+                )
+                entity_upload.save(update_fields=['progress'])
             error_found = False
             layer_error = create_layer_error(level)
 
@@ -654,12 +798,7 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
                     level_error_report[
                         ErrorType.PARENT_ID_FIELD_ERROR.value] += 1
 
-            entity_upload.progress = (
-                f'Level {level} - Validation Checks '
-                f'({feature_included_idx + 1} of '
-                f'{total_features} polygons)'
-            )
-            entity_upload.save(update_fields=['progress'])
+            feature_included_idx += 1
             # Check name fields
             name_fields = []
             label = '-'
@@ -752,10 +891,13 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
 
             # Check duplicate default code if valid default code
             if not layer_error[ErrorType.ID_FIELDS_ERROR.value]:
-                default_code_dupes = GeographicalEntity.objects.filter(
-                    layer_file=layer_file,
-                    internal_code=internal_code
-                ).exists()
+                default_code_dupes = (
+                    str(internal_code) in level_codes or
+                    GeographicalEntity.objects.filter(
+                        layer_file=layer_file,
+                        internal_code=internal_code
+                    ).exists()
+                )
                 layer_error[ErrorType.DUPLICATED_CODES.value] = (
                     ERROR_CHECK if default_code_dupes else ''
                 )
@@ -880,7 +1022,8 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
             # GEOMETRY TOPOLOGY CHECKS
             # Check duplicate geometry
             is_valid_duplicate_geom = do_duplicate_check(
-                geom, internal_code, entity_upload, layer_file, **kwargs
+                geom, internal_code, entity_upload, layer_file,
+                geometry_index=geometry_index, **kwargs
             )
             layer_error[ErrorType.DUPLICATE_GEOMETRIES.value] = (
                 ERROR_CHECK if not is_valid_duplicate_geom else ''
@@ -893,7 +1036,8 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
 
             # Check overlaps
             is_valid_overlaps = do_overlap_check(
-                geom, internal_code, entity_upload, layer_file, **kwargs
+                geom, internal_code, entity_upload, layer_file,
+                geometry_index=geometry_index, **kwargs
             )
             layer_error[ErrorType.OVERLAPS.value] = (
                 ERROR_CHECK if not is_valid_overlaps else ''
@@ -952,60 +1096,38 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
                 temp_entity.metadata['source_value'] if 'source_value' in
                 temp_entity.metadata else None
             )
-            geo, updated = GeographicalEntity.objects.update_or_create(
+            geo = GeographicalEntity(
                 parent=parent,
                 uuid=uuid_str,
                 revision_number=revision,
                 level=level,
-                defaults={
-                    'layer_file': layer_file,
-                    'dataset': (
-                        entity_upload.upload_session.dataset
-                    ),
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'type': geo_entity_type,
-                    'label': label,
-                    'internal_code': str(internal_code),
-                    'geometry': geom,
-                    'is_approved': None,
-                    'is_validated': False,
-                    'is_latest': False,
-                    'ancestor': ancestor if level != 0 else None,
-                    'admin_level_name': admin_level_name,
-                    'privacy_level': geo_privacy_level,
-                    'bbox': (
-                        '[' + ','.join(map(str, geom.extent)) +
-                        ']'
-                    ),
-                    'centroid': geom.point_on_surface.wkt,
-                    'source': source
-                }
+                layer_file=layer_file,
+                dataset=entity_upload.upload_session.dataset,
+                start_date=start_date,
+                end_date=end_date,
+                type=geo_entity_type,
+                label=label,
+                internal_code=str(internal_code),
+                geometry=geom,
+                is_approved=None,
+                is_validated=False,
+                is_latest=False,
+                ancestor=ancestor if level != 0 else None,
+                admin_level_name=admin_level_name,
+                privacy_level=geo_privacy_level,
+                bbox='[' + ','.join(map(str, geom.extent)) + ']',
+                centroid=geom.point_on_surface.wkt,
+                source=source
             )
-            feature_included_idx += 1
-            for name_field in name_fields:
-                try:
-                    EntityName.objects.create(
-                        language_id=name_field['language'],
-                        name=name_field['value'],
-                        geographical_entity=geo,
-                        default=name_field['default'],
-                        label=name_field['label'],
-                        idx=name_field['name_field_idx']
-                    )
-                except IntegrityError:
-                    pass
-
-            for id_field in id_fields:
-                try:
-                    EntityId.objects.create(
-                        code_id=id_field['id_type'],
-                        value=id_field['value'],
-                        default=id_field['default'],
-                        geographical_entity=geo
-                    )
-                except IntegrityError:
-                    pass
+            level_codes.add(geo.internal_code)
+            pending_entities.append((geo, name_fields, id_fields))
+            if geometry_index is not None:
+                geometry_index.add(geo)
+            if (
+                geometry_index is None or
+                len(pending_entities) >= ENTITY_BULK_CREATE_BATCH_SIZE
+            ):
+                create_validated_entities(pending_entities)
 
             if (
                 level == 0 and
@@ -1017,6 +1139,12 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
                 ancestor = entity_upload.revised_geographical_entity
                 # for level 0, only needs to read 1 feature
                 break
+        create_validated_entities(pending_entities)
+        entity_upload.progress = (
+            f'Level {level} - Validation Checks '
+            f'({feature_included_idx} of {total_features} polygons)'
+        )
+        entity_upload.save(update_fields=['progress'])
         # for contained_check + gap_check at level 0,
         # we cannot do at this run_validation since
         # this processes only 1 adm 0 entity
@@ -1028,40 +1156,62 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
                 level=level,
                 ancestor=entity_upload.revised_geographical_entity
             )
+            level_index = None
+            if geometry_index is not None:
+                # the inserted entities are already in the index
+                entity_ids = set(entities.values_list('id', flat=True))
+                level_entities = [
+                    entity for entity in geometry_index.entities if
+                    entity.id in entity_ids
+                ]
+                if len(level_entities) == len(entity_ids):
+                    entities = level_entities
+                    level_index = GeometryIndex(
+                        level_entities,
+                        geometry_index.cell_size
+                    )
+                else:
+                    geometry_index = None
+            if level_index is None:
+                entities = entities.iterator(chunk_size=1)
             # we can do contained check if all features have been inserted
-            for entity in entities.iterator(chunk_size=1):
+            for entity in entities:
                 is_valid = do_contained_check(
                     entity,
                     entity_upload,
                     layer_file,
+                    geometry_index=geometry_index,
                     **kwargs
                 )
-                entity_upload.progress = (
-                    f'Level {level} - Contained Check '
-                    f'({feature_included_idx + 1} of '
-                    f'{total_features} polygons)'
-                )
-                entity_upload.save(update_fields=['progress'])
+                if feature_included_idx % PROGRESS_UPDATE_INTERVAL == 0:
+                    entity_upload.progress = (
+                        f'Level {level} - Contained Check '
+                        f'({feature_included_idx + 1} of '
+                        f'{total_features} polygons)'
+                    )
+                    entity_upload.save(update_fields=['progress'])
                 feature_included_idx += 1
                 if is_valid:
                     continue
                 # find layer_error from validation_summaries
-                layer_errors = [x for x in validation_summaries if
-                                x[ENTITY_CODE] == entity.internal_code]
-                if layer_errors:
-                    layer_error = layer_errors[0]
-                else:
+                layer_error = validation_summaries.find(
+                    level, entity.internal_code)
+                if layer_error is None:
                     # create new layer_error and
                     # add to validation_summaries
                     layer_error = create_layer_error(
                         level, entity.internal_code, entity.label)
+                    validation_summaries.append(layer_error)
                 layer_error[
                     ErrorType.WITHIN_OTHER_FEATURES.value] = ERROR_CHECK
-                if len(layer_errors) == 0:
-                    validation_summaries.append(layer_error)
                 # set flag to level_error_report
                 level_error_report[
                     ErrorType.WITHIN_OTHER_FEATURES.value] += 1
+            entity_upload.progress = (
+                f'Level {level} - Contained Check '
+                f'({feature_included_idx} of {total_features} polygons)'
+            )
+            entity_upload.save(update_fields=['progress'])
             entity_upload.progress = (
                 f'Level {level} - Gaps Check ({total_features} polygons)'
             )
@@ -1070,6 +1220,7 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
             is_valid, errors = do_gap_check(entity_upload,
                                             layer_file,
                                             level,
+                                            geometry_index=level_index,
                                             **kwargs)
             if not is_valid:
                 # set flag to level_error_report
@@ -1116,11 +1267,11 @@ def run_validation(entity_upload: EntityUploadStatus, **kwargs) -> bool:
         entity_upload.superadmin_blocking_errors = superadmin_blocking_errors
         # Save error report to csv
         try:
-            keys = validation_summaries[0].keys()
+            keys = validation_summaries.rows[0].keys()
             csv_buffer = StringIO()
             csv_writer = csv.DictWriter(csv_buffer, keys)
             csv_writer.writeheader()
-            csv_writer.writerows(validation_summaries)
+            csv_writer.writerows(validation_summaries.rows)
 
             csv_file = ContentFile(csv_buffer.getvalue().encode('utf-8'))
             entity_upload.error_report.save(
@@ -0,0 +1,146 @@
+import fiona
+import json
+from django.test import override_settings
+from django.contrib.gis.geos import Polygon
+from georepo.models.entity import GeographicalEntity
+from georepo.utils import absolute_path
+from modules.admin_boundaries.geometry_checker.geometry_index import (
+    GeometryIndex,
+    load_geometry_index,
+    load_layer_file_index
+)
+from modules.admin_boundaries.geometry_checker.overlap import (
+    overlap_check
+)
+from modules.admin_boundaries.geometry_checker.contained_check import (
+    contained_check
+)
+from modules.admin_boundaries.geometry_checker.duplicate_check import (
+    duplicate_check
+)
+from modules.admin_boundaries.geometry_checker.gap import (
+    gap_check
+)
+from georepo.tests.model_factories import (
+    GeographicalEntityF,
+    DatasetF
+)
+from dashboard.tests.model_factories import LayerFileF, LayerUploadSessionF
+from modules.admin_boundaries.tests.geometry_check_test_base import (
+    GeometryCheckTestBase
+)
+
+
+class TestGeometryIndex(GeometryCheckTestBase):
+
+    def init_test_upload(self, file_name):
+        shape_file_path = absolute_path(
+            'modules',
+            'admin_boundaries',
+            'tests',
+            'geometry_checker_data',
+            file_name
+        )
+        dataset = DatasetF.create()
+        upload_session = LayerUploadSessionF.create(
+            dataset=dataset
+        )
+        layer_file = LayerFileF.create(
+            layer_upload_session=upload_session,
+            layer_file=shape_file_path
+        )
+        with fiona.open(f'zip://{shape_file_path}') as features:
+            for feature_idx, feature in enumerate(features):
+                geom_str = json.dumps(feature['geometry'])
+                geom = self.get_geometry(feature_idx, geom_str)
+                if not geom or not geom.valid:
+                    continue
+                GeographicalEntityF.create(
+                    dataset=dataset,
+                    level=0,
+                    geometry=geom,
+                    layer_file=layer_file,
+                    revision_number=1,
+                    internal_code=str(feature_idx),
+                    label=str(feature_idx)
+                )
+        return dataset, layer_file
+
+    @override_settings(MEDIA_ROOT='/home/web/django_project/modules')
+    def test_query(self):
+        dataset, layer_file = self.init_test_upload('polygon_layer.zip')
+        entities = GeographicalEntity.objects.filter(
+            layer_file=layer_file
+        )
+        geometry_index = GeometryIndex(list(entities))
+        geom = Polygon.from_bbox((0, -1, 0.5, 0))
+        self.assertEqual(
+            sorted([entity.id for entity in geometry_index.query(geom)]),
+            sorted(entities.filter(
+                geometry__bboverlaps=geom
+            ).values_list('id', flat=True))
+        )
+        entity = geometry_index.entities[0]
+        excluded = geometry_index.exclude(entity.id)
+        self.assertNotIn(entity, excluded.query(entity.geometry))
+        self.assertIn(entity, geometry_index.query(entity.geometry))
+        # level is not loaded if it has too many vertices
+        self.assertIsNone(load_geometry_index(entities, max_points=1))
+
+    @override_settings(MEDIA_ROOT='/home/web/django_project/modules')
+    def test_polygon_checks(self):
+        tolerance = 1e-8
+        overlap_threshold_map_units = 0.01
+        dataset, layer_file = self.init_test_upload('polygon_layer.zip')
+        entities = GeographicalEntity.objects.filter(
+            layer_file=layer_file
+        ).order_by('id')
+        geometry_index = load_layer_file_index(
+            layer_file,
+            (-180, -90, 180, 90)
+        )
+        self.assertEqual(len(geometry_index.entities), entities.count())
+        for entity in entities:
+            other_geoms = entities.exclude(id=entity.id)
+            other_index = geometry_index.exclude(entity.id)
+            errors, _ = overlap_check(
+                entity.geometry, other_geoms, tolerance,
+                overlap_threshold_map_units)
+            index_errors, _ = overlap_check(
+                entity.geometry, other_index, tolerance,
+                overlap_threshold_map_units)
+            self.assertEqual(
+                sorted([error.feature_id for error in errors]),
+                sorted([error.feature_id for error in index_errors])
+            )
+            errors, _ = contained_check(
+                entity.geometry, entity.internal_code, other_geoms)
+            index_errors, _ = contained_check(
+                entity.geometry, entity.internal_code, other_index)
+            self.assertEqual(len(errors), len(index_errors))
+            errors, _ = duplicate_check(
+                entity.geometry, entity.internal_code, other_geoms)
+            index_errors, _ = duplicate_check(
+                entity.geometry, entity.internal_code, other_index)
+            self.assertEqual(len(errors), len(index_errors))
+
+    @override_settings(MEDIA_ROOT='/home/web/django_project/modules')
+    def test_gap_check(self):
+        tolerance = 1e-8
+        gap_threshold_map_units = 0.01
+        dataset, layer_file = self.init_test_upload('gap_layer.zip')
+        geom_queryset = GeographicalEntity.objects.filter(
+            layer_file=layer_file
+        )
+        errors, _ = gap_check(
+            geom_queryset, tolerance, gap_threshold_map_units)
+        index_errors, _ = gap_check(
+            geom_queryset, tolerance, gap_threshold_map_units,
+            geom_index=load_geometry_index(geom_queryset))
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(
+            [sorted([neighbour['id'] for neighbour in error.neighboring_ids])
+             for error in errors],
+            [sorted([neighbour['id'] for neighbour in error.neighboring_ids])
+             for error in index_errors]
+        )
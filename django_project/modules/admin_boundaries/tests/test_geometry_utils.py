@@ -1,8 +1,13 @@
 from django.test import TestCase
+from django.contrib.gis.geos import LineString, Polygon
 from modules.admin_boundaries.geometry_checker.qvector import QVector
 from modules.admin_boundaries.geometry_checker.geometry_utils import (
     sqr_dist_to_line,
-    segment_intersections
+    segment_intersections,
+    ring_at,
+    ring_vertices,
+    self_intersections,
+    SegmentGrid
 )
 
 
@@ -317,3 +322,34 @@ class TestGeometryUtils(TestCase):
         self.assertTrue(intersection)
         self.assertTrue(is_intersect)
         self.assertEqual(inter, QVector(0, 0))
+
+    def test_ring_vertices(self):
+        polygon = Polygon(
+            ((0, 0), (0, 2), (2, 2), (2, 0), (0, 0)),
+            ((0.5, 0.5), (0.5, 1), (1, 1), (0.5, 0.5))
+        )
+        vertices = ring_vertices(ring_at(polygon, 1))
+        self.assertEqual(len(vertices), 4)
+        self.assertEqual(vertices[2], QVector(1, 1))
+        line = LineString((0, 0, 1), (1, 2, 1))
+        self.assertEqual(ring_vertices(line), [QVector(0, 0), QVector(1, 2)])
+
+    def test_segment_grid(self):
+        vertices = [
+            QVector(0, 0), QVector(4, 4), QVector(4, 0), QVector(0, 4),
+            QVector(100, 100)
+        ]
+        grid = SegmentGrid(vertices, 1e-8)
+        pairs = []
+        for i in range(len(vertices) - 1):
+            for k in range(i + 1, len(vertices) - 1):
+                if grid.is_box_overlap(grid.boxes[i], grid.boxes[k]):
+                    pairs.append((i, k))
+        self.assertEqual(grid.candidate_pairs(), pairs)
+        self.assertEqual(grid.query((50, 50, 50, 50)), [3])
+        line = LineString([(v.x, v.y) for v in vertices])
+        intersections = self_intersections(line, 0, 1e-8)
+        self.assertEqual(len(intersections), 1)
+        self.assertEqual(intersections[0].segment1, 0)
+        self.assertEqual(intersections[0].segment2, 2)
+        self.assertEqual(intersections[0].point, QVector(2, 2))
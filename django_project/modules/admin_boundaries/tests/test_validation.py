@@ -1,6 +1,8 @@
 from django.test import TestCase
+from django.contrib.gis.geos import GEOSGeometry
+from georepo.models.entity import GeographicalEntity, EntityName, EntityId
 from georepo.tests.model_factories import (
-    DatasetF, UserF, ModuleF
+    DatasetF, UserF, ModuleF, LanguageF, IdTypeF
 )
 from dashboard.tests.model_factories import (
     LayerUploadSessionF,
@@ -8,11 +10,17 @@ from dashboard.tests.model_factories import (
 )
 from modules.admin_boundaries.qc_validation import (
     is_validation_result_importable,
-    count_error_categories
+    count_error_categories,
+    create_validated_entities
 )
 from dashboard.models.entity_upload import (
     ERROR, WARNING
 )
+from modules.admin_boundaries.error_type import (
+    ErrorType,
+    ValidationReport,
+    create_layer_error
+)
 
 
 class IsUploadImportableTestCase(TestCase):
@@ -154,3 +162,70 @@ class IsUploadImportableTestCase(TestCase):
         )
         self.assertTrue(is_importable)
         self.assertTrue(is_warning)
+
+
+class CreateValidatedEntitiesTestCase(TestCase):
+
+    def test_create_validated_entities(self):
+        dataset = DatasetF.create()
+        language = LanguageF.create()
+        id_type = IdTypeF.create()
+        geom = GEOSGeometry(
+            'MULTIPOLYGON(((0 0, 0 1, 1 1, 1 0, 0 0)))', srid=4326)
+        pending_entities = []
+        for code in ['PAK001', 'PAK002']:
+            entity = GeographicalEntity(
+                dataset=dataset,
+                level=1,
+                revision_number=1,
+                internal_code=code,
+                label=code,
+                geometry=geom
+            )
+            name_fields = [
+                {
+                    'language': language.id,
+                    'value': f'Name {code}',
+                    'default': True,
+                    'label': None,
+                    'name_field_idx': 0
+                }
+            ]
+            id_fields = [
+                {
+                    'id_type': id_type.id,
+                    'value': code,
+                    'default': True
+                }
+            ]
+            pending_entities.append((entity, name_fields, id_fields))
+        entities = [entity for entity, _, _ in pending_entities]
+        create_validated_entities(pending_entities)
+        self.assertEqual(len(pending_entities), 0)
+        self.assertTrue(all([entity.id for entity in entities]))
+        self.assertEqual(
+            GeographicalEntity.objects.filter(dataset=dataset).count(), 2)
+        names = EntityName.objects.filter(
+            geographical_entity__dataset=dataset)
+        self.assertEqual(names.count(), 2)
+        self.assertEqual(
+            EntityId.objects.filter(
+                geographical_entity__dataset=dataset).count(),
+            2
+        )
+
+
+class ValidationReportTestCase(TestCase):
+
+    def test_find_layer_error(self):
+        report = ValidationReport()
+        layer_error = create_layer_error(1, 'PAK001', 'Punjab')
+        layer_error[ErrorType.OVERLAPS.value] = '1'
+        report.append(layer_error)
+        report.append(create_layer_error(2, 'PAK001', 'Punjab'))
+        report.append(create_layer_error(1, 'PAK001', 'Punjab 2'))
+        self.assertEqual(len(report), 3)
+        self.assertIs(report.find(1, 'PAK001'), layer_error)
+        self.assertEqual(report.find(2, 'PAK001')['Level'], 2)
+        self.assertIsNone(report.find(1, 'PAK002'))
+        self.assertEqual(list(report), report.rows)